@@ -154,7 +154,8 @@ def write_html_dashboard(output_path, today, action_rows, ...):
     # 现在：使用模板系统
     from tech.html_generator import render_dashboard
 
-    html = render_dashboard(
+    # 传入 output_path 时边渲染边写入文件，不在内存中拼出整页字符串
+    render_dashboard(
         today=today,
         action_rows=action_rows,
         filters_html=filters_html,
@@ -164,10 +165,9 @@ def write_html_dashboard(output_path, today, action_rows, ...):
         sku_return_html=sku_return_html,
         low_margin_html=low_margin_html,
         # ... 其他参数
+        output_path=output_path,
     )
 
-    output_path.write_text(html, encoding='utf-8')
-
 优势：
   ✅ 减少主文件 ~800 行代码
   ✅ HTML/CSS 独立管理
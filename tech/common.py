@@ -1,5 +1,6 @@
 from __future__ import annotations
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 import re
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
@@ -19,7 +20,8 @@ LEDGER_COLUMNS: List[str] = [
 ]
 
 def resolve_sheet(path: Path, sheet_name: Optional[str]):
-    wb = load_workbook(path, data_only=True, read_only=True)
+    # 只读流式 + 只取缓存值；外部链接只有回写时才需要，不加载
+    wb = load_workbook(path, data_only=True, read_only=True, keep_links=False)
     if sheet_name:
         if sheet_name not in wb.sheetnames:
             wb.close()
@@ -62,23 +64,30 @@ def to_float(value) -> float:
         except Exception:
             return 0.0
     if isinstance(value, str):
-        stripped = value.strip()
-        if not stripped:
-            return 0.0
-        # Normalize common full-width symbols and currency signs
-        normalized = (
-            stripped.replace('￥', '').replace('¥', '').replace(',', '').replace('，', ',')
-        )
-        # Extract numeric tokens (supports leading +/- and decimals)
-        nums = re.findall(r"[+-]?\d+(?:\.\d+)?", normalized)
-        if not nums:
-            return 0.0
-        try:
-            return float(nums[0])
-        except Exception:
-            return 0.0
+        return _str_to_float(value)
     return 0.0
 
+_NUMBER_TOKEN_RE = re.compile(r"[+-]?\d+(?:\.\d+)?")
+
+@lru_cache(maxsize=8192)
+def _str_to_float(value: str) -> float:
+    """String branch of to_float; amounts repeat heavily across rows, so results are memoized."""
+    stripped = value.strip()
+    if not stripped:
+        return 0.0
+    # Normalize common full-width symbols and currency signs
+    normalized = (
+        stripped.replace('￥', '').replace('¥', '').replace(',', '').replace('，', ',')
+    )
+    # Extract numeric tokens (supports leading +/- and decimals)
+    m = _NUMBER_TOKEN_RE.search(normalized)
+    if not m:
+        return 0.0
+    try:
+        return float(m.group(0))
+    except Exception:
+        return 0.0
+
 def parse_excel_date(raw, today: date) -> Optional[date]:
     if raw is None:
         return None
@@ -18,9 +18,12 @@ import argparse
 import math
 from collections import Counter, defaultdict
 import re
+import sys
 from datetime import date, datetime, timedelta, timezone
 import os
 import calendar
+import tempfile
+import time
 import json
 from pathlib import Path
 import os
@@ -32,7 +35,7 @@ from html import escape
 try:
     from .common import resolve_sheet as common_resolve_sheet, to_float as common_to_float, parse_excel_date as common_parse_excel_date, deduplicate_phone as common_deduplicate_phone, build_header_index as common_build_header_index, lookup_index as common_lookup_index
 except Exception:
-    import sys, os
+    import os
     sys.path.append(os.path.dirname(__file__))
     from common import resolve_sheet as common_resolve_sheet, to_float as common_to_float, parse_excel_date as common_parse_excel_date, deduplicate_phone as common_deduplicate_phone, build_header_index as common_build_header_index, lookup_index as common_lookup_index
 
@@ -63,6 +66,85 @@ COLUMNS = {
     "data_source": ("数据来源",),
 }
 
+# 低毛利预警行数超过该值时不直接输出 tbody，改由前端按可视区窗口渲染
+LOW_PROFIT_VIRTUAL_MIN_ROWS = 500
+
+
+def _interned_str(value: Any) -> str:
+    """低基数字段（平台、厂家、货品名等）在成千上万行里重复，驻留后各行共享同一个字符串对象"""
+    return sys.intern(str(value))
+
+
+# 全库明细字段映射：(输出字段, 首选源字段, 备选源字段, 转换函数)；首选为空时取备选
+_DETAIL_FIELDS: Tuple[Tuple[str, str, Optional[str], Any], ...] = (
+    ("姓名", "姓名", None, str),
+    ("手机号", "手机号", None, str),
+    ("下单时间", "下单时间", "顾客付款日期", str),
+    ("下单平台", "出售平台", "下单平台", _interned_str),
+    ("厂家", "厂家", None, _interned_str),
+    ("货品名", "货品名", None, _interned_str),
+    ("商品名称", "商品名称", None, str),
+    ("颜色", "颜色", None, _interned_str),
+    ("尺码", "尺码", None, _interned_str),
+    ("付款金额", "收款额", "付款金额", common_to_float),
+    ("打款金额", "打款金额", None, common_to_float),
+    ("负责人", "负责人", "跟进人", _interned_str),
+    ("订单号", "单号", "订单号", str),
+    ("退货单号", "退货单号", None, str),
+    ("退款类型", "退款类型", "状态", _interned_str),
+    ("退款原因", "退款原因", None, str),
+    ("备注", "备注", None, str),
+    ("数据来源", "数据来源", None, _interned_str),
+)
+
+# 包装 SaaS 布局时拆分原始页面用的脚本匹配（模块级预编译，多次生成不重复编译）
+_SCRIPT_RE = re.compile(r"<script[^>]*>(.*?)</script>", re.DOTALL)
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _finite(obj: Any) -> Any:
+    """把 NaN/±inf 换成 None（与 orjson 一致输出 null），其余原样返回。"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _json_js(obj: Any) -> str:
+    """序列化为嵌入页面脚本的紧凑 JSON；装了 orjson 时用它（明细数据较大，标准库 json 偏慢）。
+
+    NaN/inf 两条路径都输出 null：orjson 本身如此；标准库先按 allow_nan=False 直接序列化，
+    仅在数据里确有非有限数时才遍历替换，常见情况不多花一次遍历。
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(obj), ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+def _pack_details(details_map: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """全库明细改为"字段表 + 行数组"下发，省掉每行重复的字段名；前端 unpackDetails 还原为对象。"""
+    index: Dict[str, int] = {}
+    for rows in details_map.values():
+        for r in rows:
+            for f in r:
+                if f not in index:
+                    index[f] = len(index)
+    fields = list(index)
+    return {
+        "fields": fields,
+        "rows": {key: [[r.get(f) for f in fields] for r in rows] for key, rows in details_map.items()},
+    }
+
 
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Build customer alerts from billing data.")
@@ -163,6 +245,16 @@ def parse_arguments() -> argparse.Namespace:
         default="sk-0d0e2d8d0a0141dcb4728068ba3d04ff",
         help="DeepSeek API Key for manufacturer analysis.",
     )
+    parser.add_argument(
+        "--no-contact-cache",
+        action="store_true",
+        help="Always fetch the Feishu contact log instead of reusing today's local cache.",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print contact-log loading statistics.",
+    )
     return parser.parse_args()
 
 
@@ -404,6 +496,24 @@ def load_contact_log_extended(path: Path, today: date) -> Tuple[Dict[str, date],
     return contact_map, info_map
 
 
+def recent_contact_keys(contact_log: Optional[Dict[str, date]], today: date, cooldown_days: int) -> List[str]:
+    """返回近 cooldown_days 天内（含今天）联系过的手机号。
+
+    窗口换算成一个起始日期，逐条只做日期比较；无法比较的日期值直接跳过。
+    """
+    if not contact_log or cooldown_days <= 0:
+        return []
+    start = today - timedelta(days=cooldown_days - 1)
+    keys: List[str] = []
+    for ph, last_dt in contact_log.items():
+        try:
+            if start <= last_dt <= today:
+                keys.append(str(ph))
+        except TypeError:
+            continue
+    return keys
+
+
 def fetch_feishu_contact_log(app_token: str, table_id: str, today: date, *, token: Optional[str] = None, view_id: Optional[str] = None) -> Dict[str, date]:
     """从飞书多维表读取联系记录。
 
@@ -547,6 +657,55 @@ def fetch_feishu_contact_log(app_token: str, table_id: str, today: date, *, toke
     return merged
 
 
+# 飞书联系记录本地缓存：同一天内、TTL 内重复生成时跳过飞书接口
+FEISHU_CONTACT_CACHE_PATH = Path.home() / ".cache" / "alerts" / "feishu_contact_log.json"
+FEISHU_CONTACT_CACHE_TTL = 600  # 秒
+
+
+def load_feishu_contact_cache(path: Path, today: date, source: str, ttl: int = FEISHU_CONTACT_CACHE_TTL) -> Optional[Dict[str, date]]:
+    """读取飞书联系记录缓存；日期、数据源不一致或已过期时返回 None。"""
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if payload.get("date") != today.isoformat() or payload.get("source") != source:
+            return None
+        return {str(ph): date.fromisoformat(dt) for ph, dt in (payload.get("contacts") or {}).items()}
+    except Exception:
+        return None
+
+
+def save_feishu_contact_cache(path: Path, today: date, source: str, contact_log: Dict[str, date]) -> None:
+    """写入飞书联系记录缓存；写入失败不影响主流程。
+
+    缓存含客户手机号：目录权限 0700、文件权限 0600；先写同目录临时文件再原子替换，读方不会读到半截文件。
+    """
+    tmp_name = None
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(path.parent, 0o700)
+        payload = {
+            "date": today.isoformat(),
+            "source": source,
+            "contacts": {ph: dt.isoformat() for ph, dt in contact_log.items()},
+        }
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+        # mkstemp 以 0600 创建文件
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=path.name + ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+        tmp_name = None
+    except Exception:
+        pass
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+
 class ConfigModel:
     __slots__ = (
         "defaults",
@@ -2537,42 +2696,48 @@ def write_workbook(
     wb.save(output_path)
 
 
-def build_product_search_index(global_details: Dict[str, List[Dict[str, Any]]]) -> dict:
+_PRODUCT_NAME_STRIP_RE = re.compile(r'[^a-z0-9\u4e00-\u9fff]')
+
+
+def normalize_product_name(name: str) -> str:
+    """规范化：去除非字母数字字符，转小写"""
+    if not name:
+        return ''
+    # 保留中文、英文字母和数字，移除其他字符
+    return _PRODUCT_NAME_STRIP_RE.sub('', str(name).lower())
+
+
+def finish_product_search_index(product_index: Dict[str, set], verbose: bool = False) -> dict:
+    """把 规范化货品名 -> 手机号集合 转换为可序列化格式"""
+    result = {k: list(v) for k, v in product_index.items()}
+    if verbose:
+        print(f"[索引] 货品名索引构建完成: {len(result)}个关键词")
+    return result
+
+
+def build_product_search_index(global_details: Dict[str, List[Dict[str, Any]]], verbose: bool = False) -> dict:
     """
     构建货品名反向索引：规范化货品名 -> [手机号列表]
 
+    main() 在构建 global_details 的同一轮循环里直接累积索引；此函数供已有明细时单独构建。
+
     Args:
         global_details: 全局订单明细字典，key为手机号，value为订单列表
+        verbose: 是否打印索引统计
 
     Returns:
         {"fz1103": ["13800138000", "13900139000"], ...}
     """
-    import re
-    from collections import defaultdict
-
     product_index = defaultdict(set)
 
-    def normalize_product_name(name: str) -> str:
-        """规范化：去除非字母数字字符，转小写"""
-        if not name:
-            return ''
-        # 保留中文、英文字母和数字，移除其他字符
-        normalized = re.sub(r'[^a-z0-9\u4e00-\u9fff]', '', str(name).lower())
-        return normalized
-
     # 遍历所有客户的订单明细
     for phone, orders in global_details.items():
         for order in orders:
-            product_name = order.get('货品名', '')
-            normalized = normalize_product_name(product_name)
+            normalized = normalize_product_name(order.get('货品名', ''))
             if normalized:
                 product_index[normalized].add(str(phone))
 
-    # 转换为可序列化格式
-    result = {k: list(v) for k, v in product_index.items()}
-
-    print(f"[索引] 货品名索引构建完成: {len(result)}个关键词")
-    return result
+    return finish_product_search_index(product_index, verbose)
 
 
 def write_html_dashboard(
@@ -2683,8 +2848,15 @@ def write_html_dashboard(
 
     html_rows: List[str] = []
     detail_map: Dict[str, List[Dict[str, Any]]] = {}
+    # 高/中优先级人数在生成行时顺带统计，供布局顶部统计卡片使用
+    high_priority_count = 0
+    mid_priority_count = 0
     for idx, entry in enumerate(action_rows):
         score = entry.get("priority_score", 0.0)
+        if score >= 80:
+            high_priority_count += 1
+        elif score >= 50:
+            mid_priority_count += 1
         bucket_label = entry.get("priority_bucket") or bucket_priority_score(score)[0]
         if bucket_label:
             summary_counts[bucket_label] += 1
@@ -2954,28 +3126,28 @@ def write_html_dashboard(
     </div>
     """
 
-    tags_js = json.dumps([tag for tag, _ in tag_counter.most_common()], ensure_ascii=False, separators=(',', ':'))
-    platforms_js = json.dumps(sorted(platform_counter.keys()), ensure_ascii=False, separators=(',', ':'))
-    details_js = json.dumps(detail_map, ensure_ascii=False, separators=(',', ':'))
+    tags_js = _json_js([tag for tag, _ in tag_counter.most_common()])
+    platforms_js = _json_js(sorted(platform_counter.keys()))
+    details_js = _json_js(detail_map)
     # Global details for all客户（用于全库单号查询）- 使用压缩JSON格式减小文件大小
     global_details = global_details or {}
-    global_details_js = json.dumps(global_details, ensure_ascii=False, separators=(',', ':'))
+    global_details_js = _json_js(_pack_details(global_details))
     # 货品名搜索索引（规范化货品名 -> 手机号列表）
     product_search_index = product_search_index or {}
-    product_search_index_js = json.dumps(product_search_index, ensure_ascii=False, separators=(',', ':'))
+    product_search_index_js = _json_js(product_search_index)
     # 冷却名单（近N天 Excel/飞书 联系记录内的手机号集合）
     cooldown_keys = cooldown_keys or []
     cooldown_total = len(cooldown_keys)
-    cooldown_keys_js = json.dumps(cooldown_keys, ensure_ascii=False, separators=(',', ':'))
+    cooldown_keys_js = _json_js(cooldown_keys)
     # 冷却期客户联系日期映射
     cooldown_customers = cooldown_customers or {}
-    cooldown_customers_js = json.dumps({k: v.isoformat() if isinstance(v, date) else str(v) for k, v in cooldown_customers.items()}, ensure_ascii=False, separators=(',', ':'))
+    cooldown_customers_js = _json_js({k: v.isoformat() if isinstance(v, date) else str(v) for k, v in cooldown_customers.items()})
     # 跟进人建议与默认（来自环境变量）
     owners_raw = os.getenv('FOLLOWUP_OWNERS') or os.getenv('FEISHU_OWNER_LIST') or ''
     owner_suggestions = [s.strip() for s in owners_raw.split(',') if s and s.strip()]
-    owner_suggestions_js = json.dumps(owner_suggestions, ensure_ascii=False, separators=(',', ':'))
+    owner_suggestions_js = _json_js(owner_suggestions)
     env_default_owner = os.getenv('DEFAULT_FOLLOWUP_OWNER') or os.getenv('FEISHU_CURRENT_USER') or os.getenv('FOLLOWUP_OWNER') or ''
-    env_default_owner_js = json.dumps(env_default_owner, ensure_ascii=False, separators=(',', ':'))
+    env_default_owner_js = _json_js(env_default_owner)
 
     # 顶部冷却提示 HTML 片段，已调整：冷却期客户现在作为独立标签展示，不再隐藏
     if contact_log_used:
@@ -2993,13 +3165,12 @@ def write_html_dashboard(
         meta_cooldown_html = ''
     # Global meta for all customers（供临时行填充真实优先分/标签等）
     global_meta = global_meta or {}
-    global_meta_js = json.dumps(global_meta, ensure_ascii=False, separators=(',', ':'))
+    global_meta_js = _json_js(global_meta)
     # AI Analysis Map (Empty default for now to prevent ReferenceError)
-    ai_analysis_map_js = json.dumps({}, ensure_ascii=False, separators=(',', ':'))
+    ai_analysis_map_js = _json_js({})
     # 构建"加推SKU"候选（近45天 订单>2 且 退货率<30%）
     def build_sku_push_table(all_details: Dict[str, List[Dict[str, Any]]], today: date,
-                             days_window: int = 45, min_orders: int = 3, max_return_rate: float = 0.30,
-                             top_n: int = 50) -> str:
+                             days_window: int = 45, min_orders: int = 3, max_return_rate: float = 0.30) -> str:
         if not all_details:
             return ""
         cutoff = today - timedelta(days=max(1, days_window))
@@ -3070,34 +3241,13 @@ def write_html_dashboard(
                 "<span class=\"text-xs font-normal text-slate-400 ml-2\">(0款)</span></h3>"
                 "<div class=\"scroll-pane border border-slate-200 rounded-lg\"><div class=\"text-sm text-slate-400 text-center py-8\">近45天内暂无符合条件的SKU</div></div></div>"
             )
-        # 排序：订单数降序，其次退货率升序，其次销售额降序
-        rows.sort(key=lambda x: (-x[1], x[2], -x[3]))
+        # 行由页面脚本按 globalRecords 重算并渲染（区块进入视口时），这里只给出卡片与计数，不再重复输出整张表
         total_count = len(rows)
-        rows = rows[:top_n]
-        # 渲染表格
-        body = []
-        for sku, orders, rr, rev in rows:
-            body.append(
-                f"<tr data-sku=\"{escape(sku)}\">"
-                f"<td class=\"font-medium text-slate-700\">{escape(sku)}</td>"
-                f"<td data-sort-value='{orders}'>{orders}</td>"
-                f"<td data-sort-value='{rr:.6f}'>{rr*100:.1f}%</td>"
-                f"<td data-sort-value='{rev:.2f}'>¥{rev:.2f}</td>"
-                f"</tr>"
-            )
-        # 构建完整表格
-        tbl = (
-            "<table class='mini-table w-full'><thead><tr>"
-            "<th>货品名</th><th data-sort-method='number'>订单数</th>"
-            "<th data-sort-method='number'>退货率</th><th data-sort-method='number'>销售额</th>"
-            "</tr></thead>"
-            f"<tbody>{''.join(body)}</tbody></table>"
-        )
         # 返回卡片内容（不包含 summary 包裹层）
         return (
             "<div class=\"card\"><h3>加推SKU（近45天 订单>2 且 退货率<30%） "
             f"<span class=\"text-xs font-normal text-slate-400 ml-2\">(共{total_count}款)</span></h3>"
-            f"<div id=\"skuPushTable\" class=\"scroll-pane border border-slate-200 rounded-lg\">{tbl}</div></div>"
+            "<div id=\"skuPushTable\" class=\"scroll-pane border border-slate-200 rounded-lg\"></div></div>"
         )
 
     sku_push_html = build_sku_push_table(global_details, today)
@@ -3105,7 +3255,12 @@ def write_html_dashboard(
         return (
             "<div class=\"card\">"
             "<h3>高退货预警（明细>3，退货率>30%）</h3>"
-            "<div id=\"skuReturnAlertTable\" class=\"scroll-pane border border-slate-200 rounded-lg\"></div>"
+            "<div id=\"skuReturnAlertTable\" class=\"scroll-pane border border-slate-200 rounded-lg\">"
+            # 表头随页面一次输出，前端只填充 tbody
+            "<table class='mini-table'><thead><tr><th>货品名</th><th data-sort-method='number'>明细笔数</th>"
+            "<th data-sort-method='number'>销售额</th><th data-sort-method='number'>退货率</th><th>退款类型</th></tr></thead>"
+            "<tbody></tbody></table>"
+            "</div>"
             "</div>"
         )
     sku_return_html = build_high_return_placeholder()
@@ -3189,6 +3344,7 @@ def write_html_dashboard(
     
     alert_list = build_alert_list(sku_stats_margin)  # 非代发
     alert_list_proxy = build_alert_list(sku_stats_margin_proxy)  # 代发
+    low_profit_rows = None  # 仅在行数超过阈值时填充，前端据此切换为窗口渲染
     
     if alert_list or alert_list_proxy:
         # 构建非代发表格
@@ -3220,9 +3376,18 @@ def write_html_dashboard(
         
         # 合并两个表格的tbody
         all_tbody = ''.join(tbody_parts) + ''.join(tbody_parts_proxy)
+        # 行数过多时 tbody 留空，行数据（货品名、类型、订单数、毛利率、末单日期、日期排序值）嵌入脚本
+        if len(alert_list) + len(alert_list_proxy) > LOW_PROFIT_VIRTUAL_MIN_ROWS:
+            all_tbody = ""
+            low_profit_rows = [
+                [sku, kind, cnt, round(mr, 6), last_date_str, last_date_obj.strftime("%Y%m%d") if last_date_obj else "00000000"]
+                for kind, items in (("normal", alert_list), ("proxy", alert_list_proxy))
+                for sku, cnt, mr, last_date_str, last_date_obj in items
+            ]
         
         tbl = (
-            "<table class='mini-table w-full' id='lowProfitTable'><thead><tr>"
+            f"<table class='mini-table w-full' id='lowProfitTable' data-lpf='normal' "
+            f"data-lp-normal='{len(alert_list)}' data-lp-proxy='{len(alert_list_proxy)}'><thead><tr>"
             "<th>货品名</th><th data-sort-method='number'>订单数</th>"
             "<th data-sort-method='number'>毛利率</th><th>末单日期</th></tr></thead>"
             f"<tbody>{all_tbody}</tbody></table>"
@@ -3248,38 +3413,8 @@ def write_html_dashboard(
         )
     else:
         low_margin_html = ""
-    # 构建全局单号索引（小写与纯数字形式均可命中）
-    id_index: Dict[str, str] = {}
-    # 新增：姓名索引（小写精确匹配 -> key），便于全库按姓名命中
-    name_index: Dict[str, str] = {}
-    for gkey, drows in global_details.items():
-        if not isinstance(drows, list):
-            continue
-        for d in drows:
-            if not isinstance(d, dict):
-                continue
-            for kk in ("订单号", "退货单号"):
-                val = str(d.get(kk, "")).strip()
-                if not val:
-                    continue
-                id_index[val.lower()] = gkey
-                digits = "".join(ch for ch in val if ch.isdigit())
-                if len(digits) >= 6:
-                    id_index[digits] = gkey
-        # 采集姓名索引（取第一条非空姓名）
-        try:
-            name_candidates = [str(x.get("姓名", "")).strip() for x in drows if isinstance(x, dict)]
-            primary_name = next((n for n in name_candidates if n), "")
-            if primary_name:
-                lower_name = primary_name.lower()
-                # 若同名多 key，仅保留先出现的一个，避免覆盖
-                if lower_name not in name_index:
-                    name_index[lower_name] = gkey
-        except Exception:
-            pass
-    id_index_js = json.dumps(id_index, ensure_ascii=False, separators=(',', ':'))
-    name_index_js = json.dumps(name_index, ensure_ascii=False, separators=(',', ':'))
-    deepseek_key_js = json.dumps(config.deepseek_key or "", ensure_ascii=False)
+    low_profit_rows_js = _json_js(low_profit_rows)
+    deepseek_key_js = _json_js(config.deepseek_key or "")
 
     contact_server_port = int(os.getenv('CONTACT_SERVER_PORT') or '5005')
     contact_write_enabled = str(os.getenv('CONTACT_SERVER') or '0').strip().lower() in ('1','true','yes','on')
@@ -3316,6 +3451,17 @@ def write_html_dashboard(
         @media (max-width: 768px) {{ .summary {{ grid-template-columns: 1fr; }} }}
         .card-wide {{ grid-column: 1 / -1; }}
         .card {{ background: #fff; padding: 16px; border-radius: 8px; box-shadow: 0 2px 6px rgba(0,0,0,0.05); }}
+        /* 摘要卡片在视口外时跳过布局与绘制（表格行本身不支持 containment，只能落在卡片这一层） */
+        .summary > .card {{ content-visibility: auto; contain-intrinsic-size: auto 360px; }}
+        /* 低毛利表按表格上的 data-lpf 过滤，切换时只改一个属性 */
+        #lowProfitTable[data-lpf="normal"] tbody tr[data-type="proxy"], #lowProfitTable[data-lpf="proxy"] tbody tr[data-type="normal"] {{ display: none; }}
+        /* 角色视图由 body[data-role] 一次切换，替代逐个元素写 style.display */
+        body[data-role="operations"] .summary {{ display: grid; }}
+        body[data-role="operations"] .toolbar, body[data-role="operations"] .list-tabs, body[data-role="operations"] .filters {{ display: none; }}
+        body[data-role="customer-service"] .summary {{ display: none; }}
+        body[data-role="customer-service"] .toolbar, body[data-role="customer-service"] .filters {{ display: flex; }}
+        body[data-role="customer-service"] .list-tabs {{ display: block; }}
+        body[data-role="operations"] .operations-search-container {{ display: block; }}
         .role-service #manufacturerCard {{ display:none; }}
         .role-ops #actionTable, .role-ops .toolbar, .role-ops .filters {{ display:none !important; }}
         .role-ops #manufacturerCard {{ display:block !important; }}
@@ -3469,6 +3615,11 @@ def write_html_dashboard(
             if (!table) {{
                 throw new Error('Tablesort requires a table element.');
             }}
+            // 同一张表只绑定一次表头监听，重复构造直接返回已有实例
+            if (table._tablesort) {{
+                return table._tablesort;
+            }}
+            table._tablesort = this;
             this.table = table;
             this.thead = table.querySelector('thead');
             this.headers = this.thead ? Array.from(this.thead.querySelectorAll('th')) : [];
@@ -3494,12 +3645,23 @@ def write_html_dashboard(
                 return;
             }}
             const method = header.getAttribute('data-sort-method') || undefined;
+            // 排序方向只算一次，排序钩子与 DOM 排序共用，保证两种模式首次点击方向一致
+            const currentOrder = header.getAttribute('data-sort-order') || 'asc';
+            const newOrder = currentOrder === 'asc' ? 'desc' : 'asc';
+            // 表格自带排序钩子（如明细抽屉的窗口渲染）时交给它对数据排序
+            if (typeof this.table._sortRows === 'function') {{
+                if (this.table._sortRows(index, method, newOrder)) {{
+                    this.headers.forEach(function (head) {{
+                        if (head !== header) head.removeAttribute('data-sort-order');
+                    }});
+                    header.setAttribute('data-sort-order', newOrder);
+                    return;
+                }}
+            }}
             // 只对可见行进行排序（排除display:none的行）
             const allRows = Array.from(this.tbody.rows);
             const visibleRows = allRows.filter(row => row.style.display !== 'none');
             const hiddenRows = allRows.filter(row => row.style.display === 'none');
-            const currentOrder = header.getAttribute('data-sort-order') || 'asc';
-            const newOrder = currentOrder === 'asc' ? 'desc' : 'asc';
 
             this.headers.forEach(function (head) {{
                 if (head !== header) {{
@@ -3507,9 +3669,14 @@ def write_html_dashboard(
                 }}
             }});
 
-            visibleRows.sort(function (a, b) {{
-                const aVal = getSortValue(a.cells[index], method);
-                const bVal = getSortValue(b.cells[index], method);
+            // 排序键每行只读一次 DOM，再对下标排序，最后按排列移动现有行节点
+            const keys = visibleRows.map(function (row) {{
+                return getSortValue(row.cells[index], method);
+            }});
+            const order = keys.map(function (_, i) {{ return i; }});
+            order.sort(function (i, j) {{
+                const aVal = keys[i];
+                const bVal = keys[j];
                 if (method === 'number') {{
                     return aVal - bVal;
                 }}
@@ -3520,13 +3687,13 @@ def write_html_dashboard(
             }});
 
             if (newOrder === 'desc') {{
-                visibleRows.reverse();
+                order.reverse();
             }}
 
             // 先添加可见行，再添加隐藏行（保持隐藏行在最后）
             const fragment = document.createDocumentFragment();
-            visibleRows.forEach(function (row) {{
-                fragment.appendChild(row);
+            order.forEach(function (i) {{
+                fragment.appendChild(visibleRows[i]);
             }});
             hiddenRows.forEach(function (row) {{
                 fragment.appendChild(row);
@@ -3626,10 +3793,33 @@ def write_html_dashboard(
     const manufacturerFilter = document.getElementById('manufacturerFilter');
     const table = document.getElementById('actionTable');
     const rows = table ? Array.from(table.querySelectorAll('tbody tr')) : [];
+    // 表头第一次被点击时才构造 Tablesort：监听挂在 thead 的捕获阶段，先于 th 上的排序监听执行，
+    // 构造时绑定的 th 监听在本次点击中即生效，无需重新派发
+    function lazyTablesort(t) {{
+        if (!t || t._tablesort || t._tablesortLazy) return;
+        const head = t.querySelector('thead');
+        if (!head) return;
+        t._tablesortLazy = true;
+        head.addEventListener('click', () => {{
+            try {{ new Tablesort(t); }} catch (e) {{}}
+        }}, {{ once: true, capture: true }});
+    }}
+
+    // 区块首次进入视口时才执行初始化（渐进式激活）；元素不存在或不支持 IntersectionObserver 时立即执行
+    function hydrateWhenVisible(el, init) {{
+        if (!el || !window.IntersectionObserver) {{ init(); return; }}
+        const io = new IntersectionObserver(entries => {{
+            if (!entries.some(e => e.isIntersecting)) return;
+            io.disconnect();
+            init();
+        }});
+        io.observe(el);
+    }}
+
     // 启用全局表头点击排序（主表 + 摘要小表）
     try {{
         const allTables = Array.from(document.querySelectorAll('table'));
-        allTables.forEach(t => {{ try {{ new Tablesort(t); }} catch (e) {{}} }});
+        allTables.forEach(lazyTablesort);
         if (table) {{
             const priorityHeader = table.querySelector('th:nth-child(2)');
             if (priorityHeader) {{ priorityHeader.click(); }}
@@ -3667,10 +3857,56 @@ def write_html_dashboard(
     const tags = {tags_js};
     const platforms = {platforms_js};
     const detailMap = {details_js};
-    const globalDetails = {global_details_js};
+    const lowProfitRows = {low_profit_rows_js};
+    // 全库明细以"字段表 + 行数组"下发，加载时还原成按字段名取值的对象（缺失字段以 null 占位，不还原）
+    function unpackDetails(packed) {{
+        const fields = packed.fields || [];
+        const out = {{}};
+        for (const key in packed.rows) {{
+            out[key] = packed.rows[key].map(vals => {{
+                const r = {{}};
+                for (let i = 0; i < fields.length; i++) {{
+                    if (vals[i] != null) r[fields[i]] = vals[i];
+                }}
+                return r;
+            }});
+        }}
+        return out;
+    }}
+    // 打包形式（只有字段值数组）留到交给建索引 Worker 后再释放
+    let globalDetailsPacked = {global_details_js};
+    const globalDetails = unpackDetails(globalDetailsPacked);
     const productSearchIndex = {product_search_index_js};
-    const idIndex = {id_index_js};
-    const nameIndex = {name_index_js};
+    // 单号/姓名索引不随页面下发（内容全在 globalDetails 里），首次全库检索时现建
+    let idIndex = null;
+    let nameIndex = null;
+    function ensureGlobalIndexes() {{
+        if (idIndex) return;
+        idIndex = Object.create(null);
+        nameIndex = Object.create(null);
+        for (const gkey in globalDetails) {{
+            const drows = globalDetails[gkey];
+            if (!Array.isArray(drows)) continue;
+            let primaryName = '';
+            for (const d of drows) {{
+                if (!d || typeof d !== 'object') continue;
+                // 单号/退单号：小写与纯数字（≥6 位）形式均可命中
+                for (const kk of ['订单号', '退货单号']) {{
+                    const val = d[kk] == null ? '' : String(d[kk]).trim();
+                    if (!val) continue;
+                    idIndex[val.toLowerCase()] = gkey;
+                    const digits = digitsOnly(val);
+                    if (digits.length >= 6) idIndex[digits] = gkey;
+                }}
+                if (!primaryName && d['姓名'] != null) primaryName = String(d['姓名']).trim();
+            }}
+            // 姓名取第一条非空；同名多 key 时只保留先出现的一个
+            if (primaryName) {{
+                const lowerName = primaryName.toLowerCase();
+                if (!(lowerName in nameIndex)) nameIndex[lowerName] = gkey;
+            }}
+        }}
+    }}
             const globalMeta = {global_meta_js};
             const aiAnalysisMap = {ai_analysis_map_js};
             const deepseekApiKey = {deepseek_key_js};
@@ -3700,32 +3936,400 @@ def write_html_dashboard(
     // 冷却期客户现已整合进主列表的"冷却期"标签，无需单独面板
 
 
+    // 查询级 LRU：页面内数据不变，同一查询（如输入法组字时反复触发）的解析结果直接复用
+    const queryCache = new Map();
+    const MAX_QUERY_CACHE = 64;
+    function memoQuery(kind, key, compute) {{
+        const ck = kind + '\\x1f' + key;
+        if (queryCache.has(ck)) {{
+            const hit = queryCache.get(ck);
+            queryCache.delete(ck);
+            queryCache.set(ck, hit);
+            return hit;
+        }}
+        const value = compute();
+        if (queryCache.size >= MAX_QUERY_CACHE) {{
+            queryCache.delete(queryCache.keys().next().value);
+        }}
+        queryCache.set(ck, value);
+        return value;
+    }}
+
     // 全库命中解析：优先匹配单号/退单号；其次手机号（key 即为手机号）；最后姓名精确匹配
     function resolveGlobalKey(searchRaw) {{
         if (!searchRaw) {{ return ''; }}
         const lower = String(searchRaw).trim().toLowerCase();
-        const digits = lower.replace(/\D/g, '');
+        return memoQuery('key', lower, () => resolveGlobalKeyUncached(lower));
+    }}
+
+    function resolveGlobalKeyUncached(lower) {{
+        const digits = digitsOnly(lower);
+        ensureGlobalIndexes();
         // 1) 单号/退单号（小写/纯数字）
-        let key = '';
-        if (idIndex && typeof idIndex === 'object') {{
-            key = idIndex[lower] || (digits.length >= 6 ? (idIndex[digits] || '') : '');
-        }}
+        let key = idIndex[lower] || (digits.length >= 6 ? (idIndex[digits] || '') : '');
         // 2) 直接以手机号为 key（常见情况）
         if (!key && digits.length >= 7 && globalDetails && typeof globalDetails === 'object' && globalDetails[digits]) {{
             key = digits;
         }}
         // 3) 姓名精确小写匹配
-        if (!key && nameIndex && typeof nameIndex === 'object') {{
+        if (!key) {{
             key = nameIndex[lower] || '';
         }}
         return key || '';
     }}
 
+    // 去掉非数字字符（等同 replace(/\D/g, '')）；逐字符判断，原本就是纯数字的串原样返回
+    function digitsOnly(s) {{
+        let out = null;
+        for (let i = 0; i < s.length; i++) {{
+            const ch = s.charCodeAt(i);
+            if (ch >= 48 && ch <= 57) {{
+                if (out !== null) out += s[i];
+            }} else if (out === null) {{
+                out = s.slice(0, i);
+            }}
+        }}
+        return out === null ? s : out;
+    }}
+
+    // 取字符串里前 8 个数字拼成 YYYYMMDD 整数，不足 8 位返回 0；逐字符累加，不经正则/中间字符串
+    function extractDate8(s) {{
+        let n = 0, c = 0;
+        for (let i = 0; i < s.length && c < 8; i++) {{
+            const ch = s.charCodeAt(i);
+            if (ch >= 48 && ch <= 57) {{ n = n * 10 + (ch - 48); c++; }}
+        }}
+        return c === 8 ? n : 0;
+    }}
+
+    // 订单的 YYYYMMDD 排序键，算一次后存为不可枚举属性，不会进入字段遍历、搜索索引或导出
+    function orderDate8(r) {{
+        let d = r.__dateDigits;
+        if (d === undefined) {{
+            d = extractDate8(String(r['下单时间'] || ''));
+            Object.defineProperty(r, '__dateDigits', {{ value: d }});
+        }}
+        return d;
+    }}
+
+    // 订单的派生属性（代发/样品、取消、退货、付款金额、下单日），与 orderDate8 一样算一次后存为不可枚举属性
+    function orderTraits(r) {{
+        let t = r.__traits;
+        if (t === undefined) {{
+            const platform = String(r['下单平台'] || '');
+            const prod = String(r['商品名称'] || '');
+            const sku = String(r['货品名'] || '');
+            const rmk = String(r['备注'] || '');
+            const has = w => platform.indexOf(w) !== -1 || prod.indexOf(w) !== -1 || sku.indexOf(w) !== -1 || rmk.indexOf(w) !== -1;
+            const refundType = String(r['退款类型'] || '').trim();
+            const returnNo = String(r['退货单号'] || '').trim();
+            const orderNo = String(r['订单号'] || '').trim();
+            const cancel = refundType.indexOf('取消') !== -1 || orderNo.indexOf('取消') !== -1;
+            // 下单日 YYYYMMDD 整数：取 orderDate8，纯数字的 Excel 序列日期（1899-12-30 起算）另行换算，无效为 0
+            let day8 = orderDate8(r);
+            if (!day8) {{
+                const raw = r['下单时间'];
+                const num = (typeof raw === 'number') ? raw : (/^\d+$/.test(String(raw || '')) ? Number(raw) : NaN);
+                if (num > 0) {{
+                    const d = new Date(1899, 11, 30 + Math.floor(num));
+                    if (!isNaN(d)) day8 = d.getFullYear() * 10000 + (d.getMonth() + 1) * 100 + d.getDate();
+                }}
+            }}
+            t = {{
+                proxy: has('代发'),
+                sample: has('样品'),
+                cancel: cancel,
+                isReturn: !cancel && (refundType.indexOf('退') !== -1 || !!(returnNo && returnNo !== '/' && returnNo !== '-')),
+                pay: Number(r['付款金额'] || 0) || 0,
+                day8: day8,
+            }};
+            Object.defineProperty(r, '__traits', {{ value: t }});
+        }}
+        return t;
+    }}
+
     // 规范化字符串：仅保留 a-z0-9，便于货品名"FZ-1103 / FZ 1103 / FZ1103"等形式统一匹配
+    // 逐字符按码点判断，不经 toLowerCase/正则；原本已是 a-z0-9 的串原样返回，不分配新串
     function normAlphaNum(s) {{
-        return String(s || '').toLowerCase().replace(/[^a-z0-9]/g, '');
+        const str = String(s || '');
+        let out = null;
+        for (let i = 0; i < str.length; i++) {{
+            const c = str.charCodeAt(i);
+            if ((c >= 97 && c <= 122) || (c >= 48 && c <= 57)) {{
+                if (out !== null) out += str[i];
+                continue;
+            }}
+            if (out === null) out = str.slice(0, i);
+            if (c >= 65 && c <= 90) out += String.fromCharCode(c + 32);
+            // toLowerCase 会把 İ(U+0130)、K(U+212A) 转成 ASCII 字母，保持一致
+            else if (c === 0x130) out += 'i';
+            else if (c === 0x212A) out += 'k';
+        }}
+        return out === null ? str : out;
     }}
 
+    // 全库模糊匹配倒排索引：规格化字段值 → 订单行号，首次搜索时构建一次
+    // 之后每次按键只需在去重后的字段值上做子串比较，不再逐单逐字段拼接文本
+    // 全库订单展开成一维数组（行号与 globalRecordKeys 对齐），加载时建一次，
+    // 各处整库遍历直接走下标循环，不再每次 Object.values 再逐客户 forEach
+    const globalRecords = [];
+    const globalRecordKeys = [];
+    for (const k in globalDetails) {{
+        const list = globalDetails[k];
+        if (!Array.isArray(list)) continue;
+        for (let i = 0; i < list.length; i++) {{
+            const r = list[i];
+            if (!r || typeof r !== 'object') continue;
+            globalRecords.push(r);
+            globalRecordKeys.push(k);
+            orderDate8(r);
+        }}
+    }}
+    // 预警客户明细（detailMap）是另一份订单对象，同样在加载时算好日期排序键，抽屉排序只做整数相减
+    for (const k in detailMap) {{
+        const list = detailMap[k];
+        if (!Array.isArray(list)) continue;
+        for (let i = 0; i < list.length; i++) {{
+            if (list[i] && typeof list[i] === 'object') orderDate8(list[i]);
+        }}
+    }}
+
+    // 货品名 / 厂家 / 下单平台 → 订单数组（保持全库顺序），首次打开对应抽屉时建一次，之后点击直接查表
+    let orderGroupIndex = null;
+    function getOrderGroupIndex() {{
+        if (orderGroupIndex) return orderGroupIndex;
+        const bySku = new Map(), byMfr = new Map(), byPlat = new Map();
+        const put = (map, k, r) => {{
+            if (!k) return;
+            let list = map.get(k);
+            if (!list) {{ list = []; map.set(k, list); }}
+            list.push(r);
+        }};
+        for (let i = 0; i < globalRecords.length; i++) {{
+            const r = globalRecords[i];
+            put(bySku, String(r['货品名'] || '').trim(), r);
+            put(byMfr, String(r['厂家'] || '').trim(), r);
+            put(byPlat, String(r['下单平台'] || '').trim(), r);
+        }}
+        orderGroupIndex = {{ bySku: bySku, byMfr: byMfr, byPlat: byPlat }};
+        return orderGroupIndex;
+    }}
+
+    // 由订单数组建倒排表，不引用页面内其他状态（仅依赖 normAlphaNum），可原样放进 Worker 执行；
+    // 行既可以是订单对象，也可以是按字段表顺序的值数组（打包明细的行），两者得到的倒排表相同
+    function buildTokenTables(rows) {{
+        const postings = new Map();
+        // 平台/厂家/状态/颜色等字段取值大量重复：同一原始值只规格化一次
+        const normCache = new Map();
+        try {{
+            for (let rowId = 0; rowId < rows.length; rowId++) {{
+                const r = rows[rowId];
+                for (const kk in r) {{
+                    if (!Object.prototype.hasOwnProperty.call(r, kk)) continue;
+                    const vv = r[kk];
+                    if (typeof vv !== 'string' && typeof vv !== 'number') continue;
+                    let t = normCache.get(vv);
+                    if (t === undefined) {{
+                        t = normAlphaNum(vv);
+                        normCache.set(vv, t);
+                    }}
+                    if (!t) continue;
+                    let ids = postings.get(t);
+                    if (!ids) {{ ids = []; postings.set(t, ids); }}
+                    if (ids[ids.length - 1] !== rowId) ids.push(rowId);
+                }}
+            }}
+        }} catch (e) {{}}
+        // 去重后的字段值再建 3-gram → 字段值下标（升序）的倒排表，查询时只需核对候选值
+        const tokens = Array.from(postings.keys());
+        const trigrams = new Map();
+        for (let ti = 0; ti < tokens.length; ti++) {{
+            const t = tokens[ti];
+            for (let g = 0; g + 3 <= t.length; g++) {{
+                const gram = t.slice(g, g + 3);
+                let list = trigrams.get(gram);
+                if (!list) {{ list = []; trigrams.set(gram, list); }}
+                if (list[list.length - 1] !== ti) list.push(ti);
+            }}
+        }}
+        return {{ tokens: tokens, postings: postings, trigrams: trigrams }};
+    }}
+
+    let globalTokenIndex = null;
+    function setGlobalTokenIndex(tables) {{
+        globalTokenIndex = {{
+            rowKeys: globalRecordKeys,
+            rows: globalRecords,
+            tokens: tables.tokens,
+            postings: tables.postings,
+            trigrams: tables.trigrams,
+        }};
+        return globalTokenIndex;
+    }}
+    function getGlobalTokenIndex() {{
+        if (globalTokenIndex) return globalTokenIndex;
+        // Worker 尚未返回（或不可用）时在主线程同步建一次，结果与 Worker 一致
+        return setGlobalTokenIndex(buildTokenTables(globalRecords));
+    }}
+
+    // 两个升序下标数组求交集
+    function intersectSorted(a, b) {{
+        const out = [];
+        let i = 0, j = 0;
+        while (i < a.length && j < b.length) {{
+            if (a[i] === b[j]) {{ out.push(a[i]); i++; j++; }}
+            else if (a[i] < b[j]) i++;
+            else j++;
+        }}
+        return out;
+    }}
+
+    // 查询词 3 字符及以上时，按其全部 3-gram 的倒排表求交得到候选字段值；更短的查询返回 null，退回全量扫描
+    function trigramCandidates(idx, qn) {{
+        if (qn.length < 3) return null;
+        const lists = [];
+        for (let g = 0; g + 3 <= qn.length; g++) {{
+            const list = idx.trigrams.get(qn.slice(g, g + 3));
+            if (!list) return [];
+            lists.push(list);
+        }}
+        lists.sort((a, b) => a.length - b.length);
+        let cand = lists[0];
+        for (let li = 1; li < lists.length && cand.length; li++) {{
+            cand = intersectSorted(cand, lists[li]);
+        }}
+        return cand;
+    }}
+
+    // 全库命中临时行所需的客户汇总（最近下单日/主要平台/偏好单品/单号集合），按 key 首次用到时计算并缓存
+    const customerStatsCache = new Map();
+    function getCustomerStats(key) {{
+        let st = customerStatsCache.get(key);
+        if (st) return st;
+        const det = (globalDetails && globalDetails[key]) || [];
+        let lastDigits = 0, lastDateStr = '';
+        const platCount = new Map();
+        const itemCount = new Map();
+        const idsSet = new Set();
+        det.forEach(r => {{
+            const n = orderDate8(r);
+            if (n > lastDigits) {{ lastDigits = n; lastDateStr = (r['下单时间'] || ''); }}
+            const p = (r['下单平台'] || '').trim();
+            if (p) platCount.set(p, (platCount.get(p) || 0) + 1);
+            const it = (r['货品名'] || '').trim();
+            if (it) itemCount.set(it, (itemCount.get(it) || 0) + 1);
+            ['订单号','退货单号'].forEach(kf => {{
+                const v = (r[kf] || '').toString().trim();
+                if (v) {{ idsSet.add(v.toLowerCase()); const dg = digitsOnly(v); if (dg.length>=6) idsSet.add(dg); }}
+            }});
+        }});
+        function topKey(map) {{
+            let best = '', cnt = -1;
+            for (const [k, v] of map) {{ if (v > cnt) {{ cnt = v; best = k; }} }}
+            return best;
+        }}
+        st = {{
+            name: det.length ? (det[0]['姓名'] || '') : '',
+            phone: (/^\d{{7,}}$/.test(key) ? key : ''),
+            lastDateStr: lastDateStr,
+            topPlat: topKey(platCount),
+            favItem: topKey(itemCount),
+            ids: idsSet,
+        }};
+        customerStatsCache.set(key, st);
+        return st;
+    }}
+
+    // 返回任一字段包含 qn（已规格化）的订单行号，按原始顺序升序
+    function findGlobalRowIds(qn) {{
+        if (!qn) return [];
+        return memoQuery('rows', qn, () => findGlobalRowIdsUncached(qn));
+    }}
+
+    // 命中行去重用按行号的标记数组（查询间复用，结束时只清掉本次置位的元素），不再经 Set
+    let rowHitMarks = null;
+    function findGlobalRowIdsUncached(qn) {{
+        const idx = getGlobalTokenIndex();
+        if (!rowHitMarks || rowHitMarks.length !== idx.rows.length) rowHitMarks = new Uint8Array(idx.rows.length);
+        const marks = rowHitMarks;
+        const hits = [];
+        const cand = trigramCandidates(idx, qn);
+        const n = cand ? cand.length : idx.tokens.length;
+        for (let i = 0; i < n; i++) {{
+            const t = idx.tokens[cand ? cand[i] : i];
+            if (t.length < qn.length || t.indexOf(qn) === -1) continue;
+            const ids = idx.postings.get(t);
+            for (let j = 0; j < ids.length; j++) {{
+                const id = ids[j];
+                if (!marks[id]) {{ marks[id] = 1; hits.push(id); }}
+            }}
+        }}
+        for (let i = 0; i < hits.length; i++) marks[hits[i]] = 0;
+        return hits.sort((a, b) => a - b);
+    }}
+
+    // 页面加载后把整库规格化和建表交给 Worker（内联 Blob，单文件页面无需额外脚本），
+    // 主线程只在结果回来时接收现成的倒排表；不支持 Worker 时退回空闲时段在主线程预建。
+    // 发给 Worker 的是打包明细的值数组（不带字段名，结构化克隆量小于订单对象），
+    // 按行分片、每片之间让出主线程，不在加载时形成一次长任务
+    const INDEX_POST_CHUNK = 4000;
+    function prebuildIndexInIdle() {{
+        const scheduleIndex = window.requestIdleCallback || (cb => setTimeout(cb, 200));
+        scheduleIndex(() => {{ getGlobalTokenIndex(); }});
+    }}
+    function prebuildIndexInWorker() {{
+        if (!window.Worker || !window.Blob || !window.URL) return false;
+        let worker, url;
+        try {{
+            const src = normAlphaNum.toString() + '\\n' + buildTokenTables.toString() + '\\n' +
+                'const rows = [];\\n' +
+                'self.onmessage = function (e) {{ if (e.data === null) {{ self.postMessage(buildTokenTables(rows)); return; }} ' +
+                'for (const list of e.data) for (let i = 0; i < list.length; i++) rows.push(list[i]); }};';
+            url = URL.createObjectURL(new Blob([src], {{ type: 'text/javascript' }}));
+            worker = new Worker(url);
+        }} catch (e) {{
+            if (url) URL.revokeObjectURL(url);
+            return false;
+        }}
+        const done = () => {{ worker.terminate(); URL.revokeObjectURL(url); }};
+        worker.onmessage = e => {{
+            if (!globalTokenIndex) setGlobalTokenIndex(e.data);
+            done();
+        }};
+        worker.onerror = () => {{ done(); prebuildIndexInIdle(); }};
+        // 按客户键顺序整客户分片发送，Worker 依次展开，行号与 globalRecords 一致
+        const packedByKey = (globalDetailsPacked && globalDetailsPacked.rows) || {{}};
+        const packedKeys = Object.keys(packedByKey);
+        globalDetailsPacked = null;
+        let next = 0;
+        function postChunk() {{
+            // 主线程已同步建好（用户抢先搜索）时不必再发
+            if (globalTokenIndex) {{ done(); return; }}
+            try {{
+                if (next < packedKeys.length) {{
+                    const lists = [];
+                    let n = 0;
+                    while (next < packedKeys.length && n < INDEX_POST_CHUNK) {{
+                        const list = packedByKey[packedKeys[next++]];
+                        lists.push(list);
+                        n += list.length;
+                    }}
+                    worker.postMessage(lists);
+                    setTimeout(postChunk, 0);
+                }} else {{
+                    worker.postMessage(null);
+                }}
+            }} catch (e) {{
+                done();
+                prebuildIndexInIdle();
+            }}
+        }}
+        postChunk();
+        return true;
+    }}
+    if (globalRecords.length && !prebuildIndexInWorker()) prebuildIndexInIdle();
+    globalDetailsPacked = null;
+
     // ==================== 搜索性能优化 ====================
     // LRU 缓存：最多保存 50 个搜索结果
     const searchCache = new Map();
@@ -3734,7 +4338,7 @@ def write_html_dashboard(
     /**
      * 缓存搜索结果
      * @param {{string}} key - 规范化的搜索关键词
-     * @param {{object}} value - 搜索结果（matchedCustomers）
+     * @param {{Map}} value - 搜索结果（matchedCustomers，手机号 → 命中信息）
      */
     function cacheSearchResult(key, value) {{
         // LRU 驱逐：删除最早的条目
@@ -3749,7 +4353,7 @@ def write_html_dashboard(
     /**
      * 获取缓存的搜索结果
      * @param {{string}} key - 规范化的搜索关键词
-     * @returns {{object|null}} - 缓存的结果或 null
+     * @returns {{Map|null}} - 缓存的结果或 null
      */
     function getCachedSearchResult(key) {{
         if (searchCache.has(key)) {{
@@ -3760,6 +4364,65 @@ def write_html_dashboard(
     }}
     // =====================================================
 
+    // 货品名后缀数组：所有货品 key 的全部后缀排序后，子串查询 = 二分定位前缀区间，首次模糊查询时构建
+    let productSuffixIndex = null;
+    function getProductSuffixIndex() {{
+        if (productSuffixIndex) return productSuffixIndex;
+        const productKeys = Object.keys(productSearchIndex || {{}});
+        const entries = [];
+        for (let id = 0; id < productKeys.length; id++) {{
+            const pk = productKeys[id];
+            for (let i = 0; i < pk.length; i++) entries.push([pk.slice(i), id]);
+        }}
+        entries.sort((a, b) => (a[0] < b[0] ? -1 : (a[0] > b[0] ? 1 : a[1] - b[1])));
+        const suffixes = new Array(entries.length);
+        const ids = new Int32Array(entries.length);
+        for (let i = 0; i < entries.length; i++) {{
+            suffixes[i] = entries[i][0];
+            ids[i] = entries[i][1];
+        }}
+        productSuffixIndex = {{ productKeys: productKeys, suffixes: suffixes, ids: ids }};
+        return productSuffixIndex;
+    }}
+
+    // 返回包含 normalized 的货品 key，顺序与 productSearchIndex 的键序一致
+    function productKeysContaining(normalized) {{
+        if (!normalized) return [];
+        return memoQuery('product', normalized, () => productKeysContainingUncached(normalized));
+    }}
+
+    function productKeysContainingUncached(normalized) {{
+        const idx = getProductSuffixIndex();
+        const sfx = idx.suffixes;
+        let lo = 0, hi = sfx.length;
+        while (lo < hi) {{
+            const mid = (lo + hi) >>> 1;
+            if (sfx[mid] < normalized) lo = mid + 1; else hi = mid;
+        }}
+        const hit = new Set();
+        for (let i = lo; i < sfx.length && sfx[i].startsWith(normalized); i++) hit.add(idx.ids[i]);
+        return Array.from(hit).sort((a, b) => a - b).map(id => idx.productKeys[id]);
+    }}
+
+    // 货品名命中的客户集合按规格化关键词缓存：同一关键词下逐行判断只需一次 Set 查找
+    const productMatchCache = new Map();
+
+    function productMatchKeys(normalized) {{
+        let keys = productMatchCache.get(normalized);
+        if (keys) return keys;
+        keys = new Set();
+        // 模糊匹配索引（支持部分匹配，如"FZ"匹配"FZ1103"；完全相等同样命中）
+        productKeysContaining(normalized).forEach(productKey => {{
+            const customerKeys = productSearchIndex[productKey];
+            if (Array.isArray(customerKeys)) customerKeys.forEach(k => keys.add(k));
+        }});
+        if (productMatchCache.size >= MAX_CACHE_SIZE) {{
+            productMatchCache.delete(productMatchCache.keys().next().value);
+        }}
+        productMatchCache.set(normalized, keys);
+        return keys;
+    }}
+
     /**
      * 通过货品名搜索客户（使用预建索引）
      * @param {{string}} key - 客户key（手机号）
@@ -3773,21 +4436,7 @@ def write_html_dashboard(
         const normalized = normAlphaNum(search);
         if (!normalized) return false;
 
-        // 精确匹配索引
-        if (productSearchIndex[normalized] && Array.isArray(productSearchIndex[normalized])) {{
-            if (productSearchIndex[normalized].includes(key)) {{
-                return true;
-            }}
-        }}
-
-        // 模糊匹配索引（支持部分匹配，如"FZ"匹配"FZ1103"）
-        for (const [productKey, customerKeys] of Object.entries(productSearchIndex)) {{
-            if (productKey.includes(normalized) && Array.isArray(customerKeys) && customerKeys.includes(key)) {{
-                return true;
-            }}
-        }}
-
-        return false;
+        return productMatchKeys(normalized).has(key);
     }}
 
     function populateSelect(select, values) {{
@@ -3812,54 +4461,50 @@ def write_html_dashboard(
     var twoMonthsMs = 60 * 24 * 60 * 60 * 1000;
 
     if (typeof globalDetails === 'object' && globalDetails) {{
-        Object.values(globalDetails).forEach(function(customerOrders) {{
-            if (!Array.isArray(customerOrders)) return;
-            customerOrders.forEach(function(order) {{
-                if (!order || typeof order !== 'object') return;
-                var mfr = (order['厂家'] || '').trim();
-                if (!mfr) return;
-                
-                var refundType = String(order['退款类型'] || '').trim();
-                var returnNo = String(order['退货单号'] || '').trim();
-                var orderNo = String(order['订单号'] || '').trim();
-                var payRaw = order['付款金额'];
-                var pay = parseFloat(payRaw);
-                
-                // 优化判定逻辑：排除“取消”和“补”
-                var isCancelOrSupp = /取消|补/.test(refundType) || /取消|补/.test(orderNo);
-                var isReturn = !isCancelOrSupp && (/退/.test(refundType) || (returnNo && returnNo !== '/' && returnNo !== '-' && returnNo.toLowerCase() !== 'none'));
-                
-                var isValidOrder = isFinite(pay) && pay > 0 && !isCancelOrSupp;
+        globalRecords.forEach(function(order) {{
+            var mfr = (order['厂家'] || '').trim();
+            if (!mfr) return;
+            
+            var refundType = String(order['退款类型'] || '').trim();
+            var returnNo = String(order['退货单号'] || '').trim();
+            var orderNo = String(order['订单号'] || '').trim();
+            var payRaw = order['付款金额'];
+            var pay = parseFloat(payRaw);
+            
+            // 优化判定逻辑：排除“取消”和“补”
+            var isCancelOrSupp = /取消|补/.test(refundType) || /取消|补/.test(orderNo);
+            var isReturn = !isCancelOrSupp && (/退/.test(refundType) || (returnNo && returnNo !== '/' && returnNo !== '-' && returnNo.toLowerCase() !== 'none'));
+            
+            var isValidOrder = isFinite(pay) && pay > 0 && !isCancelOrSupp;
 
-                // 日期逻辑
-                var dateStr = order['下单时间'] || order['下单日期'] || order['顾客付款日期'] || order['付款日期'] || '';
-                var orderMs = 0;
-                if (dateStr) {{
-                    orderMs = new Date(dateStr).getTime();
-                }}
+            // 日期逻辑
+            var dateStr = order['下单时间'] || order['下单日期'] || order['顾客付款日期'] || order['付款日期'] || '';
+            var orderMs = 0;
+            if (dateStr) {{
+                orderMs = new Date(dateStr).getTime();
+            }}
 
-                if (!manufacturerStats[mfr]) {{
-                    manufacturerStats[mfr] = {{ orders: 0, returns: 0, revenue: 0, orders_1m: 0, orders_2m: 0 }};
-                }}
-                if (isValidOrder) {{
-                    manufacturerStats[mfr].orders += 1;
-                    manufacturerStats[mfr].revenue += Math.max(0, pay);
-                    
-                    if (orderMs > 0) {{
-                        var diff = nowMs - orderMs;
-                        if (diff <= oneMonthMs) {{
-                            manufacturerStats[mfr].orders_1m += 1;
-                        }}
-                        if (diff <= twoMonthsMs) {{
-                            manufacturerStats[mfr].orders_2m += 1;
-                        }}
+            if (!manufacturerStats[mfr]) {{
+                manufacturerStats[mfr] = {{ orders: 0, returns: 0, revenue: 0, orders_1m: 0, orders_2m: 0 }};
+            }}
+            if (isValidOrder) {{
+                manufacturerStats[mfr].orders += 1;
+                manufacturerStats[mfr].revenue += Math.max(0, pay);
+                
+                if (orderMs > 0) {{
+                    var diff = nowMs - orderMs;
+                    if (diff <= oneMonthMs) {{
+                        manufacturerStats[mfr].orders_1m += 1;
                     }}
-                    
-                    if (isReturn) {{
-                        manufacturerStats[mfr].returns += 1;
+                    if (diff <= twoMonthsMs) {{
+                        manufacturerStats[mfr].orders_2m += 1;
                     }}
                 }}
-            }});
+                
+                if (isReturn) {{
+                    manufacturerStats[mfr].returns += 1;
+                }}
+            }}
         }});
     }}
 
@@ -3878,7 +4523,11 @@ def write_html_dashboard(
             returnRate: returnRate, 
             aov: aov,
             orders_1m: stat.orders_1m,
-            orders_2m: stat.orders_2m
+            orders_2m: stat.orders_2m,
+            // 展示文案只格式化一次，图表/表格与指标切换时直接复用
+            rrLabel: (returnRate * 100).toFixed(1) + '%',
+            aovLabel: aov.toFixed(2),
+            aovShortLabel: aov.toFixed(0)
         }};
     }}).filter(function(m) {{
         return m.orders_1m >= 1 && m.orders_2m >= 5;
@@ -3916,22 +4565,30 @@ def write_html_dashboard(
 
             var MAX_BARS = 10;
 
+            // manufacturerList 页面内不变：按指标缓存排好序的下标序列，切换指标不再重复排序
+            var sortIndexCache = new Map();
+
             function getSortedByMetric(metric) {{
-                var data = manufacturerList.slice();
-                if (metric === 'return_rate') {{
-                    data.sort(function(a, b) {{
-                        return (b.returnRate - a.returnRate) || (b.orders - a.orders);
-                    }});
-                }} else if (metric === 'aov') {{
-                    data.sort(function(a, b) {{
-                        return (b.aov - a.aov) || (b.orders - a.orders);
-                    }});
-                }} else {{
-                    data.sort(function(a, b) {{
-                        return b.orders - a.orders;
-                    }});
+                var key = (metric === 'return_rate' || metric === 'aov') ? metric : 'orders';
+                var order = sortIndexCache.get(key);
+                if (!order) {{
+                    var cmp;
+                    if (key === 'return_rate') {{
+                        cmp = function(a, b) {{ return (b.returnRate - a.returnRate) || (b.orders - a.orders); }};
+                    }} else if (key === 'aov') {{
+                        cmp = function(a, b) {{ return (b.aov - a.aov) || (b.orders - a.orders); }};
+                    }} else {{
+                        cmp = function(a, b) {{ return b.orders - a.orders; }};
+                    }}
+                    order = manufacturerList.map(function(_, i) {{ return i; }});
+                    order.sort(function(i, j) {{ return cmp(manufacturerList[i], manufacturerList[j]); }});
+                    sortIndexCache.set(key, order);
+                }}
+                var data = [];
+                for (var k = 0; k < order.length && k < MAX_BARS; k++) {{
+                    data.push(manufacturerList[order[k]]);
                 }}
-                return data.slice(0, MAX_BARS);
+                return data;
             }}
             
             function showManufacturerDetails(mfrName) {{
@@ -3943,56 +4600,51 @@ def write_html_dashboard(
                 const cutoffTime = now.getTime() - (60 * 24 * 60 * 60 * 1000);
 
                 if (typeof globalDetails === 'object' && globalDetails) {{
-                    Object.values(globalDetails).forEach(function(customerOrders) {{
-                        if (!Array.isArray(customerOrders)) return;
-                        customerOrders.forEach(function(order) {{
-                            if ((order['厂家'] || '').trim() === mfrName) {{
-                                // Parse date to filter old orders
-                                let odStr = String(order['下单时间'] || '');
-                                let odTime = 0;
-                                // Try standard YYYY-MM-DD match first for speed/accuracy
-                                const match = odStr.match(/(\d{4})[-\/](\d{1,2})[-\/](\d{1,2})/);
-                                if (match) {{
-                                    odTime = new Date(parseInt(match[1]), parseInt(match[2])-1, parseInt(match[3])).getTime();
-                                }} else {{
-                                    const ts = Date.parse(odStr);
-                                    if (!isNaN(ts)) odTime = ts;
-                                }}
-                                
-                                // Skip if older than 60 days (and valid date found)
-                                if (odTime > 0 && odTime < cutoffTime) return;
+                    (getOrderGroupIndex().byMfr.get(mfrName) || []).forEach(function(order) {{
+                        // Parse date to filter old orders
+                        let odStr = String(order['下单时间'] || '');
+                        let odTime = 0;
+                        // Try standard YYYY-MM-DD match first for speed/accuracy
+                        const match = odStr.match(/(\d{4})[-\/](\d{1,2})[-\/](\d{1,2})/);
+                        if (match) {{
+                            odTime = new Date(parseInt(match[1]), parseInt(match[2])-1, parseInt(match[3])).getTime();
+                        }} else {{
+                            const ts = Date.parse(odStr);
+                            if (!isNaN(ts)) odTime = ts;
+                        }}
+                        
+                        // Skip if older than 60 days (and valid date found)
+                        if (odTime > 0 && odTime < cutoffTime) return;
 
-                                rows.push(order);
-                                
-                                // SKU Aggregation
-                                const sku = (order['货品名'] || '未知').trim();
-                                if (!skuStats[sku]) {{
-                                    skuStats[sku] = {{ orders: 0, returns: 0, revenue: 0, cost: 0, validMarginOrders: 0 }};
-                                }}
-                                
-                                const pay = parseFloat(order['付款金额'] || 0) || 0;
-                                const cost = parseFloat(order['打款金额'] || 0) || 0;
-                                const refundType = String(order['退款类型'] || order['状态'] || '').trim();
-                                const orderNo = String(order['订单号'] || '').trim();
-                                const returnNo = String(order['退货单号'] || '').trim();
-                                
-                                // 判定逻辑：排除“取消”和“补”
-                                var isCancelOrSupp = /取消|补/.test(refundType) || /取消|补/.test(orderNo);
-                                var isReturn = !isCancelOrSupp && (/退/.test(refundType) || (returnNo && returnNo !== '/' && returnNo !== '-'));
-                                
-                                skuStats[sku].orders += 1;
-                                skuStats[sku].revenue += pay;
-                                skuStats[sku].cost += cost;
-                                
-                                if (isReturn) {{
-                                    skuStats[sku].returns += 1;
-                                }}
-                                
-                                if (pay > 0 && cost > 0) {{
-                                    skuStats[sku].validMarginOrders += 1;
-                                }}
-                            }}
-                        }});
+                        rows.push(order);
+                        
+                        // SKU Aggregation
+                        const sku = (order['货品名'] || '未知').trim();
+                        if (!skuStats[sku]) {{
+                            skuStats[sku] = {{ orders: 0, returns: 0, revenue: 0, cost: 0, validMarginOrders: 0 }};
+                        }}
+                        
+                        const pay = parseFloat(order['付款金额'] || 0) || 0;
+                        const cost = parseFloat(order['打款金额'] || 0) || 0;
+                        const refundType = String(order['退款类型'] || order['状态'] || '').trim();
+                        const orderNo = String(order['订单号'] || '').trim();
+                        const returnNo = String(order['退货单号'] || '').trim();
+                        
+                        // 判定逻辑：排除“取消”和“补”
+                        var isCancelOrSupp = /取消|补/.test(refundType) || /取消|补/.test(orderNo);
+                        var isReturn = !isCancelOrSupp && (/退/.test(refundType) || (returnNo && returnNo !== '/' && returnNo !== '-'));
+                        
+                        skuStats[sku].orders += 1;
+                        skuStats[sku].revenue += pay;
+                        skuStats[sku].cost += cost;
+                        
+                        if (isReturn) {{
+                            skuStats[sku].returns += 1;
+                        }}
+                        
+                        if (pay > 0 && cost > 0) {{
+                            skuStats[sku].validMarginOrders += 1;
+                        }}
                     }});
                 }}
                 
@@ -4022,14 +4674,16 @@ def write_html_dashboard(
                 highReturnSkus.sort((a, b) => b.rate - a.rate);
                 lowMarginSkus.sort((a, b) => a.margin - b.margin);
 
-                // Sort orders by date descending
+                // Sort orders by date descending（YYYYMMDD 整数键，比较时不再构造 Date）
+                const mfrDateKey = function(r) {{
+                    return r['下单时间'] ? orderDate8(r) : extractDate8(String(r['下单日期'] || r['顾客付款日期'] || ''));
+                }};
                 rows.sort(function(a, b) {{
-                    var da = new Date(a['下单时间'] || a['下单日期'] || a['顾客付款日期'] || '');
-                    var db = new Date(b['下单时间'] || b['下单日期'] || b['顾客付款日期'] || '');
-                    return db - da;
+                    return mfrDateKey(b) - mfrDateKey(a);
                 }});
 
                 // Reuse global detail panel elements
+                ensureDrawer();
                 if (detailTitle) detailTitle.innerHTML = mfrName + ' - 厂家订单明细 <span style="font-size:0.8em; color:#64748b; font-weight:normal;">(近60天: ' + rows.length + ' 条)</span>';
                 
                 // Inject Diagnosis Panel
@@ -4158,122 +4812,51 @@ def write_html_dashboard(
                     aiDiv.style.display = 'none';
                 }}
 
-                if (detailTbody) detailTbody.innerHTML = '';
-                
-                if (!rows.length) {{
-                    const tr = document.createElement('tr');
-                    const td = document.createElement('td');
-                    td.colSpan = 15;
-                    td.textContent = '暂无数据';
-                    tr.appendChild(td);
-                    if (detailTbody) detailTbody.appendChild(tr);
-                }} else {{
-                    const frag = document.createDocumentFragment();
-                    rows.forEach(function(r) {{
-                        const tr = document.createElement('tr');
-                        const paymentAmt = r['付款金额'];
-                        const costAmt = r['打款金额'];
-                        
-                        // Helper function for margin calculation
-                        const calcM = (typeof calcMargin === 'function') ? calcMargin : function(p, c) {{
-                            const pv = parseFloat(p) || 0;
-                            const cv = parseFloat(c) || 0;
-                            if (pv <= 0) return '-';
-                            return ((pv - cv) / pv * 100).toFixed(1) + '%';
-                        }};
-
-                        const formatA = (typeof formatAmount === 'function') ? formatAmount : function(v) {{
-                            const n = parseFloat(v);
-                            return isFinite(n) ? n.toFixed(2) : '';
-                        }};
-
-                        const cols = [
-                            r['姓名'] || '',
-                            r['手机号'] || '',
-                            (r['下单时间'] || ''),
-                            r['下单平台'] || '',
-                            r['厂家'] || '',
-                            (r['商品名称'] || r['货品名'] || ''),
-                            r['颜色'] || r['色号'] || '',
-                            r['尺码'] || r['规格'] || r['码数'] || '',
-                            formatA(paymentAmt),
-                            formatA(costAmt),
-                            calcM(paymentAmt, costAmt),
-                            r['订单号'] || '',
-                            r['退货单号'] || '',
-                            r['退款类型'] || '',
-                            r['退款原因'] || ''
-                        ];
-                        
-                        cols.forEach(function(text, i) {{
-                            const td = document.createElement('td');
-                            // Add sorting attributes
-                            if (i === 2) {{ // Date
-                                const digits = String(text).replace(/\D/g, '');
-                                if (digits.length >= 8) {{ td.setAttribute('data-sort-value', digits.slice(0,8)); }}
-                            }} else if (i === 8 || i === 9) {{ // Amounts
-                                const val = parseFloat(text);
-                                if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-                            }} else if (i === 10) {{ // Margin
-                                const marginText = String(text).replace('%', '');
-                                const val = parseFloat(marginText);
-                                if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-                            }}
-                            
-                            td.textContent = text;
-                            tr.appendChild(td);
-                        }});
-                        frag.appendChild(tr);
-                    }});
-                    if (detailTbody) detailTbody.appendChild(frag);
-                }}
+                // 与其他明细抽屉同一渲染路径（行数多时按可视区窗口渲染）
+                renderDetailRows(rows);
 
                 // Show Panel
                 if (detailBackdrop) detailBackdrop.classList.remove('hidden');
                 if (panel) panel.classList.remove('hidden');
                 panelOpen = true;
-
-                // Re-init tablesort
-                if (typeof Tablesort !== 'undefined' && detailTable) {{
-                    try {{ new Tablesort(detailTable); }} catch (e) {{}}
-                }}
             }}
 
             function renderChart(metric) {{
                 var data = getSortedByMetric(metric);
-                if (chartContainer) {{ chartContainer.innerHTML = ''; }}
-                
+
                 if (!data.length) {{
                     if (chartContainer) {{
                         chartContainer.innerHTML = '<div style="color:#94a3b8; font-size:12px; text-align:center; padding-top:40px;">暂无足够的厂家订单数据</div>';
                     }}
-                    if (tableBody) {{ tableBody.innerHTML = ''; }}
+                    if (tableBody) {{ tableBody.replaceChildren(); }}
                     return;
                 }}
 
                 // 如果没有图容器，跳过图渲染，仅填充表格
                 if (chartContainer) {{
+                    // 单次遍历求最大值，避免 data.map 临时数组与 apply 参数展开
+                    var maxKey = metric === 'return_rate' ? 'returnRate' : (metric === 'aov' ? 'aov' : 'orders');
                     var maxValue = 0;
+                    for (var mi = 0; mi < data.length; mi++) {{
+                        var mv = data[mi][maxKey];
+                        if (mv > maxValue) maxValue = mv;
+                    }}
                     if (metric === 'return_rate') {{
-                        maxValue = Math.max.apply(null, data.map(function(d){{ return d.returnRate; }})); 
                         maxValue = Math.max(0.5, maxValue);
-                    }} else if (metric === 'aov') {{
-                        maxValue = Math.max.apply(null, data.map(function(d){{ return d.aov; }}));
-                    }} else {{
-                        maxValue = Math.max.apply(null, data.map(function(d){{ return d.orders; }}));
                     }}
-                    var fragChart = document.createDocumentFragment();
+                    // 整段拼接条形图 HTML，一次 innerHTML 解析；点击通过容器委托
+                    var chartHtml = '';
                     data.forEach(function(d, idx) {{
                         var val = 0;
                         var label = '';
                         var barColor = '#3b82f6';
                         if (metric === 'return_rate') {{
                             val = d.returnRate;
-                            label = (d.returnRate * 100).toFixed(1) + '%';
+                            label = d.rrLabel;
                             barColor = val > 0.35 ? '#ef4444' : (val > 0.20 ? '#f59e0b' : '#10b981');
                         }} else if (metric === 'aov') {{
                             val = d.aov;
-                            label = '¥' + d.aov.toFixed(0);
+                            label = '¥' + d.aovShortLabel;
                             barColor = '#8b5cf6';
                         }} else {{
                             val = d.orders;
@@ -4281,47 +4864,25 @@ def write_html_dashboard(
                             barColor = '#0ea5e9';
                         }}
                         var pct = maxValue ? (val / maxValue) * 100 : 0;
-                        var rowDiv = document.createElement('div');
-                        rowDiv.style.marginBottom = '12px';
-                        rowDiv.style.cursor = 'pointer';
-                        rowDiv.title = '点击查看详情';
-                        rowDiv.onclick = function() {{ showManufacturerDetails(d.name); }};
-                        var labelDiv = document.createElement('div');
-                        labelDiv.style.display = 'flex';
-                        labelDiv.style.justifyContent = 'space-between';
-                        labelDiv.style.fontSize = '12px';
-                        labelDiv.style.marginBottom = '4px';
-                        labelDiv.style.color = '#64748b';
-                        var nameSpan = document.createElement('span');
-                        nameSpan.textContent = (idx + 1) + '. ' + d.name;
-                        nameSpan.style.fontWeight = '600';
-                        nameSpan.style.color = '#334155';
-                        var valSpan = document.createElement('span');
-                        valSpan.textContent = label;
-                        valSpan.style.fontFamily = 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace';
-                        labelDiv.appendChild(nameSpan);
-                        labelDiv.appendChild(valSpan);
-                        var trackDiv = document.createElement('div');
-                        trackDiv.style.height = '6px';
-                        trackDiv.style.background = '#f1f5f9';
-                        trackDiv.style.borderRadius = '3px';
-                        trackDiv.style.overflow = 'hidden';
-                        var fillDiv = document.createElement('div');
-                        fillDiv.style.width = pct + '%';
-                        fillDiv.style.height = '100%';
-                        fillDiv.style.background = barColor;
-                        fillDiv.style.borderRadius = '3px';
-                        fillDiv.style.transition = 'width 0.5s ease-out';
-                        trackDiv.appendChild(fillDiv);
-                        rowDiv.appendChild(labelDiv);
-                        rowDiv.appendChild(trackDiv);
-                        fragChart.appendChild(rowDiv);
+                        chartHtml += '<div data-idx="' + idx + '" title="点击查看详情" style="margin-bottom:12px; cursor:pointer;">'
+                            + '<div style="display:flex; justify-content:space-between; font-size:12px; margin-bottom:4px; color:#64748b;">'
+                            + '<span style="font-weight:600; color:#334155;">' + (idx + 1) + '. ' + escapeHtml(d.name) + '</span>'
+                            + '<span style="font-family:ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, monospace;">' + escapeHtml(label) + '</span>'
+                            + '</div>'
+                            + '<div style="height:6px; background:#f1f5f9; border-radius:3px; overflow:hidden;">'
+                            + '<div style="width:' + pct + '%; height:100%; background:' + barColor + '; border-radius:3px; transition:width 0.5s ease-out;"></div>'
+                            + '</div></div>';
                     }});
-                    chartContainer.appendChild(fragChart);
+                    chartContainer.innerHTML = chartHtml;
+                    chartContainer.onclick = function(e) {{
+                        var row = e.target && e.target.closest ? e.target.closest('[data-idx]') : null;
+                        if (!row || !chartContainer.contains(row)) return;
+                        var d = data[parseInt(row.getAttribute('data-idx'), 10)];
+                        if (d) showManufacturerDetails(d.name);
+                    }};
                 }}
 
                 // Render Table (re-use the same data sorted by metric)
-                tableBody.innerHTML = '';
                 var fragTable = document.createDocumentFragment();
                 data.forEach(function(d) {{
                     var tr = document.createElement('tr');
@@ -4331,8 +4892,8 @@ def write_html_dashboard(
                     tr.onmouseover = function() {{ this.style.backgroundColor = '#f1f5f9'; }};
                     tr.onmouseout = function() {{ this.style.backgroundColor = ''; }};
 
-                    var rrPct = (d.returnRate * 100).toFixed(1) + '%';
-                    var aovVal = d.aov.toFixed(2);
+                    var rrPct = d.rrLabel;
+                    var aovVal = d.aovLabel;
                     var cols = [
                         d.name,
                         String(d.orders),
@@ -4365,13 +4926,26 @@ def write_html_dashboard(
                     }});
                     fragTable.appendChild(tr);
                 }});
-                tableBody.appendChild(fragTable);
+                tableBody.replaceChildren(fragTable);
             }}
 
             var initialMetric = (metricSelect && metricSelect.value) || 'return_rate';
-            renderChart(initialMetric);
+            // 厂家图表不在首屏时推迟到接近视口再渲染，避免与首屏渲染争抢主线程
+            var chartObserver = null;
+            if (chartContainer && typeof IntersectionObserver === 'function') {{
+                chartObserver = new IntersectionObserver(function(entries, obs) {{
+                    if (!entries.some(function(en) {{ return en.isIntersecting; }})) return;
+                    obs.disconnect();
+                    chartObserver = null;
+                    renderChart((metricSelect && metricSelect.value) || initialMetric);
+                }}, {{ rootMargin: '200px' }});
+                chartObserver.observe(chartContainer);
+            }} else {{
+                renderChart(initialMetric);
+            }}
             if (metricSelect) {{
                 metricSelect.addEventListener('change', function() {{
+                    if (chartObserver) {{ chartObserver.disconnect(); chartObserver = null; }}
                     renderChart(metricSelect.value || 'return_rate');
                 }});
             }}
@@ -4391,6 +4965,14 @@ def write_html_dashboard(
     }}
 
     function sanitizeFollowupMap() {{
+        // 先检查是否存在过期条目，没有则不重建对象
+        const hasStale = Object.keys(followupMap).some(key => {{
+            const entry = followupMap[key];
+            return !(entry && entry.date === todayStr);
+        }});
+        if (!hasStale) {{
+            return;
+        }}
         const cleaned = {{}};
         Object.entries(followupMap).forEach(([key, entry]) => {{
             if (entry && entry.date === todayStr) {{
@@ -4411,15 +4993,40 @@ def write_html_dashboard(
             : '';
     }}
 
-    function persistFollowupMap() {{
-        if (Object.keys(followupMap).length) {{
-            localStorage.setItem(storageKey, JSON.stringify(followupMap));
-        }} else {{
-            localStorage.removeItem(storageKey);
+    // 连续勾选合并为一次空闲时写入，避免每次点击同步序列化并写 localStorage
+    let persistPending = false;
+
+    function flushFollowupMap() {{
+        persistPending = false;
+        try {{
+            if (Object.keys(followupMap).length) {{
+                localStorage.setItem(storageKey, JSON.stringify(followupMap));
+            }} else {{
+                localStorage.removeItem(storageKey);
+            }}
+        }} catch (err) {{
+            console.warn('保存标记失败:', err);
         }}
+    }}
+
+    function persistFollowupMap() {{
         updateSummary();
+        if (persistPending) {{
+            return;
+        }}
+        persistPending = true;
+        const schedule = window.requestIdleCallback || (cb => setTimeout(cb, 50));
+        schedule(() => {{
+            if (persistPending) flushFollowupMap();
+        }});
     }}
 
+    // 页面隐藏/关闭前补写尚未落盘的标记
+    window.addEventListener('pagehide', () => {{ if (persistPending) flushFollowupMap(); }});
+    document.addEventListener('visibilitychange', () => {{
+        if (document.visibilityState === 'hidden' && persistPending) flushFollowupMap();
+    }});
+
     function setRowState(row, checked) {{
         if (!row) {{
             return;
@@ -4432,338 +5039,323 @@ def write_html_dashboard(
 
     const checkboxes = Array.from(document.querySelectorAll('.followup-checkbox'));
     checkboxes.forEach(checkbox => {{
-        const row = checkbox.closest('tr');
-        const key = checkbox.dataset.key;
-        if (followupMap[key]) {{
+        if (followupMap[checkbox.dataset.key]) {{
             checkbox.checked = true;
-            setRowState(row, true);
+            setRowState(checkbox.closest('tr'), true);
         }}
-        checkbox.addEventListener('change', () => {{
+    }});
+
+    // 标记完成复选框统一在主表上委托监听，行内（含全库命中临时行）不再各自绑定
+    function handleFollowupChange(checkbox) {{
+        const row = checkbox.closest('tr');
+        const key = checkbox.dataset.key;
+        if (row && row.classList.contains('synthetic-row')) {{
             if (checkbox.checked) {{
-                const ownerToUse = (ownerSelect && ownerSelect.value)
-                    || (ownerInput && ownerInput.value && ownerInput.value.trim())
-                    || (envDefaultOwner || '')
-                    || (row && row.getAttribute('data-owner'))
-                    || '';
-                followupMap[key] = {{
-                    phone: checkbox.dataset.phone,
-                    name: checkbox.dataset.name,
-                    date: todayStr,
-                    platform: (row && row.getAttribute('data-platform')) || '',
-                    owner: ownerToUse,
-                    note: '已在仪表盘标记完成',
-                    timestamp: new Date().toISOString(),
-                }};
+                followupMap[key] = {{ phone: checkbox.dataset.phone, name: checkbox.dataset.name, date: todayStr, timestamp: new Date().toISOString() }};
                 setRowState(row, true);
-                if (writeEnabled) {{
-                    const payload = {{
-                        phone: checkbox.dataset.phone || '',
-                        name: checkbox.dataset.name || '',
-                        owner: ownerToUse,
-                        platform: (row && row.getAttribute('data-platform')) || '',
-                        note: '已在仪表盘标记完成',
-                    }};
-                    markCompleted(payload).then(ok => {{
-                        if (!ok) {{
-                            alert('写入飞书失败，请稍后重试');
-                            checkbox.checked = false;
-                            delete followupMap[key];
-                            setRowState(row, false);
-                            persistFollowupMap();
-                        }}
-                    }});
-                }}
             }} else {{
                 delete followupMap[key];
                 setRowState(row, false);
             }}
             persistFollowupMap();
+            return;
+        }}
+        if (checkbox.checked) {{
+            const ownerToUse = (ownerSelect && ownerSelect.value)
+                || (ownerInput && ownerInput.value && ownerInput.value.trim())
+                || (envDefaultOwner || '')
+                || (row && row.getAttribute('data-owner'))
+                || '';
+            followupMap[key] = {{
+                phone: checkbox.dataset.phone,
+                name: checkbox.dataset.name,
+                date: todayStr,
+                platform: (row && row.getAttribute('data-platform')) || '',
+                owner: ownerToUse,
+                note: '已在仪表盘标记完成',
+                timestamp: new Date().toISOString(),
+            }};
+            setRowState(row, true);
+            if (writeEnabled) {{
+                const payload = {{
+                    phone: checkbox.dataset.phone || '',
+                    name: checkbox.dataset.name || '',
+                    owner: ownerToUse,
+                    platform: (row && row.getAttribute('data-platform')) || '',
+                    note: '已在仪表盘标记完成',
+                }};
+                markCompleted(payload).then(ok => {{
+                    if (!ok) {{
+                        alert('写入飞书失败，请稍后重试');
+                        checkbox.checked = false;
+                        delete followupMap[key];
+                        setRowState(row, false);
+                        persistFollowupMap();
+                    }}
+                }});
+            }}
+        }} else {{
+            delete followupMap[key];
+            setRowState(row, false);
+        }}
+        persistFollowupMap();
+    }}
+
+    if (table) {{
+        table.addEventListener('change', (e) => {{
+            const cb = e.target;
+            if (cb && cb.classList && cb.classList.contains('followup-checkbox')) handleFollowupChange(cb);
         }});
-    }});
+    }}
 
     // 当前选中的列表
     let currentList = '全部';
 
     // 检查客户的订单中是否包含指定厂家
+    // 每个客户涉及的厂家集合，首次用到时从全库订单整理并缓存
+    const customerManufacturerCache = new Map();
+
     function matchesManufacturerForCustomer(customerKey, targetManufacturer) {{
         if (!targetManufacturer || !globalDetails || !customerKey) return true;
-        const customerOrders = globalDetails[customerKey];
-        if (!Array.isArray(customerOrders)) return false;
-        return customerOrders.some(order => {{
-            const mfr = (order['厂家'] || '').trim();
-            return mfr === targetManufacturer;
+        let mfrs = customerManufacturerCache.get(customerKey);
+        if (!mfrs) {{
+            const customerOrders = globalDetails[customerKey];
+            if (!Array.isArray(customerOrders)) return false;
+            mfrs = new Set();
+            customerOrders.forEach(order => {{
+                const mfr = (order['厂家'] || '').trim();
+                if (mfr) mfrs.add(mfr);
+            }});
+            customerManufacturerCache.set(customerKey, mfrs);
+        }}
+        return mfrs.has(targetManufacturer);
+    }}
+
+    // 全库命中临时行的汇总数据挂在 WeakMap 上，不再写成一串 data-* 属性；行移除后随之回收
+    const syntheticRowMeta = new WeakMap();
+    // 当前插入主表的全库命中临时行 {{ key, tr }}，没有时为 null
+    let syntheticRow = null;
+
+    // 行文本与单号在页面内不变：首次搜索时小写化并缓存到行对象上，避免每次按键重复 toLowerCase
+    function rowSearchBlob(row) {{
+        if (row._searchBlob === undefined) {{
+            row._searchBlob = row.textContent.toLowerCase();
+            const meta = syntheticRowMeta.get(row);
+            row._idsLower = meta ? Array.from(meta.ids).join('|') : (row.getAttribute('data-ids') || '').toLowerCase();
+        }}
+        return row._searchBlob;
+    }}
+
+    // 全库命中临时行：整行拼接 HTML 一次插入，再给复选框和行绑定事件
+    const SYNTHETIC_HEADERS = ['标记完成','优先分','姓名','主要平台','手机号','最近下单日','风险标签','推荐动作','偏好单品','有效订单数','退货率','未复购天数','平均客单价'];
+    function appendSyntheticRow(tbody, key) {{
+        const det = globalDetails[key] || [];
+        const st = getCustomerStats(key);
+        const name = st.name;
+        const phone = st.phone;
+        const meta = (globalMeta && globalMeta[key]) ? globalMeta[key] : null;
+        const prClass = meta && meta.priority_class ? meta.priority_class : 'priority-other';
+        const scoreDisp = meta && typeof meta.priority_score === 'number' ? String(Math.round(meta.priority_score)) : '';
+        const ords = meta && typeof meta.orders === 'number' ? String(meta.orders) : String(det.length || '');
+        const rr = meta && typeof meta.return_rate === 'number' ? (meta.return_rate*100).toFixed(1)+'%' : '';
+        const ds = meta && typeof meta.days === 'number' ? String(meta.days) : '';
+        const aov = meta && typeof meta.aov === 'number' ? meta.aov.toFixed(2) : '';
+        const fav = meta && meta.favorite ? meta.favorite : (st.favItem || '');
+        const values = [
+            scoreDisp,        // 优先分
+            name,             // 姓名
+            st.topPlat || (meta && meta.platform ? meta.platform : ''),    // 主要平台
+            phone || '',      // 手机号
+            st.lastDateStr || (meta && meta.last_order ? meta.last_order : ''),
+            '全库命中(未纳入触达)', // 风险标签
+            '',               // 推荐动作
+            fav,              // 偏好单品
+            ords,             // 有效订单数
+            rr,               // 退货率
+            ds,               // 未复购天数
+            aov,              // 平均客单价
+        ];
+        // 只保留定位用的 data-key/phone/name，其余汇总放进 syntheticRowMeta
+        let html = '<tr class="' + escapeHtml(prClass) + ' synthetic-row"'
+            + ' data-key="' + escapeHtml(key) + '" data-phone="' + escapeHtml(phone) + '" data-name="' + escapeHtml(name) + '"';
+        html += '><td data-header="' + SYNTHETIC_HEADERS[0] + '"><input type="checkbox" class="followup-checkbox"'
+            + ' data-key="' + escapeHtml(key) + '" data-phone="' + escapeHtml(phone) + '" data-name="' + escapeHtml(name) + '"></td>';
+        for (let i = 0; i < values.length; i++) {{
+            html += '<td data-header="' + SYNTHETIC_HEADERS[i + 1] + '">' + escapeHtml(values[i] || '') + '</td>';
+        }}
+        html += '</tr>';
+        tbody.insertAdjacentHTML('beforeend', html);
+        const tr = tbody.lastElementChild;
+        syntheticRowMeta.set(tr, {{
+            key: key,
+            phone: phone,
+            name: name,
+            score: meta && meta.priority_score !== undefined ? meta.priority_score : null,
+            bucket: meta && meta.priority_bucket ? meta.priority_bucket : '负分',
+            platform: st.topPlat,
+            lastDateStr: st.lastDateStr,
+            ids: st.ids,
         }});
+        // 打勾与点击打开明细由主表上的委托监听处理
+        return tr;
     }}
 
+    // 风险标签单元格内容同样不变，拆分结果缓存到行上
+    function rowTags(row) {{
+        if (row._tags === undefined) {{
+            const tagCell = row.querySelector('td[data-header="风险标签"]');
+            const tagText = tagCell ? tagCell.textContent.trim() : '';
+            row._tags = tagText.split(',').map(t => t.trim());
+        }}
+        return row._tags;
+    }}
+
+    // 行的 data-* 属性在页面内不变：首次筛选时抽成按行号对齐的列数组，
+    // 优先级/平台/列表三列再按取值编码成整数，筛选时只比较整数
+    let rowColumns = null;
+
+    function internCode(dict, value) {{
+        let code = dict.get(value);
+        if (code === undefined) {{
+            code = dict.size;
+            dict.set(value, code);
+        }}
+        return code;
+    }}
+
+    function lookupCode(dict, value) {{
+        const code = dict.get(value);
+        return code === undefined ? -1 : code;
+    }}
+
+    function getRowColumns() {{
+        if (rowColumns) return rowColumns;
+        const n = rows.length;
+        const cols = {{
+            keys: new Array(n),
+            bucketCodes: new Uint16Array(n),
+            platformCodes: new Uint16Array(n),
+            listCodes: new Uint16Array(n),
+            bucketDict: new Map(),
+            platformDict: new Map(),
+            listDict: new Map(),
+        }};
+        for (let i = 0; i < n; i++) {{
+            const row = rows[i];
+            cols.keys[i] = row.getAttribute('data-key') || '';
+            cols.bucketCodes[i] = internCode(cols.bucketDict, row.dataset.bucket || '');
+            cols.platformCodes[i] = internCode(cols.platformDict, row.dataset.platform || '');
+            cols.listCodes[i] = internCode(cols.listDict, row.dataset.list || '活跃培养');  // 新增：获取所属列表
+        }}
+        rowColumns = cols;
+        return cols;
+    }}
+
+    // 上一次生效的筛选条件签名；筛选框的 input 与 change 会对同一取值各触发一次，条件未变时直接跳过
+    let lastFilterSig = null;
+
+    // 当前货品搜索客户表对应的查询与结果对象；两者都未变时保留已渲染的表格
+    let productTableState = null;
+
+    // 货品搜索客户表超过该行数时改为窗口化渲染：只保留可视区上下各 OVERSCAN 行，其余用占位行撑开高度
+    const PRODUCT_VIRTUAL_MIN_ROWS = 200;
+    const PRODUCT_ROW_OVERSCAN = 10;
+    const PRODUCT_SCROLL_HEIGHT = 480;
+
     function applyFilters() {{
-        const search = searchBox ? searchBox.value.trim().toLowerCase() : '';
+        const searchRawValue = searchBox ? searchBox.value.trim() : '';
+        const search = searchRawValue.toLowerCase();
         const priority = priorityFilter ? priorityFilter.value : '';
         const tag = tagFilter ? tagFilter.value : '';
         const platform = platformFilter ? platformFilter.value : '';
         const manufacturer = manufacturerFilter ? manufacturerFilter.value : '';
+        const filterSig = [searchRawValue, priority, tag, platform, manufacturer, currentList].join('\\x1f');
+        if (filterSig === lastFilterSig) {{
+            return;
+        }}
+        lastFilterSig = filterSig;
+
+        // 筛选值转成整数编码；不在字典中的值编码为 -1，必然不命中
+        const cols = getRowColumns();
+        const priorityCode = priority ? lookupCode(cols.bucketDict, priority) : -1;
+        const platformCode = platform ? lookupCode(cols.platformDict, platform) : -1;
+        const cooldownCode = lookupCode(cols.listDict, '冷却期');
+        const listCode = lookupCode(cols.listDict, currentList);
+        const showAllLists = currentList === '全部';
 
+        // 先只读判定每行是否显示，再统一写 display，避免读写交错
         let visible = 0;
-        rows.forEach(row => {{
-            const rowPriority = row.dataset.bucket || '';
-            const rowPlatform = row.dataset.platform || '';
-            const rowList = row.dataset.list || '活跃培养';  // 新增：获取所属列表
-            const tagCell = row.querySelector('td[data-header="风险标签"]');
-            const tagText = tagCell ? tagCell.textContent.trim() : '';
-            const idsAttr = (row.getAttribute('data-ids') || '').toLowerCase();
-            const key = row.getAttribute('data-key') || '';
+        const showBits = new Uint8Array(rows.length);
+        for (let i = 0; i < rows.length; i++) {{
+            // 整数比较的筛选放前面，命中后再做字符串搜索
+            if (priority && cols.bucketCodes[i] !== priorityCode) continue;
+            if (platform && cols.platformCodes[i] !== platformCode) continue;
+            // 列表过滤：默认“全部”不显示冷却期客户，避免重复触达
+            if (showAllLists ? cols.listCodes[i] === cooldownCode : cols.listCodes[i] !== listCode) continue;
+
+            const row = rows[i];
+            const key = cols.keys[i];
+            if (tag && !rowTags(row).includes(tag)) continue;
+            if (manufacturer && !matchesManufacturerForCustomer(key, manufacturer)) continue;
 
             // 增强搜索逻辑：支持全文、订单号、货品名搜索
             const matchesSearch = !search ||
-                row.textContent.toLowerCase().includes(search) ||
-                idsAttr.includes(search) ||
+                rowSearchBlob(row).includes(search) ||
+                row._idsLower.includes(search) ||
                 matchesProductName(key, search);  // 新增：货品名搜索
 
-            const matchesPriority = !priority || rowPriority === priority;
-            const matchesTag = !tag || tagText.split(',').map(t => t.trim()).includes(tag);
-            const matchesPlatform = !platform || rowPlatform === platform;
-            const matchesManufacturer = !manufacturer || matchesManufacturerForCustomer(key, manufacturer);
-            // 列表过滤：默认“全部”不显示冷却期客户，避免重复触达
-            const matchesList = (currentList === '全部'
-                ? (rowList !== '冷却期')
-                : (rowList === currentList));
-
-            if (matchesSearch && matchesPriority && matchesTag && matchesPlatform && matchesManufacturer && matchesList) {{
-                row.style.display = '';
+            if (matchesSearch) {{
+                showBits[i] = 1;
                 visible++;
-            }} else {{
-                row.style.display = 'none';
             }}
-        }});
+        }}
+        for (let i = 0; i < rows.length; i++) {{
+            const want = showBits[i] ? '' : 'none';
+            if (rows[i].style.display !== want) rows[i].style.display = want;
+        }}
         // 在无匹配时尝试插入“全库命中”的临时行（支持单号/退单号/手机号/姓名），以便下方表格也可查看
         const tbody = table ? table.querySelector('tbody') : null;
-        // 清理旧的临时行
-        if (tbody) {{
-            Array.from(tbody.querySelectorAll('tr.synthetic-row')).forEach(tr => tr.remove());
-        }}
-        let addedSynthetic = false;
-        if (tbody) {{
-            const hasVisible = visible > 0;
-            const searchRaw = searchBox ? searchBox.value.trim() : '';
-            if (!hasVisible && searchRaw) {{
-                const _key = resolveGlobalKey(searchRaw);
-                if (_key && globalDetails && globalDetails[_key]) {{
-                    const det = globalDetails[_key] || [];
-                    // 基础字段
-                    const name = det.length ? (det[0]['姓名'] || '') : '';
-                    const phone = (/^\d{7,}$/.test(_key) ? _key : '');
-                    // 最近下单日
-                    let lastDigits = 0, lastDateStr = '';
-                    det.forEach(r => {{
-                        const d = String(r['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-                        if (d && d.length === 8) {{
-                            const n = parseInt(d, 10);
-                            if (n > lastDigits) {{ lastDigits = n; lastDateStr = (r['下单时间'] || ''); }}
-                        }}
-                    }});
-                    // 平台/偏好
-                    const platCount = {{}};
-                    const itemCount = {{}};
-                    det.forEach(r => {{
-                        const p = (r['下单平台'] || '').trim();
-                        if (p) platCount[p] = (platCount[p] || 0) + 1;
-                        const it = (r['货品名'] || '').trim();
-                        if (it) itemCount[it] = (itemCount[it] || 0) + 1;
-                    }});
-                    function topKey(map) {{
-                        let best = '', cnt = -1;
-                        Object.keys(map).forEach(k => {{ if (map[k] > cnt) {{ cnt = map[k]; best = k; }} }});
-                        return best;
-                    }}
-                    const topPlat = topKey(platCount);
-                    const favItem = topKey(itemCount);
-                    // data-ids
-                    const idsSet = new Set();
-                    det.forEach(r => {{
-                        ['订单号','退货单号'].forEach(kf => {{
-                            const v = (r[kf] || '').toString().trim();
-                            if (v) {{ idsSet.add(v.toLowerCase()); const dg = v.replace(/\D/g,''); if (dg.length>=6) idsSet.add(dg); }}
-                        }});
-                    }});
-                    const idsAttr = Array.from(idsSet).join('|');
-
-                    const tr = document.createElement('tr');
-                    const meta = (globalMeta && globalMeta[_key]) ? globalMeta[_key] : null;
-                    const prClass = meta && meta.priority_class ? meta.priority_class : 'priority-other';
-                    tr.className = prClass + ' synthetic-row';
-                    tr.setAttribute('data-key', _key);
-                    tr.setAttribute('data-phone', phone);
-                    tr.setAttribute('data-name', name);
-                    tr.setAttribute('data-score', meta && meta.priority_score !== undefined ? String(meta.priority_score) : '');
-                    tr.setAttribute('data-bucket', meta && meta.priority_bucket ? meta.priority_bucket : '负分');
-                    tr.setAttribute('data-platform', topPlat);
-                    tr.setAttribute('data-last-order', lastDateStr);
-                    tr.setAttribute('data-cycle', '');
-                    tr.setAttribute('data-threshold', '');
-                    tr.setAttribute('data-category-cycle', '');
-                    tr.setAttribute('data-ids', idsAttr);
-
-                    const headers = ['标记完成','优先分','姓名','主要平台','手机号','最近下单日','风险标签','推荐动作','偏好单品','有效订单数','退货率','未复购天数','平均客单价'];
-                    const scoreDisp = meta && typeof meta.priority_score === 'number' ? String(Math.round(meta.priority_score)) : '';
-                    const valueLevel = meta && meta.customer_value ? meta.customer_value : '';
-                    const ords = meta && typeof meta.orders === 'number' ? String(meta.orders) : String(det.length || '');
-                    const rr = meta && typeof meta.return_rate === 'number' ? (meta.return_rate*100).toFixed(1)+'%' : '';
-                    const ds = meta && typeof meta.days === 'number' ? String(meta.days) : '';
-                    const aov = meta && typeof meta.aov === 'number' ? meta.aov.toFixed(2) : '';
-                    const fav = meta && meta.favorite ? meta.favorite : (favItem || '');
-                    const values = [
-                        scoreDisp,        // 优先分
-                        name,             // 姓名
-                        topPlat || (meta && meta.platform ? meta.platform : ''),    // 主要平台
-                        phone || '',      // 手机号
-                        lastDateStr || (meta && meta.last_order ? meta.last_order : ''),
-                        '全库命中(未纳入触达)', // 风险标签
-                        '',               // 推荐动作
-                        fav,              // 偏好单品
-                        ords,             // 有效订单数
-                        rr,               // 退货率
-                        ds,               // 未复购天数
-                        aov,              // 平均客单价
-                    ];
-                    // 复用打勾逻辑
-                    const cb = document.createElement('input');
-                    cb.type = 'checkbox';
-                    cb.className = 'followup-checkbox';
-                    cb.setAttribute('data-key', _key);
-                    cb.setAttribute('data-phone', phone);
-                    cb.setAttribute('data-name', name);
-                    headers.forEach((h, idx) => {{
-                        const td = document.createElement('td');
-                        td.setAttribute('data-header', h);
-                        if (idx === 0) {{
-                            td.appendChild(cb);
-                        }} else {{
-                            td.textContent = values[idx-1] || '';
-                        }}
-                        tr.appendChild(td);
-                    }});
-                    cb.addEventListener('change', () => {{
-                        if (cb.checked) {{
-                            followupMap[_key] = {{ phone: phone, name: name, date: todayStr, timestamp: new Date().toISOString() }};
-                            setRowState(tr, true);
-                        }} else {{
-                            delete followupMap[_key];
-                            setRowState(tr, false);
-                        }}
-                        persistFollowupMap();
-                    }});
-                    tr.addEventListener('click', (e) => {{
-                        if (panelOpen) return;
-                        const isCheckbox = e.target && (e.target.tagName === 'INPUT' || e.target.closest('input'));
-                        if (isCheckbox) return;
-                        openDetailForKey(_key, name);
-                    }});
-                    tbody.appendChild(tr);
-                    addedSynthetic = true;
-                }} else {{
-                    // 若未命中客户 key，则尝试在全库中寻找“包含关键字”的最相关客户（遍历整行文本）
-                    const qn = normAlphaNum(searchRaw);
-                    let bestKey = '';
-                    let bestCount = 0;
-                    try {{
-                        Object.entries(globalDetails || {{}}).forEach(([k, list]) => {{
-                            if (!Array.isArray(list)) return;
-                            let c = 0;
-                            for (let i=0;i<list.length;i++) {{
-                                const r = list[i];
-                                if (!r || typeof r !== 'object') continue;
-                                let blob = '';
-                                try {{
-                                    for (const kk in r) {{
-                                        if (!Object.prototype.hasOwnProperty.call(r, kk)) continue;
-                                        const vv = r[kk];
-                                        if (vv === null || vv === undefined) continue;
-                                        if (typeof vv === 'string' || typeof vv === 'number') blob += ' ' + String(vv);
-                                    }}
-                                }} catch (e) {{}}
-                                const txt = normAlphaNum(blob);
-                                if (txt && qn && txt.indexOf(qn) !== -1) c += 1;
-                            }}
-                            if (c > bestCount) {{ bestCount = c; bestKey = k; }}
-                        }});
-                    }} catch (e) {{}}
-                    if (bestKey && globalDetails[bestKey]) {{
-                        const det = globalDetails[bestKey] || [];
-                        const name = det.length ? (det[0]['姓名'] || '') : '';
-                        const phone = (/^\d{7,}$/.test(bestKey) ? bestKey : '');
-                        let lastDigits = 0, lastDateStr = '';
-                        det.forEach(r => {{
-                            const d = String(r['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-                            if (d && d.length === 8) {{
-                                const n = parseInt(d, 10);
-                                if (n > lastDigits) {{ lastDigits = n; lastDateStr = (r['下单时间'] || ''); }}
-                            }}
-                        }});
-                        const platCount = {{}};
-                        const itemCount = {{}};
-                        det.forEach(r => {{
-                            const p = (r['下单平台'] || '').trim();
-                            if (p) platCount[p] = (platCount[p] || 0) + 1;
-                            const it = (r['货品名'] || '').trim();
-                            if (it) itemCount[it] = (itemCount[it] || 0) + 1;
-                        }});
-                        function topKey(map) {{ let best = '', cnt = -1; Object.keys(map).forEach(k => {{ if (map[k] > cnt) {{ cnt = map[k]; best = k; }} }}); return best; }}
-                        const topPlat = topKey(platCount);
-                        const favItem = topKey(itemCount);
-                        const idsSet = new Set();
-                        det.forEach(r => {{
-                            ['订单号','退货单号'].forEach(kf => {{
-                                const v = (r[kf] || '').toString().trim();
-                                if (v) {{ idsSet.add(v.toLowerCase()); const dg = v.replace(/\D/g,''); if (dg.length>=6) idsSet.add(dg); }}
-                            }});
-                        }});
-                        const idsAttr = Array.from(idsSet).join('|');
-                        const tr = document.createElement('tr');
-                    const meta = (globalMeta && globalMeta[bestKey]) ? globalMeta[bestKey] : null;
-                    const prClass = meta && meta.priority_class ? meta.priority_class : 'priority-other';
-                    tr.className = prClass + ' synthetic-row';
-                        tr.setAttribute('data-key', bestKey);
-                        tr.setAttribute('data-phone', phone);
-                        tr.setAttribute('data-name', name);
-                        tr.setAttribute('data-score', meta && meta.priority_score !== undefined ? String(meta.priority_score) : '');
-                        tr.setAttribute('data-bucket', meta && meta.priority_bucket ? meta.priority_bucket : '负分');
-                        tr.setAttribute('data-platform', topPlat);
-                        tr.setAttribute('data-last-order', lastDateStr);
-                        tr.setAttribute('data-cycle', '');
-                        tr.setAttribute('data-threshold', '');
-                        tr.setAttribute('data-category-cycle', '');
-                        tr.setAttribute('data-ids', idsAttr);
-                        const headers = ['标记完成','优先分','姓名','主要平台','手机号','最近下单日','风险标签','推荐动作','偏好单品','有效订单数','退货率','未复购天数','平均客单价'];
-                        const scoreDisp = meta && typeof meta.priority_score === 'number' ? String(Math.round(meta.priority_score)) : '';
-                        const ords = meta && typeof meta.orders === 'number' ? String(meta.orders) : String(det.length || '');
-                        const rr = meta && typeof meta.return_rate === 'number' ? (meta.return_rate*100).toFixed(1)+'%' : '';
-                        const ds = meta && typeof meta.days === 'number' ? String(meta.days) : '';
-                        const aov = meta && typeof meta.aov === 'number' ? meta.aov.toFixed(2) : '';
-                        const fav = meta && meta.favorite ? meta.favorite : (favItem || '');
-                        const values = [scoreDisp, name, topPlat || (meta && meta.platform ? meta.platform : ''), phone || '', lastDateStr || (meta && meta.last_order ? meta.last_order : ''), '全库命中(未纳入触达)', '', fav, ords, rr, ds, aov];
-                        const cb = document.createElement('input');
-                        cb.type = 'checkbox';
-                        cb.className = 'followup-checkbox';
-                        cb.setAttribute('data-key', bestKey);
-                        cb.setAttribute('data-phone', phone);
-                        cb.setAttribute('data-name', name);
-                        headers.forEach((h, idx) => {{
-                            const td = document.createElement('td');
-                            td.setAttribute('data-header', h);
-                            if (idx === 0) {{ td.appendChild(cb); }} else {{ td.textContent = values[idx-1] || ''; }}
-                            tr.appendChild(td);
-                        }});
-                        cb.addEventListener('change', () => {{
-                            if (cb.checked) {{ followupMap[bestKey] = {{ phone: phone, name: name, date: todayStr, timestamp: new Date().toISOString() }}; setRowState(tr, true); }}
-                            else {{ delete followupMap[bestKey]; setRowState(tr, false); }}
-                            persistFollowupMap();
-                        }});
-                        tr.addEventListener('click', (e) => {{ if (panelOpen) return; const isCheckbox = e.target && (e.target.tagName === 'INPUT' || e.target.closest('input')); if (isCheckbox) return; openDetailForKey(bestKey, name); }});
-                        tbody.appendChild(tr);
-                        addedSynthetic = true;
+        // 临时行挑选与下方命中提示计数用同一个规格化查询，全库模糊匹配每次筛选最多做一次
+        const fuzzyQn = normAlphaNum(searchRawValue);
+        let fuzzyRowIds = null;
+        const getFuzzyRowIds = () => fuzzyRowIds || (fuzzyRowIds = findGlobalRowIds(fuzzyQn));
+        let syntheticKey = '';
+        if (tbody && visible === 0 && searchRawValue) {{
+            const _key = resolveGlobalKey(searchRawValue);
+            if (_key && globalDetails && globalDetails[_key]) {{
+                syntheticKey = _key;
+            }} else {{
+                // 若未命中客户 key，则尝试在全库中寻找“包含关键字”的最相关客户（遍历整行文本）
+                let bestKey = '';
+                let bestCount = 0;
+                try {{
+                    // 行号升序且同一客户的订单在全库数组中连续，按段计数即可；
+                    // 剩余命中数已不可能超过当前最佳时提前结束
+                    const idx = getGlobalTokenIndex();
+                    const ids = getFuzzyRowIds();
+                    let i = 0;
+                    while (i < ids.length && ids.length - i > bestCount) {{
+                        const k = idx.rowKeys[ids[i]];
+                        let j = i + 1;
+                        while (j < ids.length && idx.rowKeys[ids[j]] === k) j++;
+                        if (j - i > bestCount) {{ bestCount = j - i; bestKey = k; }}
+                        i = j;
                     }}
+                }} catch (e) {{}}
+                if (bestKey && globalDetails[bestKey]) {{
+                    syntheticKey = bestKey;
                 }}
             }}
         }}
+        // 临时行只在目标客户变化时替换；同一客户沿用已插入的行，不再每次查找、删除再重建
+        if (syntheticRow && syntheticRow.key !== syntheticKey) {{
+            syntheticRow.tr.remove();
+            syntheticRow = null;
+        }}
+        if (syntheticKey && !syntheticRow) {{
+            syntheticRow = {{ key: syntheticKey, tr: appendSyntheticRow(tbody, syntheticKey) }};
+        }}
+        const addedSynthetic = !!syntheticRow;
 
         const totalVisible = visible + (addedSynthetic ? 1 : 0);
         rowCounter.textContent = totalVisible ? ('当前显示 ' + totalVisible + ' 人') : '无匹配客户';
@@ -4791,26 +5383,9 @@ def write_html_dashboard(
                     hitBox.appendChild(btn);
                 }} else {{
                     // 全字段模糊匹配（遍历整行文本，规格化后比较，不限于单一列）
-                    const qn = normAlphaNum(search);
                     let count = 0;
                     try {{
-                        Object.values(globalDetails || {{}}).forEach(list => {{
-                            if (!Array.isArray(list)) return;
-                            list.forEach(r => {{
-                                if (!r || typeof r !== 'object') return;
-                                let blob = '';
-                                try {{
-                                    for (const k in r) {{
-                                        if (!Object.prototype.hasOwnProperty.call(r, k)) continue;
-                                        const v = r[k];
-                                        if (v === null || v === undefined) continue;
-                                        if (typeof v === 'string' || typeof v === 'number') blob += ' ' + String(v);
-                                    }}
-                                }} catch (e) {{}}
-                                const txt = normAlphaNum(blob);
-                                if (txt && qn && txt.indexOf(qn) !== -1) count += 1;
-                            }});
-                        }});
+                        count = getFuzzyRowIds().length;
                     }} catch (e) {{}}
                     if (count > 0) {{
                         const btn = document.createElement('button');
@@ -4836,14 +5411,10 @@ def write_html_dashboard(
                 const filterValue = manufacturer || platform;
                 let matchCount = 0;
                 try {{
-                    Object.values(globalDetails || {{}}).forEach(list => {{
-                        if (!Array.isArray(list)) return;
-                        list.forEach(r => {{
-                            if (!r || typeof r !== 'object') return;
-                            const val = manufacturer ? (r['厂家'] || '').trim() : (r['下单平台'] || '').trim();
-                            if (val === filterValue) matchCount += 1;
-                        }});
-                    }});
+                    const field = manufacturer ? '厂家' : '下单平台';
+                    for (let i = 0; i < globalRecords.length; i++) {{
+                        if ((globalRecords[i][field] || '').trim() === filterValue) matchCount += 1;
+                    }}
                 }} catch (e) {{}}
                 if (matchCount > 0) {{
                     const btn = document.createElement('button');
@@ -4903,12 +5474,10 @@ def write_html_dashboard(
                 isProductSearch = true;
                 console.log('Exact match found in productSearchIndex');
             }} else if (normalized) {{
-                for (const productKey of Object.keys(productSearchIndex)) {{
-                    if (productKey.includes(normalized)) {{
-                        isProductSearch = true;
-                        console.log('Fuzzy match found:', productKey);
-                        break;
-                    }}
+                const fuzzyKeys = productKeysContaining(normalized);
+                if (fuzzyKeys.length) {{
+                    isProductSearch = true;
+                    console.log('Fuzzy match found:', fuzzyKeys[0]);
                 }}
             }}
 
@@ -4923,7 +5492,7 @@ def write_html_dashboard(
                     console.log(`Using cached results for "${{normalized}}"`);
                 }} else {{
                     // 缓存未命中，执行搜索
-                    matchedCustomers = {{}};
+                    matchedCustomers = new Map();
 
                     // ✅ 优化 1: 使用索引快速查找
                     const searchStart = performance.now();
@@ -4939,11 +5508,9 @@ def write_html_dashboard(
                         // 模糊匹配（仅在精确匹配为空时）
                         if (customerPhones.size === 0) {{
                             console.log(`No exact match, trying fuzzy search for "${{normalized}}"`);
-                            for (const [productKey, phones] of Object.entries(productSearchIndex)) {{
-                                if (productKey.includes(normalized)) {{
-                                    phones.forEach(p => customerPhones.add(p));
-                                }}
-                            }}
+                            productKeysContaining(normalized).forEach(productKey => {{
+                                productSearchIndex[productKey].forEach(p => customerPhones.add(p));
+                            }});
                             console.log(`Fuzzy search found ${{customerPhones.size}} customers`);
                         }}
 
@@ -4959,18 +5526,18 @@ def write_html_dashboard(
                             }});
 
                             if (matchingOrders.length > 0) {{
-                                matchedCustomers[phone] = {{
+                                matchedCustomers.set(phone, {{
                                     phone,
                                     allOrders: orders,
                                     matchingOrders,
                                     matchCount: matchingOrders.length
-                                }};
+                                }});
                             }}
                         }});
 
                         const searchTime = performance.now() - searchStart;
                         console.log(`Search completed in ${{searchTime.toFixed(2)}}ms`);
-                        console.log(`Processed ${{customerPhones.size}} customers, found ${{Object.keys(matchedCustomers).length}} matches`);
+                        console.log(`Processed ${{customerPhones.size}} customers, found ${{matchedCustomers.size}} matches`);
 
                     }} catch (e) {{
                         console.error('Error collecting customers:', e);
@@ -4984,12 +5551,12 @@ def write_html_dashboard(
                                 return productName && productName.includes(qn);
                             }});
                             if (matchingOrders.length > 0) {{
-                                matchedCustomers[phone] = {{
+                                matchedCustomers.set(phone, {{
                                     phone,
                                     allOrders: orders,
                                     matchingOrders,
                                     matchCount: matchingOrders.length
-                                }};
+                                }});
                             }}
                         }});
                     }}
@@ -4998,29 +5565,35 @@ def write_html_dashboard(
                     cacheSearchResult(normalized, matchedCustomers);
                 }}
 
-                console.log('Matched customers count:', Object.keys(matchedCustomers).length);
+                // 搜索词不变、只改了其他筛选条件时，结果对象取自缓存未变，客户表无需重建
+                if (productTableState && productTableState.matched === matchedCustomers && productTableState.searchRaw === searchRaw) {{
+                    productDetailContainer.style.display = productTableState.shown ? 'block' : 'none';
+                    return;
+                }}
+
+                console.log('Matched customers count:', matchedCustomers.size);
 
                 // 将客户数据转为数组并聚合信息
-                const customerList = Object.values(matchedCustomers).map(({{ phone, allOrders, matchingOrders, matchCount }}) => {{
+                const customerList = Array.from(matchedCustomers.values()).map(({{ phone, allOrders, matchingOrders, matchCount }}) => {{
                     // 从第一条订单提取客户信息
                     const firstOrder = allOrders[0] || {{}};
                     const name = firstOrder['姓名'] || '';
 
-                    // 最近下单时间（该产品的最新订单）
-                    const sortedMatchingOrders = matchingOrders.slice().sort((a, b) => {{
-                        const ad = String(a['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-                        const bd = String(b['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-                        return parseInt(bd, 10) - parseInt(ad, 10);
-                    }});
-                    const lastOrderDate = sortedMatchingOrders[0]?.['下单时间'] || '';
-
-                    // 主要平台统计
-                    const platformCount = {{}};
+                    // 最近下单时间（该产品的最新订单）与主要平台：一次遍历取最大，不再排序
+                    let lastDigits = -1;
+                    let lastOrderDate = '';
+                    const platformCount = new Map();
                     matchingOrders.forEach(r => {{
+                        const d = orderDate8(r);
+                        if (d > lastDigits) {{ lastDigits = d; lastOrderDate = r['下单时间'] || ''; }}
                         const p = (r['下单平台'] || '').trim();
-                        if (p) platformCount[p] = (platformCount[p] || 0) + 1;
+                        if (p) platformCount.set(p, (platformCount.get(p) || 0) + 1);
                     }});
-                    const mainPlatform = Object.keys(platformCount).sort((a, b) => platformCount[b] - platformCount[a])[0] || '';
+                    let mainPlatform = '';
+                    let mainCount = 0;
+                    for (const [p, c] of platformCount) {{
+                        if (c > mainCount) {{ mainCount = c; mainPlatform = p; }}
+                    }}
 
                     // 手机号脱敏
                     const maskedPhone = phone.length > 7
@@ -5046,6 +5619,84 @@ def write_html_dashboard(
                 // 排序状态跟踪
                 let currentSort = {{ field: 'totalOrders', ascending: false }};
 
+                // 客户行 HTML 每人只拼一次；排序只按新顺序拼接缓存片段，整段写入 tbody
+                function customerRowHtml(c) {{
+                    if (c.rowHtml === undefined) {{
+                        c.rowHtml = `
+                                                <tr
+                                                    class="customer-row"
+                                                    data-key="${{escapeHtml(c.phone)}}"
+                                                    data-name="${{escapeHtml(c.name)}}"
+                                                    data-total-orders="${{c.totalOrders}}"
+                                                    style="
+                                                        border-bottom: 1px solid #f1f5f9;
+                                                        cursor: pointer;
+                                                        transition: background-color 0.15s;
+                                                    "
+                                                    onmouseover="this.style.backgroundColor='#f8fafc'"
+                                                    onmouseout="this.style.backgroundColor='white'"
+                                                >
+                                                    <td style="padding: 8px; color: #334155; font-weight: 500;">${{escapeHtml(c.name)}}</td>
+                                                    <td style="padding: 8px; color: #64748b; font-family: monospace; font-size: 12px;">${{escapeHtml(c.maskedPhone)}}</td>
+                                                    <td style="padding: 8px; text-align: center; color: #0ea5e9; font-weight: 600;">${{c.totalOrders}}单</td>
+                                                    <td style="padding: 8px; color: #334155;">${{escapeHtml(c.lastOrderDate)}}</td>
+                                                    <td style="padding: 8px; color: #334155;">${{escapeHtml(c.mainPlatform)}}</td>
+                                                </tr>
+                                            `;
+                    }}
+                    return c.rowHtml;
+                }}
+
+                const virtualRows = customerList.length > PRODUCT_VIRTUAL_MIN_ROWS;
+                let rowHeight = 0;
+                let windowStart = -1;
+                let windowEnd = -1;
+                let scrollFrame = 0;
+
+                function spacerRowHtml(height) {{
+                    return height > 0 ? '<tr aria-hidden="true" style="height:' + height + 'px;"><td colspan="5" style="padding:0; border:0;"></td></tr>' : '';
+                }}
+
+                // 按滚动位置只渲染可视窗口内的行；窗口未变时不写 DOM
+                function renderWindow(force) {{
+                    const bodyEl = productDetailContainer.querySelector('tbody');
+                    const scroller = productDetailContainer.querySelector('.customer-table-scroll');
+                    if (!bodyEl || !scroller) return;
+                    const rh = rowHeight || 40;
+                    const total = customerList.length;
+                    const visibleCount = Math.ceil((scroller.clientHeight || PRODUCT_SCROLL_HEIGHT) / rh);
+                    const start = Math.max(0, Math.floor(scroller.scrollTop / rh) - PRODUCT_ROW_OVERSCAN);
+                    const end = Math.min(total, start + visibleCount + 2 * PRODUCT_ROW_OVERSCAN);
+                    if (!force && start === windowStart && end === windowEnd) return;
+                    windowStart = start;
+                    windowEnd = end;
+                    let html = spacerRowHtml(start * rh);
+                    for (let i = start; i < end; i++) html += customerRowHtml(customerList[i]);
+                    html += spacerRowHtml((total - end) * rh);
+                    bodyEl.innerHTML = html;
+                    if (!rowHeight) {{
+                        // 首次渲染后按真实行高校准，再补渲一次
+                        const firstRow = bodyEl.querySelector('.customer-row');
+                        const measured = firstRow ? firstRow.getBoundingClientRect().height : 0;
+                        if (measured > 0) {{
+                            rowHeight = measured;
+                            renderWindow(true);
+                        }}
+                    }}
+                }}
+
+                // 排序后只重写 tbody 与表头箭头，外层卡片和表头不再重建
+                function renderRows() {{
+                    const bodyEl = productDetailContainer.querySelector('tbody');
+                    if (virtualRows) {{
+                        renderWindow(true);
+                    }} else if (bodyEl) {{
+                        bodyEl.innerHTML = customerList.map(customerRowHtml).join('');
+                    }}
+                    const th = productDetailContainer.querySelector('th[data-sort="totalOrders"]');
+                    if (th) th.textContent = '总订单数 ' + (currentSort.field === 'totalOrders' ? (currentSort.ascending ? '↑' : '↓') : '⇅');
+                }}
+
                 // 渲染表格函数（支持动态排序）
                 function renderTable() {{
                     if (customerList.length > 0) {{
@@ -5057,63 +5708,40 @@ def write_html_dashboard(
                                 <p style="margin: 0 0 16px 0; font-size: 13px; color: #64748b;">
                                     💡 点击客户行查看完整订单历史（含其他商品）· 点击表头可排序
                                 </p>
-                                <div style="overflow-x: auto; border: 1px solid #e2e8f0; border-radius: 8px;">
+                                <div class="customer-table-scroll" style="overflow-x: auto; border: 1px solid #e2e8f0; border-radius: 8px;${{virtualRows ? ' max-height: ' + PRODUCT_SCROLL_HEIGHT + 'px; overflow-y: auto;' : ''}}">
                                     <table class="customer-table" style="width: 100%; border-collapse: collapse;">
                                         <thead>
                                             <tr style="background: #f8fafc;">
                                                 <th style="padding: 10px; text-align: left; border-bottom: 1px solid #e2e8f0; font-weight: 600; color: #475569;">姓名</th>
                                                 <th style="padding: 10px; text-align: left; border-bottom: 1px solid #e2e8f0; font-weight: 600; color: #475569;">手机号</th>
-                                                <th data-sort="totalOrders" style="padding: 10px; text-align: center; border-bottom: 1px solid #e2e8f0; font-weight: 600; color: #475569; cursor: pointer; user-select: none; transition: background-color 0.15s;" onmouseover="this.style.backgroundColor='#e2e8f0'" onmouseout="this.style.backgroundColor='transparent'">
-                                                    总订单数 ${{currentSort.field === 'totalOrders' ? (currentSort.ascending ? '↑' : '↓') : '⇅'}}
-                                                </th>
+                                                <th data-sort="totalOrders" style="padding: 10px; text-align: center; border-bottom: 1px solid #e2e8f0; font-weight: 600; color: #475569; cursor: pointer; user-select: none; transition: background-color 0.15s;" onmouseover="this.style.backgroundColor='#e2e8f0'" onmouseout="this.style.backgroundColor='transparent'"></th>
                                                 <th style="padding: 10px; text-align: left; border-bottom: 1px solid #e2e8f0; font-weight: 600; color: #475569;">最近下单</th>
                                                 <th style="padding: 10px; text-align: left; border-bottom: 1px solid #e2e8f0; font-weight: 600; color: #475569;">主要平台</th>
                                             </tr>
                                         </thead>
-                                        <tbody>
-                                            ${{customerList.map(c => `
-                                                <tr
-                                                    class="customer-row"
-                                                    data-key="${{escapeHtml(c.phone)}}"
-                                                    data-name="${{escapeHtml(c.name)}}"
-                                                    data-total-orders="${{c.totalOrders}}"
-                                                    style="
-                                                        border-bottom: 1px solid #f1f5f9;
-                                                        cursor: pointer;
-                                                        transition: background-color 0.15s;
-                                                    "
-                                                    onmouseover="this.style.backgroundColor='#f8fafc'"
-                                                    onmouseout="this.style.backgroundColor='white'"
-                                                >
-                                                    <td style="padding: 8px; color: #334155; font-weight: 500;">${{escapeHtml(c.name)}}</td>
-                                                    <td style="padding: 8px; color: #64748b; font-family: monospace; font-size: 12px;">${{escapeHtml(c.maskedPhone)}}</td>
-                                                    <td style="padding: 8px; text-align: center; color: #0ea5e9; font-weight: 600;">${{c.totalOrders}}单</td>
-                                                    <td style="padding: 8px; color: #334155;">${{escapeHtml(c.lastOrderDate)}}</td>
-                                                    <td style="padding: 8px; color: #334155;">${{escapeHtml(c.mainPlatform)}}</td>
-                                                </tr>
-                                            `).join('')}}
-                                        </tbody>
+                                        <tbody></tbody>
                                     </table>
                                 </div>
                             </div>
                         `;
 
                         productDetailContainer.style.display = 'block';
-
-                        // ✅ 绑定点击事件：调用现有的 openDetailForKey 函数
-                        productDetailContainer.querySelectorAll('.customer-row').forEach(row => {{
-                            row.addEventListener('click', () => {{
-                                const phone = row.getAttribute('data-key');
-                                const name = row.getAttribute('data-name');
-                                if (phone && name) {{
-                                    openDetailForKey(phone, name);
-                                }}
+                        renderRows();
+                        if (virtualRows) {{
+                            const scroller = productDetailContainer.querySelector('.customer-table-scroll');
+                            scroller.addEventListener('scroll', () => {{
+                                if (scrollFrame) return;
+                                scrollFrame = requestAnimationFrame(() => {{
+                                    scrollFrame = 0;
+                                    renderWindow(false);
+                                }});
                             }});
-                        }});
+                        }}
 
-                        // ✅ 绑定表头排序事件
-                        productDetailContainer.querySelectorAll('th[data-sort]').forEach(th => {{
-                            th.addEventListener('click', () => {{
+                        // ✅ 容器上委托点击：表头排序，或调用现有的 openDetailForKey 打开客户明细
+                        productDetailContainer.onclick = (e) => {{
+                            const th = e.target.closest('th[data-sort]');
+                            if (th) {{
                                 const field = th.getAttribute('data-sort');
 
                                 // 如果点击同一列，切换升序/降序；否则默认降序
@@ -5124,17 +5752,22 @@ def write_html_dashboard(
                                     currentSort.ascending = false;
                                 }}
 
-                                // 执行排序
-                                customerList.sort((a, b) => {{
-                                    const aVal = a[field];
-                                    const bVal = b[field];
-                                    return currentSort.ascending ? (aVal - bVal) : (bVal - aVal);
-                                }});
+                                // 执行排序：方向在比较器外定好，比较只做一次整数相减
+                                const sign = currentSort.ascending ? 1 : -1;
+                                customerList.sort((a, b) => sign * (a[field] - b[field]));
 
-                                // 重新渲染
-                                renderTable();
-                            }});
-                        }});
+                                // 只重写行
+                                renderRows();
+                                return;
+                            }}
+                            const row = e.target.closest('.customer-row');
+                            if (!row) return;
+                            const phone = row.getAttribute('data-key');
+                            const name = row.getAttribute('data-name');
+                            if (phone && name) {{
+                                openDetailForKey(phone, name);
+                            }}
+                        }};
 
                         console.log('Customer table rendered with', customerList.length, 'customers');
                     }} else {{
@@ -5144,32 +5777,60 @@ def write_html_dashboard(
 
                 // 初始渲染
                 renderTable();
+                productTableState = {{ matched: matchedCustomers, searchRaw: searchRaw, shown: customerList.length > 0 }};
             }} else {{
                 productDetailContainer.style.display = 'none';
+                productTableState = null;
             }}
         }} else {{
             productDetailContainer.style.display = 'none';
+            productTableState = null;
         }}
     }}
 
-    // ✅ 优化 3: 输入防抖（300ms）
-    let searchTimeout;
+    // ✅ 优化 3: 搜索输入合并到下一个空闲时段执行，不再固定等待 300ms；
+    // 单字符查询仍延迟 100ms，避免首个字符就触发整库模糊匹配
     const DEBOUNCE_DELAY = 300;
+    const SHORT_QUERY_DELAY = 100;
+    let filterPending = false;
+    let shortQueryTimer = 0;
 
-    function debouncedApplyFilters() {{
-        clearTimeout(searchTimeout);
-        searchTimeout = setTimeout(() => {{
-            applyFilters();
-        }}, DEBOUNCE_DELAY);
+    function runScheduledFilters() {{
+        filterPending = false;
+        applyFilters();
+    }}
+
+    function scheduleApplyFilters() {{
+        clearTimeout(shortQueryTimer);
+        const q = searchBox ? searchBox.value.trim() : '';
+        if (q && q.length < 2) {{
+            shortQueryTimer = setTimeout(applyFilters, SHORT_QUERY_DELAY);
+            return;
+        }}
+        if (filterPending) return;
+        filterPending = true;
+        if (window.requestIdleCallback) {{
+            requestIdleCallback(runScheduledFilters, {{ timeout: 100 }});
+        }} else {{
+            requestAnimationFrame(runScheduledFilters);
+        }}
+    }}
+
+    function debounce(fn, ms) {{
+        let timer;
+        return function(...args) {{
+            clearTimeout(timer);
+            timer = setTimeout(() => fn.apply(this, args), ms);
+        }};
     }}
 
     [searchBox, priorityFilter, tagFilter, platformFilter, manufacturerFilter].forEach(el => {{
         if (!el) {{
             return;
         }}
-        // 对搜索框使用防抖
+        // 搜索框按空闲时段合并执行；下拉筛选同步执行，重复触发由 applyFilters 的条件签名跳过
         if (el === searchBox) {{
-            el.addEventListener('input', debouncedApplyFilters);
+            el.addEventListener('input', scheduleApplyFilters);
         }} else {{
             el.addEventListener('input', applyFilters);
         }}
@@ -5198,33 +5859,11 @@ def write_html_dashboard(
     }});
 
     function exportCsv() {{
-        // 只收集当天的联系记录
+        // 导出前先落盘尚未写入的标记
+        if (persistPending) flushFollowupMap();
+        // 只收集当天的联系记录：followupMap 即当天键的内存副本（加载时读入、变更时写回），
+        // 导出直接读内存，不再 getItem + JSON.parse
         const todayEntries = {{}};
-
-        // 读取当天的 localStorage 记录
-        try {{
-            const todayKey = `followup-${{todayStr}}`;
-            const storedData = localStorage.getItem(todayKey);
-            if (storedData) {{
-                const dayMap = JSON.parse(storedData) || {{}};
-                Object.entries(dayMap).forEach(([phoneKey, entry]) => {{
-                    if (entry && entry.phone) {{
-                        todayEntries[entry.phone] = {{
-                            phone: entry.phone,
-                            date: entry.date,
-                            name: entry.name,
-                            platform: entry.platform || '',
-                            owner: entry.owner || '',
-                            note: entry.note || ''
-                        }};
-                    }}
-                }});
-            }}
-        }} catch (err) {{
-            console.warn('读取今日联系记录失败:', err);
-        }}
-
-        // 确保当天内存中的记录也被包含
         Object.values(followupMap).forEach(entry => {{
             if (entry && entry.phone) {{
                 todayEntries[entry.phone] = {{
@@ -5245,19 +5884,21 @@ def write_html_dashboard(
             return;
         }}
 
-        // 按日期降序排序
-        entries.sort((a, b) => {{
-            if (a.date > b.date) return -1;
-            if (a.date < b.date) return 1;
-            return 0;
-        }});
+        // 按日期降序排序（日期为等长 YYYY-MM-DD 串，直接比较）
+        entries.sort((a, b) => (a.date < b.date ? 1 : a.date > b.date ? -1 : 0));
 
-        const header = '手机号,姓名,联系平台,最近联系日期,跟进人';
-        const body = entries
-            .map(entry => `${{entry.phone}},${{entry.name||''}},${{entry.platform||''}},${{entry.date}},${{entry.owner||''}}`)
-            .join('\\n');
-        const csvContent = `${{header}}\\n${{body}}`;
-        const blob = new Blob([csvContent], {{ type: 'text/csv;charset=utf-8;' }});
+        // 字段含逗号、引号或换行时加引号并转义内部引号
+        const csvEsc = v => {{
+            const str = String(v == null ? '' : v);
+            return /[",\\r\\n]/.test(str) ? '"' + str.replace(/"/g, '""') + '"' : str;
+        }};
+        // 逐行字符串直接交给 Blob 拼接，不先 join 出整份 CSV 再复制一次
+        const parts = ['手机号,姓名,联系平台,最近联系日期,跟进人'];
+        for (let i = 0; i < entries.length; i++) {{
+            const entry = entries[i];
+            parts.push('\\n' + csvEsc(entry.phone) + ',' + csvEsc(entry.name) + ',' + csvEsc(entry.platform) + ',' + csvEsc(entry.date) + ',' + csvEsc(entry.owner));
+        }}
+        const blob = new Blob(parts, {{ type: 'text/csv;charset=utf-8;' }});
         const url = URL.createObjectURL(blob);
         const link = document.createElement('a');
         link.href = url;
@@ -5299,76 +5940,264 @@ def write_html_dashboard(
     updateSummary();
 
     // Drilldown drawer: list all orders for the clicked customer
-    const detailBackdrop = document.createElement('div');
-    detailBackdrop.id = 'detailBackdrop';
-    detailBackdrop.className = 'detail-backdrop hidden';
-    document.body.appendChild(detailBackdrop);
-
-    const panel = document.createElement('div');
-    panel.id = 'detailPanel';
-    panel.className = 'detail-panel hidden';
-    panel.innerHTML = `
-      <div class="detail-header">
-        <h3 id="detailTitle">订单明细</h3>
-        <button id="detailClose" class="detail-close">关闭</button>
-      </div>
-      <div class="detail-body">
-        <table id="detailTable">
-          <thead>
-            <tr>
-              <th>姓名</th>
-              <th>手机号</th>
-              <th data-sort-method="number">下单时间</th>
-              <th>下单平台</th>
-              <th>厂家</th>
-              <th>货品名</th>
-              <th>颜色</th>
-              <th>尺码</th>
-              <th data-sort-method="number">付款金额</th>
-              <th data-sort-method="number">打款金额</th>
-              <th data-sort-method="number">毛利率</th>
-              <th>订单号</th>
-              <th>退货单号</th>
-              <th>退款类型</th>
-              <th>退款原因</th>
-            </tr>
-          </thead>
-          <tbody id="detailTbody"></tbody>
-        </table>
-      </div>
-    `;
-    document.body.appendChild(panel);
-
-    const detailTitle = panel.querySelector('#detailTitle');
-    const detailClose = panel.querySelector('#detailClose');
-    const detailTbody = panel.querySelector('#detailTbody');
-    const detailTable = panel.querySelector('#detailTable');
+    // 抽屉 DOM 在第一次打开时才创建，用户不点行时页面加载不承担这部分开销
+    let detailBackdrop = null;
+    let panel = null;
+    let detailTitle = null, detailClose = null, detailTbody = null, detailTable = null, detailScroller = null;
     let panelOpen = false;
 
+    function ensureDrawer() {{
+      if (panel) return;
+      detailBackdrop = document.createElement('div');
+      detailBackdrop.id = 'detailBackdrop';
+      detailBackdrop.className = 'detail-backdrop hidden';
+      document.body.appendChild(detailBackdrop);
+
+      panel = document.createElement('div');
+      panel.id = 'detailPanel';
+      panel.className = 'detail-panel hidden';
+      panel.innerHTML = `
+        <div class="detail-header">
+          <h3 id="detailTitle">订单明细</h3>
+          <button id="detailClose" class="detail-close">关闭</button>
+        </div>
+        <div class="detail-body">
+          <table id="detailTable">
+            <thead>
+              <tr>
+                <th>姓名</th>
+                <th>手机号</th>
+                <th data-sort-method="number">下单时间</th>
+                <th>下单平台</th>
+                <th>厂家</th>
+                <th>货品名</th>
+                <th>颜色</th>
+                <th>尺码</th>
+                <th data-sort-method="number">付款金额</th>
+                <th data-sort-method="number">打款金额</th>
+                <th data-sort-method="number">毛利率</th>
+                <th>订单号</th>
+                <th>退货单号</th>
+                <th>退款类型</th>
+                <th>退款原因</th>
+              </tr>
+            </thead>
+            <tbody id="detailTbody"></tbody>
+          </table>
+        </div>
+      `;
+      document.body.appendChild(panel);
+
+      detailTitle = panel.querySelector('#detailTitle');
+      detailClose = panel.querySelector('#detailClose');
+      detailTbody = panel.querySelector('#detailTbody');
+      detailTable = panel.querySelector('#detailTable');
+      detailScroller = panel.querySelector('.detail-body');
+
+      detailBackdrop.addEventListener('click', closeDetail);
+      detailClose.addEventListener('click', closeDetail);
+      detailScroller.addEventListener('scroll', onDetailScroll, {{ passive: true }});
+      // 窗口模式下表头排序改为对行数组排序后重绘窗口（DOM 里只有部分行，Tablesort 无法直接排）
+      detailTable._sortRows = sortDetailRows;
+      lazyTablesort(detailTable);
+    }}
+
+    // 明细金额大量重复，按原始值缓存格式化结果
+    const amountFormatCache = new Map();
+    const marginFormatCache = new Map();
+
     function formatAmount(n) {{
+      const hit = amountFormatCache.get(n);
+      if (hit !== undefined) return hit;
       const v = (typeof n === 'number') ? n : parseFloat(n);
-      if (!isFinite(v)) return '0.00';
-      return v.toFixed(2);
+      const out = isFinite(v) ? v.toFixed(2) : '0.00';
+      amountFormatCache.set(n, out);
+      return out;
     }}
-    
+
     function calcMargin(payment, cost) {{
+      const cacheKey = payment + '|' + cost;
+      const hit = marginFormatCache.get(cacheKey);
+      if (hit !== undefined) return hit;
       const pay = (typeof payment === 'number') ? payment : parseFloat(payment);
       const cst = (typeof cost === 'number') ? cost : parseFloat(cost);
-      if (!isFinite(pay) || pay <= 0) return '-';
-      if (!isFinite(cst)) return '-';
-      const margin = ((pay - cst) / pay) * 100;
-      return margin.toFixed(1) + '%';
+      let out;
+      if (!isFinite(pay) || pay <= 0 || !isFinite(cst)) {{
+        out = '-';
+      }} else {{
+        out = (((pay - cst) / pay) * 100).toFixed(1) + '%';
+      }}
+      marginFormatCache.set(cacheKey, out);
+      return out;
     }}
 
     // HTML escape function to prevent HTML breaking
+    // 单次正则扫描替换全部五种字符；不含特殊字符（手机号、单号、金额等）的值原样返回
     function escapeHtml(str) {{
       if (!str) return '';
-      return String(str)
-        .replace(/&/g, '&amp;')
-        .replace(/</g, '&lt;')
-        .replace(/>/g, '&gt;')
-        .replace(/"/g, '&quot;')
-        .replace(/'/g, '&#039;');
+      const s = String(str);
+      return /[&<>"']/.test(s) ? s.replace(/[&<>"']/g, escapeHtmlChar) : s;
+    }}
+    function escapeHtmlChar(c) {{
+      switch (c) {{
+        case '&': return '&amp;';
+        case '<': return '&lt;';
+        case '>': return '&gt;';
+        case '"': return '&quot;';
+        default: return '&#039;';
+      }}
+    }}
+
+    // 每单的金额展示串与数值排序键只算一次，存为不可枚举属性；窗口重绘与数组排序直接复用
+    function detailAmounts(r) {{
+      let a = r.__amounts;
+      if (a === undefined) {{
+        const payStr = formatAmount(r['付款金额']);
+        const costStr = formatAmount(r['打款金额']);
+        const marginStr = calcMargin(r['付款金额'], r['打款金额']);
+        a = {{
+          payStr: payStr, costStr: costStr, marginStr: marginStr,
+          payNum: parseFloat(payStr), costNum: parseFloat(costStr), marginNum: parseFloat(marginStr),
+        }};
+        Object.defineProperty(r, '__amounts', {{ value: a }});
+      }}
+      return a;
+    }}
+
+    // 明细行整段拼接 HTML，避免逐格 createElement
+    function detailRowHtml(r) {{
+      const am = detailAmounts(r);
+      const payStr = am.payStr, costStr = am.costStr, marginStr = am.marginStr;
+      const payNum = am.payNum, costNum = am.costNum, marginNum = am.marginNum;
+      const orderTime = r['下单时间'] || '';
+      // 下单时间，ISO 字符串转 YYYYMMDD 数字作为排序键
+      const d8 = orderDate8(r);
+      // 整行直接拼成一个字符串
+      return '<tr><td>' + escapeHtml(r['姓名'] || '') +
+        '</td><td>' + escapeHtml(r['手机号'] || '') +
+        '</td><td' + (d8 ? ' data-sort-value="' + d8 + '"' : '') + '>' + escapeHtml(orderTime) +
+        '</td><td>' + escapeHtml(r['下单平台'] || '') +
+        '</td><td>' + escapeHtml(r['厂家'] || '') +
+        '</td><td>' + escapeHtml(r['商品名称'] || r['货品名'] || '') +
+        '</td><td>' + escapeHtml(r['颜色'] || r['色号'] || '') +
+        '</td><td>' + escapeHtml(r['尺码'] || r['规格'] || r['码数'] || '') +
+        // 付款金额 / 打款金额 / 毛利率 numeric sort key
+        '</td><td' + (isFinite(payNum) ? ' data-sort-value="' + payNum + '"' : '') + '>' + escapeHtml(payStr) +
+        '</td><td' + (isFinite(costNum) ? ' data-sort-value="' + costNum + '"' : '') + '>' + escapeHtml(costStr) +
+        '</td><td' + (isFinite(marginNum) ? ' data-sort-value="' + marginNum + '"' : '') + '>' + escapeHtml(marginStr) +
+        '</td><td>' + escapeHtml(r['订单号'] || '') +
+        '</td><td>' + escapeHtml(r['退货单号'] || '') +
+        '</td><td>' + escapeHtml(r['退款类型'] || '') +
+        '</td><td>' + escapeHtml(r['退款原因'] || '') + '</td></tr>';
+    }}
+
+    // 明细表排序键，与 Tablesort 从单元格读出的值一致（数字列优先 data-sort-value，否则取文本）
+    function detailSortValue(r, index, method) {{
+      let text, attr = null;
+      switch (index) {{
+        case 0: text = r['姓名']; break;
+        case 1: text = r['手机号']; break;
+        case 2: text = r['下单时间']; if (orderDate8(r)) attr = orderDate8(r); break;
+        case 3: text = r['下单平台']; break;
+        case 4: text = r['厂家']; break;
+        case 5: text = r['商品名称'] || r['货品名']; break;
+        case 6: text = r['颜色'] || r['色号']; break;
+        case 7: text = r['尺码'] || r['规格'] || r['码数']; break;
+        case 8: text = detailAmounts(r).payStr; break;
+        case 9: text = detailAmounts(r).costStr; break;
+        case 10: text = detailAmounts(r).marginStr; break;
+        case 11: text = r['订单号']; break;
+        case 12: text = r['退货单号']; break;
+        case 13: text = r['退款类型']; break;
+        default: text = r['退款原因'];
+      }}
+      text = text ? String(text) : '';
+      if (method === 'number') {{
+        const parsed = parseFloat(attr !== null ? attr : text);
+        return Number.isFinite(parsed) ? parsed : -Infinity;
+      }}
+      return text.trim().toLowerCase();
+    }}
+
+    // 行数超过阈值时只渲染可视区附近的行，上下用占位行撑出滚动高度，滚动时按帧重绘窗口
+    const DETAIL_VIRTUAL_MIN_ROWS = 500;
+    const DETAIL_WINDOW_ROWS = 50;
+    const DETAIL_OVERSCAN = 20;
+    let detailRows = null;       // 窗口模式下的全部行（已排序）；null 表示整表已直接渲染
+    let detailRowHeight = 32;    // 估计行高，每次绘制后按实测修正
+    let detailWinStart = -1, detailWinEnd = -1;
+    let detailScrollQueued = false;
+
+    function detailSpacer(h) {{
+      return '<tr class="detail-spacer"><td colspan="15" style="height:' + h + 'px;padding:0;border:0"></td></tr>';
+    }}
+
+    function renderDetailWindow(force) {{
+      const n = detailRows.length;
+      // tbody 顶部相对滚动容器内容区的位置（表头、内边距之下）
+      const tbodyTop = detailTbody.getBoundingClientRect().top - detailScroller.getBoundingClientRect().top + detailScroller.scrollTop;
+      const offset = Math.max(0, detailScroller.scrollTop - tbodyTop);
+      const first = Math.floor(offset / detailRowHeight);
+      const start = Math.max(0, Math.min(first - DETAIL_OVERSCAN, n - DETAIL_WINDOW_ROWS - DETAIL_OVERSCAN));
+      const end = Math.min(n, first + DETAIL_WINDOW_ROWS + DETAIL_OVERSCAN);
+      if (!force && start === detailWinStart && end === detailWinEnd) return;
+      detailWinStart = start;
+      detailWinEnd = end;
+      let html = start ? detailSpacer(start * detailRowHeight) : '';
+      for (let i = start; i < end; i++) html += detailRowHtml(detailRows[i]);
+      if (end < n) html += detailSpacer((n - end) * detailRowHeight);
+      detailTbody.innerHTML = html;
+      // 用本次实际渲染的行修正行高估计，下一次滚动即按新值定位
+      const trs = detailTbody.rows;
+      const a = trs[start ? 1 : 0], b = trs[(start ? 1 : 0) + (end - start) - 1];
+      if (a && b && end > start) {{
+        const h = (b.offsetTop + b.offsetHeight - a.offsetTop) / (end - start);
+        if (h > 0) detailRowHeight = h;
+      }}
+    }}
+
+    function onDetailScroll() {{
+      if (!detailRows || detailScrollQueued) return;
+      detailScrollQueued = true;
+      requestAnimationFrame(() => {{
+        detailScrollQueued = false;
+        if (detailRows) renderDetailWindow(false);
+      }});
+    }}
+
+    function sortDetailRows(index, method, order) {{
+      if (!detailRows) return false;
+      const keys = detailRows.map(r => detailSortValue(r, index, method));
+      const idxs = keys.map((_, i) => i);
+      idxs.sort((i, j) => {{
+        const a = keys[i], b = keys[j];
+        if (method === 'number') return a - b;
+        if (a === b) return 0;
+        return a > b ? 1 : -1;
+      }});
+      if (order === 'desc') idxs.reverse();
+      detailRows = idxs.map(i => detailRows[i]);
+      renderDetailWindow(true);
+      return true;
+    }}
+
+    function renderDetailRows(orderedRows) {{
+      detailScroller.scrollTop = 0;
+      detailWinStart = detailWinEnd = -1;
+      if (!orderedRows.length) {{
+        detailRows = null;
+        detailTbody.innerHTML = '<tr><td colspan="15">暂无数据</td></tr>';
+        return;
+      }}
+      if (orderedRows.length > DETAIL_VIRTUAL_MIN_ROWS) {{
+        detailRows = orderedRows;
+        renderDetailWindow(true);
+        return;
+      }}
+      detailRows = null;
+      let html = '';
+      for (let n = 0; n < orderedRows.length; n++) html += detailRowHtml(orderedRows[n]);
+      detailTbody.innerHTML = html;
     }}
 
     function openDetailForKey(key, name) {{
@@ -5378,67 +6207,11 @@ def write_html_dashboard(
       }}
       // 默认按下单时间降序（最近在上）
       const orderedRows = rows.slice().sort((a, b) => {{
-        const ad = String(a['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const bd = String(b['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const an = ad ? parseInt(ad, 10) : 0;
-        const bn = bd ? parseInt(bd, 10) : 0;
-        return bn - an;
+        return orderDate8(b) - orderDate8(a);
       }});
+      ensureDrawer();
       detailTitle.textContent = (name ? name + ' - ' : '') + '订单明细（' + rows.length + ' 条）';
-      detailTbody.innerHTML = '';
-      if (!rows.length) {{
-        const tr = document.createElement('tr');
-        const td = document.createElement('td');
-        td.colSpan = 15;
-        td.textContent = '暂无数据';
-        tr.appendChild(td);
-        detailTbody.appendChild(tr);
-      }} else {{
-        const frag = document.createDocumentFragment();
-        orderedRows.forEach(r => {{
-          const tr = document.createElement('tr');
-          const paymentAmt = r['付款金额'];
-          const costAmt = r['打款金额'];
-          const cols = [
-            r['姓名'] || '',
-            r['手机号'] || '',
-            (r['下单时间'] || ''),
-            r['下单平台'] || '',
-            r['厂家'] || '',
-            (r['商品名称'] || r['货品名'] || ''),
-            r['颜色'] || r['色号'] || '',
-            r['尺码'] || r['规格'] || r['码数'] || '',
-            formatAmount(paymentAmt),
-            formatAmount(costAmt),
-            calcMargin(paymentAmt, costAmt),
-            r['订单号'] || '',
-            r['退货单号'] || '',
-            r['退款类型'] || '',
-            r['退款原因'] || ''
-          ];
-          cols.forEach((text, i) => {{
-            const td = document.createElement('td');
-            if (i === 2) {{
-              // 下单时间，ISO 字符串转 YYYYMMDD 数字作为排序键
-              const digits = String(text).replace(/\D/g, '');
-              if (digits.length >= 8) {{ td.setAttribute('data-sort-value', digits.slice(0,8)); }}
-            }} else if (i === 8 || i === 9) {{ // 付款金额和打款金额 numeric sort key
-              const val = parseFloat(text);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }} else if (i === 10) {{ // 毛利率 numeric sort key
-              const marginText = String(text).replace('%', '');
-              const val = parseFloat(marginText);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }}
-            td.textContent = text;
-            tr.appendChild(td);
-          }});
-          frag.appendChild(tr);
-        }});
-        detailTbody.appendChild(frag);
-      }}
-      // Initialize or refresh sorter for detail table
-      try {{ new Tablesort(detailTable); }} catch (e) {{}}
+      renderDetailRows(orderedRows);
       detailBackdrop.classList.remove('hidden');
       panel.classList.remove('hidden');
       panelOpen = true;
@@ -5451,21 +6224,18 @@ def write_html_dashboard(
       panelOpen = false;
     }}
 
-    detailBackdrop.addEventListener('click', closeDetail);
-    detailClose.addEventListener('click', closeDetail);
 
-    // Row click binding (ignore direct checkbox clicks)
+    // Row click binding (ignore direct checkbox clicks)：主表上委托一次，之后插入的临时行同样生效
     if (table) {{
-      table.querySelectorAll('tbody tr').forEach(tr => {{
-        tr.addEventListener('click', (e) => {{
-          if (panelOpen) return;
-          const isCheckbox = e.target && (e.target.tagName === 'INPUT' || e.target.closest('input'));
-          if (isCheckbox) return;
-          const key = tr.getAttribute('data-key');
-          const name = tr.getAttribute('data-name');
-          if (!key) return;
-          openDetailForKey(key, name);
-        }});
+      table.addEventListener('click', (e) => {{
+        if (panelOpen) return;
+        if (e.target.closest('input')) return;
+        // 只匹配带客户键的数据行，空行、提示行直接落空
+        const tr = e.target.closest('tbody tr[data-key]');
+        if (!tr || !table.contains(tr)) return;
+        const key = tr.getAttribute('data-key');
+        if (!key) return;
+        openDetailForKey(key, tr.getAttribute('data-name'));
       }});
     }}
     // ESC key closes drawer
@@ -5481,87 +6251,25 @@ def write_html_dashboard(
     function openDetailForSku(sku, filterType) {{
       const rows = [];
       try {{
-        Object.values(globalDetails || {{}}).forEach(list => {{
-          if (!Array.isArray(list)) return;
-          list.forEach(r => {{
-            if ((r && typeof r === 'object') && String(r['货品名']||'').trim() === sku) {{
-              // 根据filterType过滤订单
-              if (filterType && filterType !== 'all') {{
-                const platform = String(r['下单平台'] || '');
-                const prod = String(r['商品名称'] || '');
-                const rmk = String(r['备注'] || '');
-                const combined = platform + ' ' + prod + ' ' + sku + ' ' + rmk;
-                const isProxy = combined.includes('代发');
-                
-                if (filterType === 'normal' && isProxy) return;  // 只要非代发，跳过代发订单
-                if (filterType === 'proxy' && !isProxy) return;  // 只要代发，跳过非代发订单
-              }}
-              rows.push(r);
-            }}
-          }});
+        (getOrderGroupIndex().bySku.get(sku) || []).forEach(r => {{
+          // 根据filterType过滤订单
+          if (filterType && filterType !== 'all') {{
+            const isProxy = orderTraits(r).proxy;
+
+            if (filterType === 'normal' && isProxy) return;  // 只要非代发，跳过代发订单
+            if (filterType === 'proxy' && !isProxy) return;  // 只要代发，跳过非代发订单
+          }}
+          rows.push(r);
         }});
       }} catch (e) {{}}
-      const orderedRows = rows.slice().sort((a, b) => {{
-        const ad = String(a['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const bd = String(b['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const an = ad ? parseInt(ad, 10) : 0;
-        const bn = bd ? parseInt(bd, 10) : 0;
-        return bn - an;
+      // rows 是本函数新建的数组，原地排序即可，无需先复制
+      const orderedRows = rows.sort((a, b) => {{
+        return orderDate8(b) - orderDate8(a);
       }});
       const filterLabel = filterType === 'proxy' ? '（仅代发）' : filterType === 'normal' ? '（不含代发）' : '';
+      ensureDrawer();
       detailTitle.textContent = sku + ' - 订单明细' + filterLabel + '（' + rows.length + ' 条）';
-      detailTbody.innerHTML = '';
-      if (!rows.length) {{
-        const tr = document.createElement('tr');
-        const td = document.createElement('td');
-        td.colSpan = 15;
-        td.textContent = '暂无数据';
-        tr.appendChild(td);
-        detailTbody.appendChild(tr);
-      }} else {{
-        const frag = document.createDocumentFragment();
-        orderedRows.forEach(r => {{
-          const tr = document.createElement('tr');
-          const paymentAmt = r['付款金额'];
-          const costAmt = r['打款金额'];
-          const cols = [
-            r['姓名'] || '',
-            r['手机号'] || '',
-            (r['下单时间'] || ''),
-            r['下单平台'] || '',
-            r['厂家'] || '',
-            (r['商品名称'] || r['货品名'] || ''),
-            r['颜色'] || r['色号'] || '',
-            r['尺码'] || r['规格'] || r['码数'] || '',
-            formatAmount(paymentAmt),
-            formatAmount(costAmt),
-            calcMargin(paymentAmt, costAmt),
-            r['订单号'] || '',
-            r['退货单号'] || '',
-            r['退款类型'] || '',
-            r['退款原因'] || ''
-          ];
-          cols.forEach((text, i) => {{
-            const td = document.createElement('td');
-            if (i === 2) {{
-              const digits = String(text).replace(/\D/g, '');
-              if (digits.length >= 8) {{ td.setAttribute('data-sort-value', digits.slice(0,8)); }}
-            }} else if (i === 8 || i === 9) {{
-              const val = parseFloat(text);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }} else if (i === 10) {{ // 毛利率 numeric sort key
-              const marginText = String(text).replace('%', '');
-              const val = parseFloat(marginText);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }}
-            td.textContent = text;
-            tr.appendChild(td);
-          }});
-          frag.appendChild(tr);
-        }});
-        detailTbody.appendChild(frag);
-      }}
-      try {{ new Tablesort(detailTable); }} catch (e) {{}}
+      renderDetailRows(orderedRows);
       detailBackdrop.classList.remove('hidden');
       panel.classList.remove('hidden');
       panelOpen = true;
@@ -5573,84 +6281,15 @@ def write_html_dashboard(
       if (!qn) return;
       const rows = [];
       try {{
-        Object.values(globalDetails || {{}}).forEach(list => {{
-          if (!Array.isArray(list)) return;
-          list.forEach(r => {{
-            if (!r || typeof r !== 'object') return;
-            let blob = '';
-            try {{
-              for (const k in r) {{
-                if (!Object.prototype.hasOwnProperty.call(r, k)) continue;
-                const v = r[k];
-                if (v === null || v === undefined) continue;
-                if (typeof v === 'string' || typeof v === 'number') blob += ' ' + String(v);
-              }}
-            }} catch (e) {{}}
-            const txt = normAlphaNum(blob);
-            if (txt && qn && txt.indexOf(qn) !== -1) rows.push(r);
-          }});
-        }});
+        const idx = getGlobalTokenIndex();
+        findGlobalRowIds(qn).forEach(id => rows.push(idx.rows[id]));
       }} catch (e) {{}}
-      const orderedRows = rows.slice().sort((a, b) => {{
-        const ad = String(a['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const bd = String(b['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const an = ad ? parseInt(ad, 10) : 0;
-        const bn = bd ? parseInt(bd, 10) : 0;
-        return bn - an;
+      const orderedRows = rows.sort((a, b) => {{
+        return orderDate8(b) - orderDate8(a);
       }});
+      ensureDrawer();
       detailTitle.textContent = '包含“' + (queryRaw || '') + '”的货品 - 订单明细（' + rows.length + ' 条）';
-      detailTbody.innerHTML = '';
-      if (!rows.length) {{
-        const tr = document.createElement('tr');
-        const td = document.createElement('td');
-        td.colSpan = 15;
-        td.textContent = '暂无数据';
-        tr.appendChild(td);
-        detailTbody.appendChild(tr);
-      }} else {{
-        const frag = document.createDocumentFragment();
-        orderedRows.forEach(r => {{
-          const tr = document.createElement('tr');
-          const paymentAmt = r['付款金额'];
-          const costAmt = r['打款金额'];
-          const cols = [
-            r['姓名'] || '',
-            r['手机号'] || '',
-            (r['下单时间'] || ''),
-            r['下单平台'] || '',
-            r['厂家'] || '',
-            (r['商品名称'] || r['货品名'] || ''),
-            r['颜色'] || r['色号'] || '',
-            r['尺码'] || r['规格'] || r['码数'] || '',
-            formatAmount(paymentAmt),
-            formatAmount(costAmt),
-            calcMargin(paymentAmt, costAmt),
-            r['订单号'] || '',
-            r['退货单号'] || '',
-            r['退款类型'] || '',
-            r['退款原因'] || ''
-          ];
-          cols.forEach((text, i) => {{
-            const td = document.createElement('td');
-            if (i === 2) {{
-              const digits = String(text).replace(/\D/g, '');
-              if (digits.length >= 8) {{ td.setAttribute('data-sort-value', digits.slice(0,8)); }}
-            }} else if (i === 8 || i === 9) {{
-              const val = parseFloat(text);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }} else if (i === 10) {{ // 毛利率 numeric sort key
-              const marginText = String(text).replace('%', '');
-              const val = parseFloat(marginText);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }}
-            td.textContent = text;
-            tr.appendChild(td);
-          }});
-          frag.appendChild(tr);
-        }});
-        detailTbody.appendChild(frag);
-      }}
-      try {{ new Tablesort(detailTable); }} catch (e) {{}}
+      renderDetailRows(orderedRows);
       detailBackdrop.classList.remove('hidden');
       panel.classList.remove('hidden');
       panelOpen = true;
@@ -5658,77 +6297,17 @@ def write_html_dashboard(
 
     function openDetailForManufacturer(manufacturer) {{
       if (!manufacturer) return;
-      const rows = [];
+      let rows = [];
       try {{
-        Object.values(globalDetails || {{}}).forEach(list => {{
-          if (!Array.isArray(list)) return;
-          list.forEach(r => {{
-            if (!r || typeof r !== 'object') return;
-            const mfr = (r['厂家'] || '').trim();
-            if (mfr === manufacturer) rows.push(r);
-          }});
-        }});
+        // 索引里的数组是共享的，复制一份再排序
+        rows = (getOrderGroupIndex().byMfr.get(manufacturer) || []).slice();
       }} catch (e) {{}}
-      const orderedRows = rows.slice().sort((a, b) => {{
-        const ad = String(a['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const bd = String(b['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const an = ad ? parseInt(ad, 10) : 0;
-        const bn = bd ? parseInt(bd, 10) : 0;
-        return bn - an;
+      const orderedRows = rows.sort((a, b) => {{
+        return orderDate8(b) - orderDate8(a);
       }});
+      ensureDrawer();
       detailTitle.textContent = '厂家"' + manufacturer + '" - 订单明细（' + rows.length + ' 条）';
-      detailTbody.innerHTML = '';
-      if (!rows.length) {{
-        const tr = document.createElement('tr');
-        const td = document.createElement('td');
-        td.colSpan = 15;
-        td.textContent = '暂无数据';
-        tr.appendChild(td);
-        detailTbody.appendChild(tr);
-      }} else {{
-        const frag = document.createDocumentFragment();
-        orderedRows.forEach(r => {{
-          const tr = document.createElement('tr');
-          const paymentAmt = r['付款金额'];
-          const costAmt = r['打款金额'];
-          const cols = [
-            r['姓名'] || '',
-            r['手机号'] || '',
-            (r['下单时间'] || ''),
-            r['下单平台'] || '',
-            r['厂家'] || '',
-            (r['商品名称'] || r['货品名'] || ''),
-            r['颜色'] || r['色号'] || '',
-            r['尺码'] || r['规格'] || r['码数'] || '',
-            formatAmount(paymentAmt),
-            formatAmount(costAmt),
-            calcMargin(paymentAmt, costAmt),
-            r['订单号'] || '',
-            r['退货单号'] || '',
-            r['退款类型'] || '',
-            r['退款原因'] || ''
-          ];
-          cols.forEach((text, i) => {{
-            const td = document.createElement('td');
-            if (i === 2) {{
-              const digits = String(text).replace(/\D/g, '');
-              if (digits.length >= 8) {{ td.setAttribute('data-sort-value', digits.slice(0,8)); }}
-            }} else if (i === 8 || i === 9) {{
-              const val = parseFloat(text);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }} else if (i === 10) {{
-              const marginText = String(text).replace('%', '');
-              const val = parseFloat(marginText);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }}
-            td.textContent = text;
-            tr.appendChild(td);
-          }});
-          frag.appendChild(tr);
-        }});
-        detailTbody.appendChild(frag);
-      }}
-      try {{ new Tablesort(detailTable); }} catch (e) {{}}
+      renderDetailRows(orderedRows);
       detailBackdrop.classList.remove('hidden');
       panel.classList.remove('hidden');
       panelOpen = true;
@@ -5736,403 +6315,392 @@ def write_html_dashboard(
 
     function openDetailForPlatform(platform) {{
       if (!platform) return;
-      const rows = [];
+      let rows = [];
       try {{
-        Object.values(globalDetails || {{}}).forEach(list => {{
-          if (!Array.isArray(list)) return;
-          list.forEach(r => {{
-            if (!r || typeof r !== 'object') return;
-            const plat = (r['下单平台'] || '').trim();
-            if (plat === platform) rows.push(r);
-          }});
-        }});
+        rows = (getOrderGroupIndex().byPlat.get(platform) || []).slice();
       }} catch (e) {{}}
-      const orderedRows = rows.slice().sort((a, b) => {{
-        const ad = String(a['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const bd = String(b['下单时间'] || '').replace(/\D/g, '').slice(0,8);
-        const an = ad ? parseInt(ad, 10) : 0;
-        const bn = bd ? parseInt(bd, 10) : 0;
-        return bn - an;
+      const orderedRows = rows.sort((a, b) => {{
+        return orderDate8(b) - orderDate8(a);
       }});
+      ensureDrawer();
       detailTitle.textContent = '平台"' + platform + '" - 订单明细（' + rows.length + ' 条）';
-      detailTbody.innerHTML = '';
-      if (!rows.length) {{
-        const tr = document.createElement('tr');
-        const td = document.createElement('td');
-        td.colSpan = 15;
-        td.textContent = '暂无数据';
-        tr.appendChild(td);
-        detailTbody.appendChild(tr);
-      }} else {{
-        const frag = document.createDocumentFragment();
-        orderedRows.forEach(r => {{
-          const tr = document.createElement('tr');
-          const paymentAmt = r['付款金额'];
-          const costAmt = r['打款金额'];
-          const cols = [
-            r['姓名'] || '',
-            r['手机号'] || '',
-            (r['下单时间'] || ''),
-            r['下单平台'] || '',
-            r['厂家'] || '',
-            (r['商品名称'] || r['货品名'] || ''),
-            r['颜色'] || r['色号'] || '',
-            r['尺码'] || r['规格'] || r['码数'] || '',
-            formatAmount(paymentAmt),
-            formatAmount(costAmt),
-            calcMargin(paymentAmt, costAmt),
-            r['订单号'] || '',
-            r['退货单号'] || '',
-            r['退款类型'] || '',
-            r['退款原因'] || ''
-          ];
-          cols.forEach((text, i) => {{
-            const td = document.createElement('td');
-            if (i === 2) {{
-              const digits = String(text).replace(/\D/g, '');
-              if (digits.length >= 8) {{ td.setAttribute('data-sort-value', digits.slice(0,8)); }}
-            }} else if (i === 8 || i === 9) {{
-              const val = parseFloat(text);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }} else if (i === 10) {{
-              const marginText = String(text).replace('%', '');
-              const val = parseFloat(marginText);
-              if (isFinite(val)) td.setAttribute('data-sort-value', String(val));
-            }}
-            td.textContent = text;
-            tr.appendChild(td);
-          }});
-          frag.appendChild(tr);
-        }});
-        detailTbody.appendChild(frag);
-      }}
-      try {{ new Tablesort(detailTable); }} catch (e) {{}}
+      renderDetailRows(orderedRows);
       detailBackdrop.classList.remove('hidden');
       panel.classList.remove('hidden');
       panelOpen = true;
     }}
 
-    // 渲染"加推SKU"（近45天 订单>4 且 退货率<20%）+ 分页
-    try {{
-      const container = document.getElementById('skuPushTable');
-      if (container && typeof globalDetails === 'object' && globalDetails) {{
-        const now = new Date(todayStr.replace(/\./g,'-').replace(/\//g,'-'));
-        const cutoff = new Date(now.getTime() - 45 * 24 * 3600 * 1000);
-        const stats = {{}};
-        const add = (sku) => {{ if (!stats[sku]) stats[sku] = {{orders:0, returns:0, revenue:0}}; return stats[sku]; }};
-        const parseDate = (s) => {{
-          if (s === null || s === undefined) return null;
-          // 兼容数字型 Excel 序列日期
-          const num = (typeof s === 'number') ? s : (/^\d+$/.test(String(s)) ? Number(String(s)) : NaN);
-          if (!isNaN(num)) {{
-            // Excel 1900 序列基准：1899-12-30
-            const base = new Date(1899, 11, 30);
-            const t = new Date(base.getTime() + num * 24 * 3600 * 1000);
-            return isNaN(t) ? null : t;
-          }}
-          // 优先使用 ISO 格式
-          const t = new Date(String(s).replace(/\./g,'-').replace(/\//g,'-'));
-          return isNaN(t) ? null : t;
-        }};
-        Object.values(globalDetails).forEach(list => {{
-          if (!Array.isArray(list)) return;
-          list.forEach(r => {{
+    // 渲染"加推SKU"（近45天 订单>4 且 退货率<20%）+ 分页；服务端只输出空容器，区块首次进入视口时才汇总并渲染
+    function hydrateSkuPush() {{
+      try {{
+        const container = document.getElementById('skuPushTable');
+        if (container && typeof globalDetails === 'object' && globalDetails) {{
+          const now = new Date(todayStr.replace(/\./g,'-').replace(/\//g,'-'));
+          const cutoff = new Date(now.getTime() - 45 * 24 * 3600 * 1000);
+          const stats = {{}};
+          const add = (sku) => {{ if (!stats[sku]) stats[sku] = {{orders:0, returns:0, revenue:0}}; return stats[sku]; }};
+          // 截止日换成 YYYYMMDD 整数（todayStr 为 UTC 日期，按 UTC 取年月日），逐单只比较 orderTraits 里缓存的下单日
+          const cutoff8 = cutoff.getUTCFullYear() * 10000 + (cutoff.getUTCMonth() + 1) * 100 + cutoff.getUTCDate();
+          globalRecords.forEach(r => {{
             const sku = (r['货品名'] || '').trim();
             if (!sku) return;
             // 排除代发和样品
-            const platform = String(r['下单平台'] || '').trim();
-            const prod = String(r['商品名称'] || '');
-            const rmk = String(r['备注'] || '');
-            const combined = platform + ' ' + prod + ' ' + sku + ' ' + rmk;
-            if (combined.includes('代发') || combined.includes('样品')) return;
-            const d = parseDate(r['下单时间']);
-            if (!d || d < cutoff) return;
-            const refundType = String(r['退款类型'] || '').trim();
-            const returnNo = String(r['退货单号'] || '').trim();
-            const orderNo = String(r['订单号'] || '').trim();
-            const pay = Number(r['付款金额'] || 0) || 0;
-            const isCancel = refundType.includes('取消') || orderNo.includes('取消');
-            const isReturn = !isCancel && ((/退|退货|退款/.test(refundType)) || (returnNo && returnNo !== '/' && returnNo !== '-'));
-            const isValidOrder = pay > 0 && !isCancel;
+            const t = orderTraits(r);
+            if (t.proxy || t.sample) return;
+            if (!t.day8 || t.day8 < cutoff8) return;
+            const pay = t.pay;
+            const isValidOrder = pay > 0 && !t.cancel;
             const sstat = add(sku);
             if (isValidOrder) {{ sstat.orders += 1; sstat.revenue += Math.max(0, pay); }}
-            if (isReturn) {{ sstat.returns += 1; }}
+            if (t.isReturn) {{ sstat.returns += 1; }}
           }});
-        }});
-        const candidates = Object.entries(stats).map(([sku, s]) => {{
-          const orders = s.orders|0;
-          if (!orders) return null;
-          const rr = Math.min(1, Math.max(0, (s.returns||0) / Math.max(1, orders)));
-          return {{sku, orders, rr, rev: Number(s.revenue||0)}};
-        }}).filter(x => x && x.orders >= 3 && x.rr < 0.30);
-        const totalCount = candidates.length;
-        const rowsAll = candidates.sort((a,b) => b.orders - a.orders || a.rr - b.rr || b.rev - a.rev);
-        if (rowsAll.length) {{
-          const pageSize = rowsAll.length; // 显示全部行，依靠外层 .scroll-pane 滚动
-          let page = 1;
-          const pages = Math.max(1, Math.ceil(rowsAll.length / pageSize));
-          const navStyle = pages <= 1 ? " style=\\"display:none\\"" : "";
-          const head = "<thead><tr><th>SKU</th><th data-sort-method='number'>订单数</th><th data-sort-method='number'>退货率</th><th data-sort-method='number'>销售额</th></tr></thead>";
-          container.innerHTML = ""
-            + `<div class='sku-nav'${{navStyle}}>`
-            + `<span style='margin-right:auto;color:#666;font-size:12px;'>共${{totalCount}}条</span>`
-            + `<button id='skuPrev'>上一页</button>`
-            + `<span id='skuPage' style='color:#666;font-size:12px;'></span>`
-            + `<button id='skuNext'>下一页</button>`
-            + `</div>`
-            + `<table class='mini-table w-full'>${{head}}<tbody id='skuBody'></tbody></table>`;
-          const bodyEl = container.querySelector('#skuBody');
-          const pageEl = container.querySelector('#skuPage');
-          const prevBtn = container.querySelector('#skuPrev');
-          const nextBtn = container.querySelector('#skuNext');
-          function bindSkuClicks() {{
-            bodyEl.querySelectorAll('tr').forEach(tr => {{
-              tr.addEventListener('click', () => {{
-                const sku = tr.getAttribute('data-sku') || '';
-                if (sku) openDetailForSku(sku, 'all');
-              }});
+          const candidates = Object.entries(stats).map(([sku, s]) => {{
+            const orders = s.orders|0;
+            if (!orders) return null;
+            const rr = Math.min(1, Math.max(0, (s.returns||0) / Math.max(1, orders)));
+            return {{sku, orders, rr, rev: Number(s.revenue||0)}};
+          }}).filter(x => x && x.orders >= 3 && x.rr < 0.30);
+          const totalCount = candidates.length;
+          const rowsAll = candidates.sort((a,b) => b.orders - a.orders || a.rr - b.rr || b.rev - a.rev);
+          if (rowsAll.length) {{
+            const pageSize = rowsAll.length; // 显示全部行，依靠外层 .scroll-pane 滚动
+            let page = 1;
+            const pages = Math.max(1, Math.ceil(rowsAll.length / pageSize));
+            const navStyle = pages <= 1 ? " style=\\"display:none\\"" : "";
+            const head = "<thead><tr><th>SKU</th><th data-sort-method='number'>订单数</th><th data-sort-method='number'>退货率</th><th data-sort-method='number'>销售额</th></tr></thead>";
+            container.innerHTML = ""
+              + `<div class='sku-nav'${{navStyle}}>`
+              + `<span style='margin-right:auto;color:#666;font-size:12px;'>共${{totalCount}}条</span>`
+              + `<button id='skuPrev'>上一页</button>`
+              + `<span id='skuPage' style='color:#666;font-size:12px;'></span>`
+              + `<button id='skuNext'>下一页</button>`
+              + `</div>`
+              + `<table class='mini-table w-full'>${{head}}<tbody id='skuBody'></tbody></table>`;
+            const bodyEl = container.querySelector('#skuBody');
+            const pageEl = container.querySelector('#skuPage');
+            const prevBtn = container.querySelector('#skuPrev');
+            const nextBtn = container.querySelector('#skuNext');
+            // 行点击委托在 tbody 上，翻页重绘行时无需重新绑定
+            bodyEl.addEventListener('click', (e) => {{
+              const tr = e.target.closest('tr');
+              if (!tr || !bodyEl.contains(tr)) return;
+              const sku = tr.getAttribute('data-sku') || '';
+              if (sku) openDetailForSku(sku, 'all');
             }});
+            function render() {{
+              const start = (page - 1) * pageSize;
+              const slice = rowsAll.slice(start, start + pageSize);
+              bodyEl.innerHTML = slice.map(r => `<tr data-sku="${{r.sku}}"><td>${{r.sku}}</td><td data-sort-value='${{r.orders}}'>${{r.orders}}</td><td data-sort-value='${{r.rr.toFixed(6)}}'>${{(r.rr*100).toFixed(1)}}%</td><td data-sort-value='${{r.rev.toFixed(2)}}'>${{r.rev.toFixed(2)}}</td></tr>`).join('');
+              pageEl.textContent = `${{page}} / ${{pages}}`;
+              prevBtn.disabled = page <= 1;
+              nextBtn.disabled = page >= pages;
+            }}
+            prevBtn.addEventListener('click', () => {{ if (page > 1) {{ page -= 1; render(); }} }});
+            nextBtn.addEventListener('click', () => {{ if (page < pages) {{ page += 1; render(); }} }});
+            prevBtn.addEventListener('click', () => {{ playSound('click'); }});
+            nextBtn.addEventListener('click', () => {{ playSound('click'); }});
+            render();
+            lazyTablesort(container.querySelector('table'));
+          }} else {{
+            container.innerHTML = '<p>暂无符合条件的SKU。</p>';
           }}
-          function render() {{
-            const start = (page - 1) * pageSize;
-            const slice = rowsAll.slice(start, start + pageSize);
-            bodyEl.innerHTML = slice.map(r => `<tr data-sku="${{r.sku}}"><td>${{r.sku}}</td><td data-sort-value='${{r.orders}}'>${{r.orders}}</td><td data-sort-value='${{r.rr.toFixed(6)}}'>${{(r.rr*100).toFixed(1)}}%</td><td data-sort-value='${{r.rev.toFixed(2)}}'>${{r.rev.toFixed(2)}}</td></tr>`).join('');
-            pageEl.textContent = `${{page}} / ${{pages}}`;
-            prevBtn.disabled = page <= 1;
-            nextBtn.disabled = page >= pages;
-            bindSkuClicks();
-          }}
-          prevBtn.addEventListener('click', () => {{ if (page > 1) {{ page -= 1; render(); }} }});
-          nextBtn.addEventListener('click', () => {{ if (page < pages) {{ page += 1; render(); }} }});
-          prevBtn.addEventListener('click', () => {{ playSound('click'); }});
-          nextBtn.addEventListener('click', () => {{ playSound('click'); }});
-          render();
-          try {{ new Tablesort(container.querySelector('table')); }} catch (e) {{}}
-        }} else {{
-          container.innerHTML = '<p>暂无符合条件的SKU。</p>';
         }}
-      }}
-    }} catch (e) {{ /* no-op */ }}
+      }} catch (e) {{ /* no-op */ }}
+    }}
+    hydrateWhenVisible(document.getElementById('skuPushTable'), hydrateSkuPush);
 
-    // 渲染“高退货预警”（明细>3，退货率>30%）
-    try {{
-      const container = document.getElementById('skuReturnAlertTable');
-      if (container && typeof globalDetails === 'object' && globalDetails) {{
-        const now = new Date(todayStr.replace(/\./g,'-').replace(/\//g,'-'));
-        const cutoff = new Date(now.getTime() - 45 * 24 * 3600 * 1000);
-        // 45天内统计（用于筛选）
-        const stats45 = {{}};
-        const add45 = (sku) => {{ if (!stats45[sku]) stats45[sku] = {{details:0, orders:0, returns:0, revenue:0, typeCount: {{}}, reasonCount: {{}}}}; return stats45[sku]; }};
-        // 历史全部统计（用于展示）
-        const statsAll = {{}};
-        const addAll = (sku) => {{ if (!statsAll[sku]) statsAll[sku] = {{details:0, orders:0, returns:0, revenue:0, typeCount: {{}}, reasonCount: {{}}}}; return statsAll[sku]; }};
-        const parseDate = (s) => {{
-          if (s === null || s === undefined) return null;
-          const num = (typeof s === 'number') ? s : (/^\d+$/.test(String(s)) ? Number(String(s)) : NaN);
-          if (!isNaN(num)) {{
-            const base = new Date(1899, 11, 30);
-            const t = new Date(base.getTime() + num * 24 * 3600 * 1000);
-            return isNaN(t) ? null : t;
-          }}
-          const t = new Date(String(s).replace(/\./g,'-').replace(/\//g,'-'));
-          return isNaN(t) ? null : t;
-        }};
-        Object.values(globalDetails).forEach(list => {{
-          if (!Array.isArray(list)) return;
-          list.forEach(r => {{
+    // 渲染“高退货预警”（明细>3，退货率>30%）；区块首次进入视口时才汇总（客服视角下整块隐藏，不占首屏加载）
+    function hydrateReturnAlerts() {{
+      try {{
+        const container = document.getElementById('skuReturnAlertTable');
+        if (container && typeof globalDetails === 'object' && globalDetails) {{
+          const now = new Date(todayStr.replace(/\./g,'-').replace(/\//g,'-'));
+          const cutoff = new Date(now.getTime() - 45 * 24 * 3600 * 1000);
+          // 截止日换成 YYYYMMDD 整数（todayStr 为 UTC 日期，按 UTC 取年月日），逐单只比较 orderTraits 里缓存的下单日
+          const cutoff8 = cutoff.getUTCFullYear() * 10000 + (cutoff.getUTCMonth() + 1) * 100 + cutoff.getUTCDate();
+          // 货品名映射为整数下标，计数放进按下标的类型化数组，逐行不再新建统计对象
+          const skuId = new Map();
+          const skuNames = [];
+          const nRows = globalRecords.length;
+          const rowSku = new Int32Array(nRows).fill(-1);
+          const rowFlags = new Uint8Array(nRows);   // 1=有效成交 2=退货 4=45天内
+          const rowPay = new Float64Array(nRows);
+          for (let i = 0; i < nRows; i++) {{
+            const r = globalRecords[i];
             const sku = (r['货品名'] || '').trim();
-            if (!sku) return;
+            if (!sku) continue;
             // 排除代发和样品
-            const platform = String(r['下单平台'] || '').trim();
-            const prod = String(r['商品名称'] || '');
-            const rmk = String(r['备注'] || '');
-            const combined = platform + ' ' + prod + ' ' + sku + ' ' + rmk;
-            if (combined.includes('代发') || combined.includes('样品')) return;
-            const d = parseDate(r['下单时间']);
-            if (!d) return; // 跳过无效日期
-            const refundType = String(r['退款类型'] || '').trim();
-            const returnNo = String(r['退货单号'] || '').trim();
-            const orderNo = String(r['订单号'] || '').trim();
-            const pay = Number(r['付款金额'] || 0) || 0;
-            const isCancel = refundType.includes('取消') || orderNo.includes('取消');
-            const isReturn = !isCancel && ((/退|退货|退款/.test(refundType)) || (returnNo && returnNo !== '/' && returnNo !== '-'));
-
-            // 计算45天内统计（用于筛选）
-            const is45Day = d >= cutoff;
-            if (is45Day) {{
-              const stat45 = add45(sku);
-              if (!isCancel && pay > 0) {{ stat45.orders += 1; stat45.revenue += Math.max(0, pay); stat45.details += 1; }}
-              if (isReturn) {{
-                stat45.returns += 1;
-                if (refundType) {{ stat45.typeCount[refundType] = (stat45.typeCount[refundType]||0) + 1; }}
-                const rr = String(r['退款原因']||'').trim();
-                if (rr) {{ stat45.reasonCount[rr] = (stat45.reasonCount[rr]||0) + 1; }}
+            const t = orderTraits(r);
+            if (t.proxy || t.sample) continue;
+            if (!t.day8) continue; // 跳过无效日期
+            let id = skuId.get(sku);
+            if (id === undefined) {{ id = skuNames.length; skuId.set(sku, id); skuNames.push(sku); }}
+            rowSku[i] = id;
+            rowFlags[i] = ((!t.cancel && t.pay > 0) ? 1 : 0) | (t.isReturn ? 2 : 0) | (t.day8 >= cutoff8 ? 4 : 0);
+            rowPay[i] = t.pay;
+          }}
+          // 纯计算：按货品下标汇总成交/退货并筛选（45天内明细>3 且 退货率>30%），只读写类型化数组，可整段放进 Worker
+          function aggregateReturnAlerts(msg) {{
+            const rowSku = msg.rowSku, rowFlags = msg.rowFlags, rowPay = msg.rowPay, nSku = msg.nSku;
+            const nRows = rowSku.length;
+            // 明细笔数与有效订单数同口径计数，共用一组数组
+            const ord45 = new Int32Array(nSku), ret45 = new Int32Array(nSku);
+            const ordAll = new Int32Array(nSku), retAll = new Int32Array(nSku);
+            const revAll = new Float64Array(nSku);
+            const seen45 = new Uint8Array(nSku);
+            const skuOrder45 = [];   // 按首次出现 45 天内订单的顺序记录下标，与原先对象键顺序一致
+            for (let i = 0; i < nRows; i++) {{
+              const id = rowSku[i];
+              if (id < 0) continue;
+              const f = rowFlags[i];
+              if (f & 4) {{
+                if (!seen45[id]) {{ seen45[id] = 1; skuOrder45.push(id); }}
+                if (f & 1) ord45[id]++;
+                if (f & 2) ret45[id]++;
               }}
+              if (f & 1) {{ ordAll[id]++; revAll[id] += rowPay[i]; }}
+              if (f & 2) retAll[id]++;
             }}
-
-            // 计算历史全部统计（用于展示）
-            const statAll = addAll(sku);
-            if (!isCancel && pay > 0) {{ statAll.orders += 1; statAll.revenue += Math.max(0, pay); statAll.details += 1; }}
-            if (isReturn) {{
-              statAll.returns += 1;
-              if (refundType) {{ statAll.typeCount[refundType] = (statAll.typeCount[refundType]||0) + 1; }}
-              const rr = String(r['退款原因']||'').trim();
-              if (rr) {{ statAll.reasonCount[rr] = (statAll.reasonCount[rr]||0) + 1; }}
+            const picked = [];
+            for (const id of skuOrder45) {{
+              const orders45 = ord45[id];
+              if (!orders45) continue;
+              const rr45 = Math.min(1, Math.max(0, ret45[id] / Math.max(1, orders45)));
+              if (orders45 <= 3 || rr45 <= 0.30) continue;
+              picked.push(id);
             }}
-          }});
-        }});
-        function topKey(obj) {{
-          let k = '', m = 0;
-          Object.entries(obj||{{}}).forEach(([kk, vv]) => {{ if ((vv|0) > m) {{ m = vv|0; k = kk; }} }});
-          return k;
-        }}
-        function topKeys(obj, n) {{
-          const arr = Object.entries(obj||{{}}).map(([k,v]) => [k, v|0]);
-          arr.sort((a,b) => (b[1]-a[1]) || (a[0] > b[0] ? 1 : -1));
-          return arr.slice(0, Math.max(0, n|0)).map(x => x[0]);
-        }}
-        function truncate(text, maxLen) {{
-          const s = String(text || '');
-          if (s.length <= maxLen) return s;
-          return s.slice(0, Math.max(0, maxLen)).trim() + '…';
-        }}
-        const rows = Object.entries(stats45).map(([sku, s45]) => {{
-          // 使用45天数据进行筛选
-          const orders45 = s45.orders|0;
-          if (!orders45) return null;
-          const rr45 = Math.min(1, Math.max(0, (s45.returns||0) / Math.max(1, orders45)));
-
-          // 筛选条件：45天内明细>3 且 退货率>30%
-          if (s45.details <= 3 || rr45 <= 0.30) return null;
-
-          // 获取历史全部数据用于展示
-          const sAll = statsAll[sku] || {{details:0, orders:0, returns:0, revenue:0, typeCount: {{}}, reasonCount: {{}}}};
-          const ordersAll = sAll.orders|0;
-          const rrAll = ordersAll ? Math.min(1, Math.max(0, (sAll.returns||0) / Math.max(1, ordersAll))) : 0;
-          const reasonsTop3 = topKeys(sAll.reasonCount, 3).map(x => truncate(x, 10)).join('、');
-
-          // 返回历史全部数据用于展示
-          return {{ sku, details: sAll.details|0, orders: ordersAll, rev: Number(sAll.revenue||0), rr: rrAll, rtype: topKey(sAll.typeCount), rreasons: reasonsTop3 }};
-        }}).filter(x => x)
-          .sort((a,b) => b.rr - a.rr || b.details - a.details || b.rev - a.rev);
-        if (rows.length) {{
-          const head = "<thead><tr><th>货品名</th><th data-sort-method='number'>明细笔数</th><th data-sort-method='number'>销售额</th><th data-sort-method='number'>退货率</th><th>退款类型</th></tr></thead>";
-          const body = rows.map(r => `<tr data-sku=\"${{r.sku}}\"><td>${{r.sku}}</td><td data-sort-value='${{r.details}}'>${{r.details}}</td><td data-sort-value='${{r.rev.toFixed(2)}}'>${{r.rev.toFixed(2)}}</td><td data-sort-value='${{r.rr.toFixed(6)}}'>${{(r.rr*100).toFixed(1)}}%</td><td>${{r.rtype||''}}</td></tr>`).join('');
-          container.innerHTML = `<table class='mini-table'>${{head}}<tbody>${{body}}</tbody></table>`;
-          container.querySelectorAll('tr[data-sku]').forEach(tr => {{
-            tr.addEventListener('click', (e) => {{
-              // 忽略点击表头的情况
-              if (e.target.tagName === 'TH' || e.target.closest('th')) return;
-              const sku = tr.getAttribute('data-sku') || '';
-              if (sku) openDetailForSku(sku, 'all');
+            return {{ picked: Int32Array.from(picked), ordAll, retAll, revAll }};
+          }}
+          // 单次遍历取最大项，不生成 entries 数组；空值直接返回，不再为兜底临时建空对象
+          function topKey(obj) {{
+            let k = '', m = 0;
+            if (!obj) return k;
+            for (const kk in obj) {{ const vv = obj[kk]|0; if (vv > m) {{ m = vv; k = kk; }} }}
+            return k;
+          }}
+          function renderReturnAlerts(res) {{
+            const ordAll = res.ordAll, retAll = res.retAll, revAll = res.revAll;
+            // 只有入选的货品才回扫其退货行统计退款类型
+            const picked = new Map();
+            res.picked.forEach(id => picked.set(id, {{}}));
+            if (picked.size) {{
+              for (let i = 0; i < nRows; i++) {{
+                if (!(rowFlags[i] & 2)) continue;
+                const typeCount = picked.get(rowSku[i]);
+                if (!typeCount) continue;
+                const refundType = String(globalRecords[i]['退款类型'] || '').trim();
+                if (refundType) typeCount[refundType] = (typeCount[refundType]||0) + 1;
+              }}
+            }}
+            // 先用数值字段建行并排序（历史全部数据用于展示），退款类型等排序后再逐行补齐
+            const rows = [];
+            picked.forEach((typeCount, id) => {{
+              const ordersAll = ordAll[id];
+              const rrAll = ordersAll ? Math.min(1, Math.max(0, retAll[id] / Math.max(1, ordersAll))) : 0;
+              rows.push({{ id, sku: skuNames[id], details: ordersAll, orders: ordersAll, rev: revAll[id], rr: rrAll, rtype: '' }});
             }});
-          }});
-          try {{ new Tablesort(container.querySelector('table')); }} catch (e) {{}}
-        }} else {{
-          container.innerHTML = '<p>暂无符合条件的SKU。</p>';
+            rows.sort((a,b) => b.rr - a.rr || b.details - a.details || b.rev - a.rev);
+            for (const r of rows) r.rtype = topKey(picked.get(r.id));
+            if (rows.length) {{
+              const table = container.querySelector('table');
+              const body = rows.map(r => `<tr data-sku=\"${{r.sku}}\"><td>${{r.sku}}</td><td data-sort-value='${{r.details}}'>${{r.details}}</td><td data-sort-value='${{r.rev.toFixed(2)}}'>${{r.rev.toFixed(2)}}</td><td data-sort-value='${{r.rr.toFixed(6)}}'>${{(r.rr*100).toFixed(1)}}%</td><td>${{r.rtype||''}}</td></tr>`).join('');
+              // 页面已带表头骨架，只解析行 HTML
+              table.tBodies[0].innerHTML = body;
+              // 容器上委托一次行点击
+              container.addEventListener('click', (e) => {{
+                // 只匹配 tbody 中的行，表头点击自然落空，无需再单独判断 TH
+                const tr = e.target.closest('tbody tr[data-sku]');
+                if (!tr || !container.contains(tr)) return;
+                const sku = tr.getAttribute('data-sku') || '';
+                if (sku) openDetailForSku(sku, 'all');
+              }});
+              lazyTablesort(table);
+            }} else {{
+              container.innerHTML = '<p>暂无符合条件的SKU。</p>';
+            }}
+          }}
+          // 汇总交给内联 Worker，结果数组转移所有权传回后再渲染；行数组按内存块整体复制给 Worker，
+          // 主线程保留原件用于回扫退货行，Worker 不可用或出错时也能直接同步重算
+          const alertMsg = {{ rowSku, rowFlags, rowPay, nSku: skuNames.length }};
+          const renderSafely = res => {{ try {{ renderReturnAlerts(res); }} catch (e) {{ /* no-op */ }} }};
+          let alertWorker = null, alertUrl = null;
+          if (window.Worker && window.Blob && window.URL) {{
+            try {{
+              const src = aggregateReturnAlerts.toString() + '\\n' +
+                'self.onmessage = function (e) {{ const res = aggregateReturnAlerts(e.data); ' +
+                'self.postMessage(res, [res.picked.buffer, res.ordAll.buffer, res.retAll.buffer, res.revAll.buffer]); }};';
+              alertUrl = URL.createObjectURL(new Blob([src], {{ type: 'text/javascript' }}));
+              alertWorker = new Worker(alertUrl);
+            }} catch (e) {{
+              if (alertUrl) URL.revokeObjectURL(alertUrl);
+              alertWorker = null;
+            }}
+          }}
+          if (alertWorker) {{
+            const done = () => {{ alertWorker.terminate(); URL.revokeObjectURL(alertUrl); }};
+            alertWorker.onmessage = e => {{ done(); renderSafely(e.data); }};
+            alertWorker.onerror = () => {{ done(); renderSafely(aggregateReturnAlerts(alertMsg)); }};
+            try {{
+              alertWorker.postMessage(alertMsg);
+            }} catch (e) {{
+              done();
+              renderSafely(aggregateReturnAlerts(alertMsg));
+            }}
+          }} else {{
+            renderReturnAlerts(aggregateReturnAlerts(alertMsg));
+          }}
         }}
-      }}
-    }} catch (e) {{ /* no-op */ }}
+      }} catch (e) {{ /* no-op */ }}
+    }}
+    hydrateWhenVisible(document.getElementById('skuReturnAlertTable'), hydrateReturnAlerts);
 
-    // 为低毛利预警表格添加点击事件和排序
-    try {{
-      const lowProfitTable = document.getElementById('lowProfitTable');
-      if (lowProfitTable) {{
-        // 初始化排序
-        try {{ new Tablesort(lowProfitTable); }} catch (e) {{}}
-        // 绑定点击事件（传递当前过滤器类型）
-        function bindLowProfitClicks() {{
-          lowProfitTable.querySelectorAll('tbody tr[data-sku]').forEach(tr => {{
-            tr.addEventListener('click', (e) => {{
-              // 忽略点击表头的情况
-              if (e.target.tagName === 'TH' || e.target.closest('th')) return;
-              const sku = tr.getAttribute('data-sku') || '';
-              if (!sku) return;
-              // 获取当前选择的过滤器类型
-              const currentFilter = document.querySelector('input[name="lowProfitFilter"]:checked')?.value || 'normal';
-              openDetailForSku(sku, currentFilter);
-            }});
+    // 为低毛利预警表格添加点击事件和排序；表格所在卡片首次进入视口时才绑定（默认过滤由页面上的 data-lpf 与计数直接给出）
+    function hydrateLowProfit() {{
+      try {{
+        const lowProfitTable = document.getElementById('lowProfitTable');
+        if (lowProfitTable) {{
+          // 初始化排序（首次点击表头时构造）
+          lazyTablesort(lowProfitTable);
+          // 当前过滤器类型在切换时记下，点击行和过滤时都不再整页查询单选框
+          let lowProfitFilterValue = 'normal';
+          // 绑定点击事件（传递当前过滤器类型）：表格上委托一次，不逐行绑定；只匹配 tbody 行，表头点击自然落空
+          lowProfitTable.addEventListener('click', (e) => {{
+            const tr = e.target.closest('tbody tr[data-sku]');
+            if (!tr || !lowProfitTable.contains(tr)) return;
+            const sku = tr.getAttribute('data-sku') || '';
+            if (!sku) return;
+            openDetailForSku(sku, lowProfitFilterValue);
           }});
-        }}
-        bindLowProfitClicks();
         
-        // 添加过滤器逻辑
-        const filterRadios = document.querySelectorAll('input[name="lowProfitFilter"]');
-        const countSpan = document.getElementById('lowProfitCount');
+          // 添加过滤器逻辑
+          const filterRadios = document.querySelectorAll('input[name="lowProfitFilter"]');
+          const countSpan = document.getElementById('lowProfitCount');
+          // 行数超过阈值时行数据由脚本带入（lowProfitRows），只渲染当前过滤类型在可视区附近的行，
+          // 上下用占位行撑出滚动高度，做法与明细抽屉一致
+          const lpScroller = lowProfitTable.closest('.scroll-pane');
+          const lpTbody = lowProfitTable.tBodies[0];
+          const lpVirtual = Array.isArray(lowProfitRows) && !!lpScroller && !!lpTbody;
+          let lpAll = lpVirtual ? lowProfitRows : null;   // 全部行（已排序），[货品名, 类型, 订单数, 毛利率, 末单日期, 日期排序值]
+          let lpView = null;                                // 当前过滤类型下的行
+          let lpRowHeight = 32;    // 估计行高，每次绘制后按实测修正
+          let lpWinStart = -1, lpWinEnd = -1;
+          let lpScrollQueued = false;
+
+          function lowProfitRowHtml(r) {{
+            const mr = r[3];
+            return '<tr data-sku="' + escapeHtml(r[0]) + '" data-type="' + r[1] + '"><td class="font-medium text-slate-700">' + escapeHtml(r[0]) +
+              '</td><td data-sort-value="' + r[2] + '">' + r[2] +
+              '</td><td data-sort-value="' + mr.toFixed(6) + '" class="' + (mr < 0.2 ? 'text-red-500' : 'text-amber-500') + '">' + (mr * 100).toFixed(1) + '%' +
+              '</td><td data-sort-value="' + r[5] + '">' + (r[4] ? escapeHtml(r[4]) : '-') + '</td></tr>';
+          }}
+
+          function lowProfitSpacer(h) {{
+            return '<tr class="lp-spacer"><td colspan="4" style="height:' + h + 'px;padding:0;border:0"></td></tr>';
+          }}
+
+          function renderLowProfitWindow(force) {{
+            const n = lpView.length;
+            const tbodyTop = lpTbody.getBoundingClientRect().top - lpScroller.getBoundingClientRect().top + lpScroller.scrollTop;
+            const offset = Math.max(0, lpScroller.scrollTop - tbodyTop);
+            const first = Math.floor(offset / lpRowHeight);
+            const start = Math.max(0, Math.min(first - DETAIL_OVERSCAN, n - DETAIL_WINDOW_ROWS - DETAIL_OVERSCAN));
+            const end = Math.min(n, first + DETAIL_WINDOW_ROWS + DETAIL_OVERSCAN);
+            if (!force && start === lpWinStart && end === lpWinEnd) return;
+            lpWinStart = start;
+            lpWinEnd = end;
+            let html = start ? lowProfitSpacer(start * lpRowHeight) : '';
+            for (let i = start; i < end; i++) html += lowProfitRowHtml(lpView[i]);
+            if (end < n) html += lowProfitSpacer((n - end) * lpRowHeight);
+            lpTbody.innerHTML = html;
+            const trs = lpTbody.rows;
+            const a = trs[start ? 1 : 0], b = trs[(start ? 1 : 0) + (end - start) - 1];
+            if (a && b && end > start) {{
+              const h = (b.offsetTop + b.offsetHeight - a.offsetTop) / (end - start);
+              if (h > 0) lpRowHeight = h;
+            }}
+          }}
+
+          if (lpVirtual) {{
+            lpScroller.addEventListener('scroll', () => {{
+              if (lpScrollQueued) return;
+              lpScrollQueued = true;
+              requestAnimationFrame(() => {{
+                lpScrollQueued = false;
+                renderLowProfitWindow(false);
+              }});
+            }}, {{ passive: true }});
+            // 表头排序改为对行数据排序后重绘窗口，键与 Tablesort 从单元格读出的值一致
+            lowProfitTable._sortRows = (index, method, order) => {{
+              const keys = lpAll.map(r => {{
+                if (method === 'number') return index === 1 ? r[2] : r[3];
+                return String(index === 0 ? r[0] : r[5]).trim().toLowerCase();
+              }});
+              const idxs = keys.map((_, i) => i);
+              idxs.sort((i, j) => {{
+                const a = keys[i], b = keys[j];
+                if (method === 'number') return a - b;
+                if (a === b) return 0;
+                return a > b ? 1 : -1;
+              }});
+              if (order === 'desc') idxs.reverse();
+              lpAll = idxs.map(i => lpAll[i]);
+              lpView = lpAll.filter(r => r[1] === lowProfitFilterValue);
+              renderLowProfitWindow(true);
+              return true;
+            }};
+          }}
+
+          // 两类行数由页面生成时写在表格属性上，初始化和切换过滤器都不再扫描行
+          const lpCounts = {{
+            normal: parseInt(lowProfitTable.dataset.lpNormal, 10) || 0,
+            proxy: parseInt(lowProfitTable.dataset.lpProxy, 10) || 0
+          }};
         
-        function applyLowProfitFilter() {{
-          const selectedValue = document.querySelector('input[name="lowProfitFilter"]:checked')?.value || 'normal';
-          const rows = lowProfitTable.querySelectorAll('tbody tr[data-type]');
-          let visibleCount = 0;
-          
-          rows.forEach(row => {{
-            const rowType = row.getAttribute('data-type');
-            if (selectedValue === 'normal' && rowType === 'normal') {{
-              row.style.display = '';
-              visibleCount++;
-            }} else if (selectedValue === 'proxy' && rowType === 'proxy') {{
-              row.style.display = '';
-              visibleCount++;
-            }} else {{
-              row.style.display = 'none';
+          function applyLowProfitFilter() {{
+            const selectedValue = lowProfitFilterValue;
+            // 显隐交给样式规则，一次属性写入代替逐行改 style.display
+            lowProfitTable.setAttribute('data-lpf', selectedValue);
+            if (lpVirtual) {{
+              // 窗口模式下 tbody 只放当前类型的行，切换类型后回到顶部重绘
+              lpView = lpAll.filter(r => r[1] === selectedValue);
+              lpScroller.scrollTop = 0;
+              lpWinStart = lpWinEnd = -1;
+              renderLowProfitWindow(true);
             }}
-          }});
+            const visibleCount = lpCounts[selectedValue] || 0;
           
-          if (countSpan) {{
-            countSpan.textContent = `(共${{visibleCount}}款)`;
+            if (countSpan) {{
+              countSpan.textContent = `(共${{visibleCount}}款)`;
+            }}
           }}
-        }}
         
-        filterRadios.forEach(radio => {{
-          radio.addEventListener('change', applyLowProfitFilter);
-        }});
+          filterRadios.forEach(radio => {{
+            // 初始选中项只在这里读一次，之后由 change 事件直接带出取值
+            if (radio.checked) lowProfitFilterValue = radio.value || 'normal';
+            radio.addEventListener('change', () => {{
+              if (!radio.checked) return;
+              lowProfitFilterValue = radio.value || 'normal';
+              applyLowProfitFilter();
+            }});
+          }});
         
-        // 初始应用过滤
-        applyLowProfitFilter();
-      }}
-    }} catch (e) {{ /* no-op */ }}
+          // 初始应用过滤
+          applyLowProfitFilter();
+        }}
+      }} catch (e) {{ /* no-op */ }}
+    }}
+    const lowProfitEl = document.getElementById('lowProfitTable');
+    hydrateWhenVisible(lowProfitEl && (lowProfitEl.closest('.card') || lowProfitEl), hydrateLowProfit);
 
     // ============ 角色切换功能 ============
     (function() {{
         const roleOperations = document.getElementById('roleOperations');
         const roleCustomerService = document.getElementById('roleCustomerService');
 
-        // 定义需要控制的元素
-        const operationsElements = {{
-            summary: document.querySelector('.summary'), // SKU分析卡片
-            searchContainer: document.querySelector('.operations-search-container') // 运营搜索框
-        }};
-        const customerServiceElements = {{
-            toolbar: document.querySelector('.toolbar'),
-            listTabs: document.querySelector('.list-tabs'),
-            filters: document.querySelector('.filters'),
-            table: document.querySelector('table')
-        }};
-
-        // 角色切换函数
+        // 角色切换函数：只写一次 body[data-role]，各区域显隐由样式规则决定
+        // 运营视角：显示SKU分析、搜索框和客户列表，隐藏工具栏和列表标签；客服视角反之（客户列表表格两种视角都保留）
         function switchRole(role) {{
-            if (role === 'operations') {{
-                // 运营视角：显示SKU分析、搜索框和客户列表，隐藏工具栏和列表标签
-                if (operationsElements.summary) operationsElements.summary.style.display = 'grid';
-                if (operationsElements.searchContainer) {{
-                    operationsElements.searchContainer.classList.add('active');
-                }}
-                if (customerServiceElements.toolbar) customerServiceElements.toolbar.style.display = 'none';
-                if (customerServiceElements.listTabs) customerServiceElements.listTabs.style.display = 'none';
-                if (customerServiceElements.filters) customerServiceElements.filters.style.display = 'none';
-                // 保留客户列表表格，用于显示搜索结果
-                if (customerServiceElements.table) customerServiceElements.table.style.display = 'table';
-            }} else {{
-                // 客服视角：隐藏SKU分析和运营搜索框，显示所有客服工具
-                if (operationsElements.summary) operationsElements.summary.style.display = 'none';
-                if (operationsElements.searchContainer) {{
-                    operationsElements.searchContainer.classList.remove('active');
-                }}
-                if (customerServiceElements.toolbar) customerServiceElements.toolbar.style.display = 'flex';
-                if (customerServiceElements.listTabs) customerServiceElements.listTabs.style.display = 'block';
-                if (customerServiceElements.filters) customerServiceElements.filters.style.display = 'flex';
-                if (customerServiceElements.table) customerServiceElements.table.style.display = 'table';
-            }}
+            document.body.dataset.role = role === 'operations' ? 'operations' : 'customer-service';
         }}
 
         // 监听角色切换事件
@@ -6159,29 +6727,20 @@ def write_html_dashboard(
         // ============ 运营搜索框功能 ============
         const operationsSearchBox = document.getElementById('operationsSearchBox');
         if (operationsSearchBox) {{
-            operationsSearchBox.addEventListener('input', function() {{
+            // 表格只取一次；行仍每次现查，以包含之后插入的全库命中临时行
+            const searchTable = document.querySelector('table');
+            operationsSearchBox.addEventListener('input', debounce(function() {{
                 const searchText = this.value.trim().toLowerCase();
-                const table = document.querySelector('table');
-                const rows = table ? Array.from(table.querySelectorAll('tbody tr')) : [];
-
-                // 使用与客服视角相同的全局搜索逻辑
-                rows.forEach(row => {{
-                    if (!searchText) {{
-                        // 如果搜索框为空，显示所有行
-                        row.style.display = '';
-                    }} else {{
-                        // 检查行的文本内容和订单号
-                        const rowText = row.textContent.toLowerCase();
-                        const idsAttr = (row.getAttribute('data-ids') || '').toLowerCase();
-
-                        if (rowText.includes(searchText) || idsAttr.includes(searchText)) {{
-                            row.style.display = '';
-                        }} else {{
-                            row.style.display = 'none';
-                        }}
-                    }}
+                const rows = searchTable ? Array.from(searchTable.querySelectorAll('tbody tr')) : [];
+
+                // 使用与客服视角相同的全局搜索逻辑：先统一判定每行是否命中（搜索框为空时全部显示），
+                // 再集中写 display，读写不交错，状态未变的行不写
+                const visible = rows.map(row => !searchText || rowSearchBlob(row).includes(searchText) || row._idsLower.includes(searchText));
+                rows.forEach((row, i) => {{
+                    const display = visible[i] ? '' : 'none';
+                    if (row.style.display !== display) row.style.display = display;
                 }});
-            }});
+            }}, DEBOUNCE_DELAY));
         }}
     }})();
     </script>
@@ -6191,35 +6750,50 @@ def write_html_dashboard(
     # 将原始 HTML 包装为基于「未命名.html」风格的 SaaS 布局
     # 若包装过程中出现异常，则回退使用原始布局
     try:
-        import re as _re  # 局部引入，避免与上方使用冲突
-
         legacy_html = html_template
-        body_match = _re.search(r"<body[^>]*>(.*)</body>", legacy_html, _re.DOTALL)
-        body_content = body_match.group(1) if body_match else ""
-        # 提取所有脚本内容，并从 body_content 中移除脚本，避免重复执行
-        scripts = _re.findall(r"<script[^>]*>(.*?)</script>", legacy_html, _re.DOTALL)
-        body_content = _re.sub(r"<script[^>]*>.*?</script>", "", body_content, flags=_re.DOTALL)
+        # body 范围：第一个 <body...> 之后到最后一个 </body> 之前（与原先贪婪匹配一致）
+        body_start = legacy_html.find("<body")
+        body_open_end = legacy_html.find(">", body_start) + 1 if body_start >= 0 else 0
+        body_end = legacy_html.rfind("</body>")
+        has_body = body_start >= 0 and body_open_end > 0 and body_end >= body_open_end
+        # 一次扫描提取所有脚本内容，同时拼出去掉脚本的 body_content，避免重复执行
+        scripts: List[str] = []
+        body_parts: List[str] = []
+        body_pos = body_open_end
+        for m in _SCRIPT_RE.finditer(legacy_html):
+            scripts.append(m.group(1))
+            if has_body and m.start() >= body_pos and m.end() <= body_end:
+                body_parts.append(legacy_html[body_pos:m.start()])
+                body_pos = m.end()
+        if has_body:
+            body_parts.append(legacy_html[body_pos:body_end])
+        body_content = "".join(body_parts)
 
         gen_date = today.isoformat()
 
         # 计算统计卡片数据
-        high_priority_count = sum(1 for row in action_rows if row.get('priority_score', 0) >= 80)
-        mid_priority_count = sum(1 for row in action_rows if 50 <= row.get('priority_score', 0) < 80)
+        # 高/中优先级人数已在生成表格行时统计
         total_customers = len(action_rows)
 
         # SKU预警数量（从overview_rows或global_details计算）
         # 这里使用一个估算值，实际数量在SKU卡片区域已有详细统计
         sku_alert_count = cooldown_total if cooldown_total > 0 else 0
 
-        new_html = f'''<!DOCTYPE html>
+        # 整页按片段收集后一次性拼接，避免对数 MB 的字符串反复 += 复制
+        new_html_parts: List[str] = [f'''<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>客户触达仪表盘 - {gen_date}</title>
     <script src="https://cdn.tailwindcss.com"></script>
+    <!-- 字体文件在 Google Fonts 样式表解析后才被发现，提前建立连接 -->
+    <link rel="preconnect" href="https://fonts.googleapis.com">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
     <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@400;500;600;700&family=IBM+Plex+Sans:wght@300;400;500;600&family=IBM+Plex+Mono:wght@400;500&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    <!-- 图标样式不阻塞首屏渲染：先按 print 加载，完成后切回 all -->
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" media="print" onload="this.media='all'">
+    <noscript><link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css"></noscript>
 
     <script>
         tailwind.config = {{
@@ -6292,6 +6866,36 @@ def write_html_dashboard(
         .summary .card-wide {{
             grid-column: 1 / -1;
         }}
+        /* 摘要卡片在视口外时跳过布局与绘制（与原布局一致，落在卡片这一层） */
+        .summary > .card {{
+            content-visibility: auto;
+            contain-intrinsic-size: auto 360px;
+        }}
+        /* 角色视图由 body[data-role] 一次切换（与原布局一致） */
+        body[data-role="operations"] .summary {{
+            display: grid;
+        }}
+        body[data-role="operations"] .toolbar,
+        body[data-role="operations"] .list-tabs,
+        body[data-role="operations"] .filters,
+        body[data-role="customer-service"] .summary {{
+            display: none;
+        }}
+        body[data-role="customer-service"] .toolbar,
+        body[data-role="customer-service"] .filters {{
+            display: flex;
+        }}
+        body[data-role="customer-service"] .list-tabs {{
+            display: block;
+        }}
+        body[data-role="operations"] .operations-search-container {{
+            display: block;
+        }}
+        /* 低毛利表按表格上的 data-lpf 过滤（与原布局一致） */
+        #lowProfitTable[data-lpf="normal"] tbody tr[data-type="proxy"],
+        #lowProfitTable[data-lpf="proxy"] tbody tr[data-type="normal"] {{
+            display: none;
+        }}
 
         @media (max-width: 1200px) {{
             .summary {{
@@ -6693,32 +7297,32 @@ def write_html_dashboard(
         </div>
 
         <!-- 菜单 -->
-        <nav class="flex-1 py-6 px-3 space-y-1 overflow-y-auto">
+        <nav id="sidebarNav" class="flex-1 py-6 px-3 space-y-1 overflow-y-auto">
             <div class="px-3 mb-2 text-xs font-semibold text-slate-400 uppercase tracking-wider">总览</div>
-            <a href="#" onclick="document.getElementById('roleCustomerService')?.click(); setTimeout(() => window.scrollTo({{top: 0, behavior: 'smooth'}}), 100); return false;" class="nav-item active flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="dashboard" class="nav-item active flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-chart-pie w-5 text-center"></i> 触达仪表盘
             </a>
-            <a href="#" onclick="document.getElementById('roleCustomerService')?.click(); setTimeout(() => document.querySelector('.list-tab[data-list=\\'冷却期\\']')?.click(), 100); return false;" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="cooldown" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-clock w-5 text-center"></i> 冷却期客户
                 <span id="sidebarCooldownBadge" class="ml-auto bg-blue-100 text-blue-600 py-0.5 px-2 rounded-full text-xs font-bold">0</span>
             </a>
 
             <div class="px-3 mt-6 mb-2 text-xs font-semibold text-slate-400 uppercase tracking-wider">SKU分析</div>
-            <a href="#" onclick="document.getElementById('roleOperations')?.click(); setTimeout(() => document.getElementById('skuSummary')?.scrollIntoView({{behavior: 'smooth'}}), 100); return false;" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="skuPush" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-fire w-5 text-center"></i> 加推SKU
             </a>
-            <a href="#" onclick="document.getElementById('roleOperations')?.click(); setTimeout(() => document.getElementById('skuReturnAlertTable')?.scrollIntoView({{behavior: 'smooth'}}), 100); return false;" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="highReturn" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-triangle-exclamation w-5 text-center"></i> 高退货预警
             </a>
-            <a href="#" onclick="document.getElementById('roleOperations')?.click(); setTimeout(() => document.getElementById('lowProfitTable')?.scrollIntoView({{behavior: 'smooth'}}), 100); return false;" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="lowProfit" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-circle-exclamation w-5 text-center"></i> 低毛利预警
             </a>
 
             <div class="px-3 mt-6 mb-2 text-xs font-semibold text-slate-400 uppercase tracking-wider">操作</div>
-            <a href="#" onclick="document.getElementById('exportCsv')?.click(); return false;" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="exportCsv" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-download w-5 text-center"></i> 导出记录
             </a>
-            <a href="#" onclick="document.getElementById('clearMarks')?.click(); return false;" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
+            <a href="#" data-nav="clearMarks" class="nav-item flex items-center gap-3 px-3 py-2.5 rounded-lg text-sm font-medium text-slate-600 hover:bg-slate-50 hover:text-slate-900 transition-colors">
                 <i class="fa-solid fa-eraser w-5 text-center"></i> 清除标记
             </a>
         </nav>
@@ -6751,11 +7355,11 @@ def write_html_dashboard(
 
             <div class="flex items-center gap-4">
                 <!-- 角色切换 -->
-                <div class="bg-slate-100 p-1 rounded-lg flex items-center">
-                    <button id="topRoleService" onclick="switchTopRole('customer-service')" class="px-3 py-1.5 rounded-md text-xs font-semibold transition-all shadow-sm bg-white text-brand-600">
+                <div id="topRoleSwitch" class="bg-slate-100 p-1 rounded-lg flex items-center">
+                    <button id="topRoleService" data-role="customer-service" class="px-3 py-1.5 rounded-md text-xs font-semibold transition-all shadow-sm bg-white text-brand-600">
                         <i class="fa-solid fa-headset mr-1.5"></i>客服
                     </button>
-                    <button id="topRoleOps" onclick="switchTopRole('operations')" class="px-3 py-1.5 rounded-md text-xs font-semibold transition-all text-slate-500 hover:text-slate-700">
+                    <button id="topRoleOps" data-role="operations" class="px-3 py-1.5 rounded-md text-xs font-semibold transition-all text-slate-500 hover:text-slate-700">
                         <i class="fa-solid fa-user-gear mr-1.5"></i>运营
                     </button>
                 </div>
@@ -6853,13 +7457,13 @@ def write_html_dashboard(
     </div>
 
     <!-- 原有脚本 -->
-'''
+''']
         for script in scripts:
             script_body = script.strip()
             if script_body:
-                new_html += f"    <script>\n{script_body}\n    </script>\n"
+                new_html_parts.append(f"    <script>\n{script_body}\n    </script>\n")
 
-        new_html += """
+        new_html_parts.append("""
     <!-- 布局适配脚本 -->
     <script>
         var __ac;
@@ -6886,31 +7490,38 @@ def write_html_dashboard(
             } catch (e) {}
         }
         document.addEventListener('pointerdown', function(){ try { if (__ac && __ac.state === 'suspended') __ac.resume(); } catch(e){} }, { once: true });
-        // 同步顶部角色切换到原有的 radio 按钮
+        // 同步顶部角色切换到原有的 radio 按钮；按钮、radio 只在加载时取一次
+        const topRoleBtnService = document.getElementById('topRoleService');
+        const topRoleBtnOps = document.getElementById('topRoleOps');
+        const topRoleRadioService = document.getElementById('roleCustomerService');
+        const topRoleRadioOps = document.getElementById('roleOperations');
+        // 选中/未选中只增删这两组状态类，布局类保持不动，不再整串重写 className
+        const TOP_ROLE_ACTIVE_CLASSES = ['bg-white', 'text-brand-600', 'shadow-sm'];
+        const TOP_ROLE_INACTIVE_CLASSES = ['text-slate-500', 'hover:text-slate-700', 'bg-transparent', 'shadow-none'];
+        function setTopRoleButton(btn, active) {
+            if (!btn) return;
+            btn.classList.remove(...(active ? TOP_ROLE_INACTIVE_CLASSES : TOP_ROLE_ACTIVE_CLASSES));
+            btn.classList.add(...(active ? TOP_ROLE_ACTIVE_CLASSES : TOP_ROLE_INACTIVE_CLASSES));
+        }
         function switchTopRole(role) {
-            const btnService = document.getElementById('topRoleService');
-            const btnOps = document.getElementById('topRoleOps');
-
-            const activeClass = "bg-white text-brand-600 shadow-sm";
-            const inactiveClass = "text-slate-500 hover:text-slate-700 bg-transparent shadow-none";
-
-            if (role === 'customer-service') {
-                btnService.className = `px-3 py-1.5 rounded-md text-xs font-semibold transition-all ${activeClass}`;
-                btnOps.className = `px-3 py-1.5 rounded-md text-xs font-semibold transition-all ${inactiveClass}`;
-                const radio = document.getElementById('roleCustomerService');
-                if (radio) radio.click();
-                document.body.classList.add('role-service');
-                document.body.classList.remove('role-ops');
-            } else {
-                btnService.className = `px-3 py-1.5 rounded-md text-xs font-semibold transition-all ${inactiveClass}`;
-                btnOps.className = `px-3 py-1.5 rounded-md text-xs font-semibold transition-all ${activeClass}`;
-                const radio = document.getElementById('roleOperations');
-                if (radio) radio.click();
-                document.body.classList.remove('role-service');
-                document.body.classList.add('role-ops');
-            }
+            const isService = role === 'customer-service';
+            setTopRoleButton(topRoleBtnService, isService);
+            setTopRoleButton(topRoleBtnOps, !isService);
+
+            const radio = isService ? topRoleRadioService : topRoleRadioOps;
+            if (radio) radio.click();
+            document.body.classList.toggle('role-service', isService);
+            document.body.classList.toggle('role-ops', !isService);
             playSound('click');
         }
+        // 两个角色按钮在容器上委托一次，角色取自按钮的 data-role
+        const topRoleSwitch = document.getElementById('topRoleSwitch');
+        if (topRoleSwitch) {
+            topRoleSwitch.addEventListener('click', function(e) {
+                const btn = e.target.closest('button[data-role]');
+                if (btn && topRoleSwitch.contains(btn)) switchTopRole(btn.dataset.role);
+            });
+        }
 
         // 更新侧边栏的冷却期徽章
         document.addEventListener('DOMContentLoaded', function() {
@@ -6922,25 +7533,56 @@ def write_html_dashboard(
             // 默认进入客服视角：body 已带 role-service 类；无需 JS 再切换
         });
 
-        // 侧边栏导航高亮切换
-        document.querySelectorAll('.nav-item').forEach(item => {
-            item.addEventListener('click', function(e) {
-                // 移除所有导航项的 active 类
-                document.querySelectorAll('.nav-item').forEach(nav => {
-                    nav.classList.remove('active');
-                });
-                // 给当前点击项添加 active 类
-                this.classList.add('active');
+        // 侧边栏导航：目标元素只取一次，跳转与高亮都委托在 nav 上处理
+        const navRefs = {
+            roleCS: topRoleRadioService,
+            roleOps: topRoleRadioOps,
+            cooldownTab: document.querySelector('.list-tab[data-list="冷却期"]'),
+            skuSummary: document.getElementById('skuSummary'),
+            returnTable: document.getElementById('skuReturnAlertTable'),
+            lowProfitEl: document.getElementById('lowProfitTable'),
+            exportCsv: document.getElementById('exportCsv'),
+            clearMarks: document.getElementById('clearMarks')
+        };
+        // 角色切换是同步的（radio change 里写 body[data-role]），下一帧样式已生效，
+        // 用 requestAnimationFrame 代替固定 100ms 延时；scrollIntoView 自身会触发布局
+        // 运营视角下的三个区块共用：切到运营视角后滚动到目标
+        function showOpsSection(el) {
+            navRefs.roleOps?.click();
+            requestAnimationFrame(() => el?.scrollIntoView({behavior: 'smooth'}));
+        }
+        const navActions = {
+            dashboard: () => { navRefs.roleCS?.click(); requestAnimationFrame(() => window.scrollTo({top: 0, behavior: 'smooth'})); },
+            cooldown: () => { navRefs.roleCS?.click(); requestAnimationFrame(() => navRefs.cooldownTab?.click()); },
+            skuPush: () => showOpsSection(navRefs.skuSummary),
+            highReturn: () => showOpsSection(navRefs.returnTable),
+            lowProfit: () => showOpsSection(navRefs.lowProfitEl),
+            exportCsv: () => { navRefs.exportCsv?.click(); },
+            clearMarks: () => { navRefs.clearMarks?.click(); }
+        };
+        const sidebarNav = document.getElementById('sidebarNav');
+        let activeNavItem = sidebarNav ? sidebarNav.querySelector('.nav-item.active') : null;
+        if (sidebarNav) {
+            sidebarNav.addEventListener('click', function(e) {
+                const item = e.target.closest('.nav-item');
+                if (!item || !sidebarNav.contains(item)) return;
+                e.preventDefault();
+                const action = navActions[item.dataset.nav];
+                if (action) action();
+                // 只摘掉上一个高亮项，不再遍历全部导航项
+                if (activeNavItem && activeNavItem !== item) activeNavItem.classList.remove('active');
+                item.classList.add('active');
+                activeNavItem = item;
                 playSound('click');
             });
-        });
+        }
 
         console.log('✅ SaaS 布局已加载');
     </script>
 </body>
 </html>
-"""
-        html_template = new_html
+""")
+        html_template = "".join(new_html_parts)
     except Exception as e:
         # 包装失败时使用原始布局，并打印错误信息供调试
         print(f"警告：SaaS布局包装失败，使用原始布局。错误: {e}")
@@ -6948,7 +7590,8 @@ def write_html_dashboard(
         traceback.print_exc()
         pass
 
-    output_path.write_text(html_template, encoding="utf-8")
+    # 整页先编码成一个字节缓冲再写出，不经过文本 IO 层
+    output_path.write_bytes(html_template.encode("utf-8"))
 
 def main():
     args = parse_arguments()
@@ -6984,6 +7627,8 @@ def main():
     contact_log_path = Path(args.contact_log) if args.contact_log else None
     contact_log: Dict[str, date] = {}
     contact_log_active = False
+    # 冷却期内的手机号：联系记录加载后算一次，日志计数与 HTML"已联系"名单共用
+    cooldown_keys: List[str] = []
     # 优先：从飞书读取联系记录（若环境变量提供）
     feishu_app_token = os.getenv('FEISHU_CONTACT_APP_TOKEN') or os.getenv('FEISHU_APP_TOKEN')
     feishu_table_id = os.getenv('FEISHU_CONTACT_TABLE_ID') or os.getenv('FEISHU_TABLE_ID')
@@ -6991,24 +7636,24 @@ def main():
     feishu_view_id = os.getenv('FEISHU_CONTACT_VIEW_ID')
     if feishu_app_token and feishu_table_id and feishu_token:
         try:
-            contact_log = fetch_feishu_contact_log(
-                feishu_app_token, feishu_table_id, today,
-                token=feishu_token, view_id=feishu_view_id
-            )
+            cache_source = f"{feishu_app_token}/{feishu_table_id}/{feishu_view_id or ''}/{os.getenv('FEISHU_CONTACT_FETCH_MODE') or 'both'}"
+            cached = None if args.no_contact_cache else load_feishu_contact_cache(FEISHU_CONTACT_CACHE_PATH, today, cache_source)
+            if cached is not None:
+                contact_log = cached
+                if args.verbose:
+                    print("ℹ️  使用本地缓存的飞书联系记录（--no-contact-cache 可强制刷新）。")
+            else:
+                contact_log = fetch_feishu_contact_log(
+                    feishu_app_token, feishu_table_id, today,
+                    token=feishu_token, view_id=feishu_view_id
+                )
+                if contact_log and not args.no_contact_cache:
+                    save_feishu_contact_cache(FEISHU_CONTACT_CACHE_PATH, today, cache_source, contact_log)
             if contact_log:
                 contact_log_active = True
-                try:
-                    _total = len(contact_log or {})
-                    _recent = 0
-                    for _ph, _dt in (contact_log or {}).items():
-                        try:
-                            if (today - _dt).days >= 0 and (today - _dt).days < max(0, cooldown_days):
-                                _recent += 1
-                        except Exception:
-                            pass
-                    print(f"ℹ️  飞书联系记录加载完成：总计 {_total} 条；近{max(0, cooldown_days)}天 {_recent} 条")
-                except Exception:
-                    pass
+                cooldown_keys = recent_contact_keys(contact_log, today, cooldown_days)
+                if args.verbose:
+                    print(f"ℹ️  飞书联系记录加载完成：总计 {len(contact_log)} 条；近{max(0, cooldown_days)}天 {len(cooldown_keys)} 条")
             else:
                 print("ℹ️  飞书联系记录为空，改用本地联系记录。")
                 contact_log_active = False
@@ -7024,18 +7669,9 @@ def main():
                 contact_log = load_contact_log(contact_log_path, today)
                 contact_info_map = {}
             contact_log_active = True
-            try:
-                _total = len(contact_log or {})
-                _recent = 0
-                for _ph, _dt in (contact_log or {}).items():
-                    try:
-                        if (today - _dt).days >= 0 and (today - _dt).days < max(0, cooldown_days):
-                            _recent += 1
-                    except Exception:
-                        pass
-                print(f"ℹ️  本地联系记录加载完成：总计 {_total} 条；近{max(0, cooldown_days)}天 {_recent} 条")
-            except Exception:
-                pass
+            cooldown_keys = recent_contact_keys(contact_log, today, cooldown_days)
+            if args.verbose:
+                print(f"ℹ️  本地联系记录加载完成：总计 {len(contact_log or {})} 条；近{max(0, cooldown_days)}天 {len(cooldown_keys)} 条")
         elif args.contact_log and args.contact_log != "contact_log.xlsx":
             print(f"⚠️  联系记录表未找到：{contact_log_path}")
 
@@ -7086,59 +7722,39 @@ def main():
     )
     # Build global details map for all customers，用于 HTML 全库单号检索
     global_details: Dict[str, List[Dict[str, Any]]] = {}
+    # 货品名搜索索引在同一轮遍历中累积：规范化货品名 -> 手机号集合
+    product_index: Dict[str, set] = defaultdict(set)
     for key, stats in customers.items():
         details: List[Dict[str, Any]] = []
+        key_str = str(key)
+        fallback_phone = getattr(stats, "phone", "") or key
         for d in getattr(stats, "order_details", []) or []:
             try:
-                # 字段映射：支持新旧字段名
-                # 标准化日期为 ISO 格式，提升前端解析兼容性
+                # 字段映射：支持新旧字段名（见 _DETAIL_FIELDS）
+                row = {
+                    out: conv(d.get(k1, "") if k2 is None else (d.get(k1) or d.get(k2, "")))
+                    for out, k1, k2, conv in _DETAIL_FIELDS
+                }
+                if not d.get("手机号"):
+                    row["手机号"] = str(fallback_phone)
+                # 标准化日期为 ISO 格式，提升前端解析兼容性；解析失败时保留映射出的原值
                 try:
                     _raw_dt = d.get("顾客付款日期") or d.get("下单时间", "")
                     _od = common_parse_excel_date(_raw_dt, today)
-                    _od_str = _od.strftime("%Y-%m-%d") if isinstance(_od, date) else (str(_raw_dt) if _raw_dt is not None else "")
+                    row["下单时间"] = _od.strftime("%Y-%m-%d") if isinstance(_od, date) else (str(_raw_dt) if _raw_dt is not None else "")
                 except Exception:
-                    _od_str = str(d.get("下单时间", "") or d.get("顾客付款日期", ""))
-                details.append(
-                    {
-                        "姓名": str(d.get("姓名", "")),
-                        "手机号": str(d.get("手机号", "") or getattr(stats, "phone", "") or key),
-                        "下单时间": _od_str,
-                        "下单平台": str(d.get("出售平台") or d.get("下单平台", "")),
-                        "厂家": str(d.get("厂家", "")),
-                        "货品名": str(d.get("货品名", "")),
-                        "商品名称": str(d.get("商品名称", "")),
-                        "颜色": str(d.get("颜色", "")),
-                        "尺码": str(d.get("尺码", "")),
-                        "付款金额": float(d.get("收款额") or d.get("付款金额", 0.0)) if isinstance(d.get("收款额") or d.get("付款金额"), (int, float)) else common_to_float(d.get("收款额") or d.get("付款金额")),
-                        "打款金额": float(d.get("打款金额", 0.0)) if isinstance(d.get("打款金额", 0.0), (int, float)) else common_to_float(d.get("打款金额")),
-                        "负责人": str(d.get("负责人", "") or d.get("跟进人", "")),
-                        "订单号": str(d.get("单号") or d.get("订单号", "")),
-                        "退货单号": str(d.get("退货单号", "")),
-                        "退款类型": str(d.get("退款类型") or d.get("状态", "")),
-                        "退款原因": str(d.get("退款原因", "")),
-                        "备注": str(d.get("备注", "")),
-                        "数据来源": str(d.get("数据来源", "")),
-                    }
-                )
+                    pass
+                details.append(row)
+                normalized = normalize_product_name(row["货品名"])
+                if normalized:
+                    product_index[normalized].add(key_str)
             except Exception:
                 # best-effort; skip corrupt detail rows
                 continue
-        global_details[str(key)] = details
+        global_details[key_str] = details
 
-    # 构建货品名搜索索引
-    product_search_index = build_product_search_index(global_details)
+    product_search_index = finish_product_search_index(product_index, args.verbose)
 
-    # 计算冷却期手机号集合（用于 HTML 显示"已联系"名单）
-    cooldown_keys: List[str] = []
-    if contact_log_active and cooldown_days > 0:
-        for ph, last_dt in (contact_log or {}).items():
-            try:
-                delta = (today - last_dt).days
-            except Exception:
-                continue
-            if delta >= 0 and delta < cooldown_days:
-                cooldown_keys.append(str(ph))
-    
     # global_meta 已经在 build_alert_rows 中生成
     global_meta = meta_map
 
@@ -17,35 +17,101 @@ Usage:
 from __future__ import annotations
 
 import json
+import math
 import os
 from datetime import date
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+try:
+    import minijinja
+except Exception:
+    minijinja = None
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _finite(obj: Any) -> Any:
+    """Replace NaN/inf floats with None, matching what orjson emits (null)."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    return obj
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to compact JSON for embedding in the page, using orjson when available.
+
+    Both paths emit null for NaN/inf. The stdlib path only walks the payload
+    when a non-finite float is actually present.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(obj), ensure_ascii=False, separators=(',', ':'), allow_nan=False)
 
 
 class DashboardRenderer:
     """HTML Dashboard Renderer using Jinja2 templates."""
 
-    def __init__(self, template_dir: Optional[Path | str] = None):
+    def __init__(self, template_dir: Optional[Path | str] = None, use_minijinja: bool = True):
         """Initialize the renderer with template directory.
 
         Args:
             template_dir: Path to templates directory. If None, uses tech/templates/
+            use_minijinja: Render with MiniJinja when it is installed; False forces Jinja2
         """
         if template_dir is None:
             template_dir = Path(__file__).parent / 'templates'
 
         self.template_dir = Path(template_dir)
 
+        # Prefer the native MiniJinja engine when installed; Jinja2 is only set up as fallback
+        self._mj_env = None
+        self.env = None
+        self._template = None
+        if use_minijinja and minijinja is not None:
+            self._mj_env = minijinja.Environment(
+                loader=minijinja.load_from_path(str(self.template_dir)),
+                auto_escape_callback=lambda name: name.endswith(('.html', '.htm', '.xml')),
+                trim_blocks=True,
+                lstrip_blocks=True,
+            )
+        else:
+            self._init_jinja()
+
+    def _init_jinja(self) -> None:
+        """Set up the Jinja2 environment and compile the dashboard template once."""
+        # Persist compiled template bytecode across CLI runs (invalidated on template mtime change).
+        # The default directory is per-user (0700) and its ownership is checked before use.
+        bytecode_cache = None
+        try:
+            bytecode_cache = FileSystemBytecodeCache()
+        except (OSError, RuntimeError):
+            pass
+
         # Initialize Jinja2 environment
         self.env = Environment(
             loader=FileSystemLoader(str(self.template_dir)),
             autoescape=select_autoescape(['html', 'xml']),
             trim_blocks=True,
             lstrip_blocks=True,
+            auto_reload=False,
+            cache_size=-1,
+            bytecode_cache=bytecode_cache,
         )
+        # Load and compile the template once; renders reuse it
+        self._template = self.env.get_template('dashboard.html')
 
     def render_dashboard(
         self,
@@ -72,7 +138,8 @@ class DashboardRenderer:
         contact_write_enabled: bool = False,
         owner_suggestions: List[str] = None,
         env_default_owner: str = '',
-    ) -> str:
+        output_path: Optional[Path | str] = None,
+    ) -> Optional[str]:
         """Render the complete dashboard HTML.
 
         Args:
@@ -99,24 +166,30 @@ class DashboardRenderer:
             contact_write_enabled: Whether contact write is enabled
             owner_suggestions: List of owner name suggestions
             env_default_owner: Default owner from environment
+            output_path: If given, stream the rendered HTML straight into this file
 
         Returns:
-            Complete HTML string
+            Complete HTML string, or None when written to output_path
         """
-        # Calculate statistics
-        high_priority_count = sum(1 for row in action_rows if row.get('priority_score', 0) >= 80)
-        mid_priority_count = sum(1 for row in action_rows if 50 <= row.get('priority_score', 0) < 80)
+        # Calculate statistics (single pass over action_rows)
+        high_priority_count = mid_priority_count = 0
+        for row in action_rows:
+            score = row.get('priority_score', 0)
+            if score >= 80:
+                high_priority_count += 1
+            elif score >= 50:
+                mid_priority_count += 1
         total_customers = len(action_rows)
 
         # Serialize data to JSON for JavaScript
-        tags_json = json.dumps(tags or [], ensure_ascii=False)
-        platforms_json = json.dumps(platforms or [], ensure_ascii=False)
-        detail_map_json = json.dumps(detail_map or {}, ensure_ascii=False, separators=(',', ':'))
-        global_details_json = json.dumps(global_details or {}, ensure_ascii=False, separators=(',', ':'))
-        global_meta_json = json.dumps(global_meta or {}, ensure_ascii=False, separators=(',', ':'))
-        id_index_json = json.dumps(id_index or {}, ensure_ascii=False, separators=(',', ':'))
-        name_index_json = json.dumps(name_index or {}, ensure_ascii=False, separators=(',', ':'))
-        cooldown_keys_json = json.dumps(cooldown_keys or [], ensure_ascii=False)
+        tags_json = _dumps(tags or [])
+        platforms_json = _dumps(platforms or [])
+        detail_map_json = _dumps(detail_map or {})
+        global_details_json = _dumps(global_details or {})
+        global_meta_json = _dumps(global_meta or {})
+        id_index_json = _dumps(id_index or {})
+        name_index_json = _dumps(name_index or {})
+        cooldown_keys_json = _dumps(cooldown_keys or [])
 
         # Convert cooldown_customers dates to ISO strings
         cooldown_customers_serializable = {}
@@ -126,15 +199,12 @@ class DashboardRenderer:
                     cooldown_customers_serializable[key] = dt.isoformat()
                 else:
                     cooldown_customers_serializable[key] = str(dt)
-        cooldown_customers_json = json.dumps(cooldown_customers_serializable, ensure_ascii=False)
+        cooldown_customers_json = _dumps(cooldown_customers_serializable)
 
-        owner_suggestions_json = json.dumps(owner_suggestions or [], ensure_ascii=False)
-        env_default_owner_json = json.dumps(env_default_owner, ensure_ascii=False)
-
-        # Render template
-        template = self.env.get_template('dashboard.html')
+        owner_suggestions_json = _dumps(owner_suggestions or [])
+        env_default_owner_json = _dumps(env_default_owner)
 
-        html = template.render(
+        context = dict(
             today=today.isoformat(),
             high_priority_count=high_priority_count,
             mid_priority_count=mid_priority_count,
@@ -164,20 +234,38 @@ class DashboardRenderer:
             contact_write_enabled=contact_write_enabled,
         )
 
-        return html
+        # Render template
+        if self._mj_env is not None:
+            html = self._mj_env.render_template('dashboard.html', **context)
+            if output_path is None:
+                return html
+            Path(output_path).write_bytes(html.encode('utf-8'))
+            return None
+        if output_path is None:
+            return self._template.render(**context)
+        # Write chunks as they are rendered instead of building the whole page in memory first
+        stream = self._template.stream(**context)
+        stream.enable_buffering(size=64)
+        stream.dump(str(output_path), encoding='utf-8')
+        return None
+
+
+_default_renderer: Optional[DashboardRenderer] = None
 
 
 # Convenience function
-def render_dashboard(**kwargs) -> str:
+def render_dashboard(**kwargs) -> Optional[str]:
     """Render dashboard HTML using default template directory.
 
     See DashboardRenderer.render_dashboard() for parameter documentation.
 
     Returns:
-        Complete HTML string
+        Complete HTML string, or None when output_path is given
     """
-    renderer = DashboardRenderer()
-    return renderer.render_dashboard(**kwargs)
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = DashboardRenderer()
+    return _default_renderer.render_dashboard(**kwargs)
 
 
 if __name__ == '__main__':
@@ -187,22 +275,36 @@ if __name__ == '__main__':
     print("Testing HTML template rendering...")
 
     try:
-        html = render_dashboard(
+        sample = dict(
             today=date.today(),
-            action_rows=[],
+            action_rows=[{'priority_score': 90}, {'priority_score': 60}],
             filters_html='<div class="filters">Test Filters</div>',
             header_cells='<th>Test Header</th>',
-            table_rows='<tr><td>Test Row</td></tr>',
+            table_rows='<tr><td>Test Row &amp; more</td></tr>',
             sku_push_html='<div>SKU Push</div>',
             sku_return_html='<div>SKU Return</div>',
             low_margin_html='<div>Low Margin</div>',
+            tags=['高价值', '<tag>'],
+            global_details={'k': [{'note': '</script>"'}]},
+            cooldown_customers={'k': date.today()},
+            contact_write_enabled=True,
+            env_default_owner='owner "x"',
         )
+        html = render_dashboard(**sample)
 
         print(f"✅ Template rendered successfully ({len(html)} characters)")
         print(f"   Contains <html>: {'<html' in html}")
         print(f"   Contains <body>: {'<body' in html}")
         print(f"   Contains dashboard: {'仪表盘' in html}")
 
+        if minijinja is not None:
+            jinja_html = DashboardRenderer(use_minijinja=False).render_dashboard(**sample)
+            if jinja_html == html:
+                print("✅ MiniJinja output matches Jinja2")
+            else:
+                print("❌ MiniJinja output differs from Jinja2")
+                raise SystemExit(1)
+
     except Exception as e:
         print(f"❌ Template rendering failed: {e}")
         import traceback
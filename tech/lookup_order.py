@@ -6,6 +6,7 @@
 用法示例：
   python3 lookup_order.py --query  SF123456789012
   python3 lookup_order.py --query  123456789012 --export 订单查询结果.xlsx
+  python3 lookup_order.py --query  SF123456789012 YT9876543210
 
 默认数据源：tech/账单汇总_截至10月前.xlsx 的 "汇总(截至10月前)" 工作表。
 可通过 --source / --sheet 指定其他表。
@@ -15,9 +16,11 @@
 from __future__ import annotations
 
 import argparse
+import re
 import sys
+from datetime import date, datetime, time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from openpyxl import load_workbook, Workbook
 try:
@@ -27,6 +30,16 @@ except Exception:
     sys.path.append(os.path.dirname(__file__))
     from common import resolve_sheet, normalize, digits_only
 
+try:
+    from python_calamine import CalamineWorkbook
+except Exception:
+    CalamineWorkbook = None
+
+try:
+    import xlsxwriter
+except Exception:
+    xlsxwriter = None
+
 
 DEFAULT_SOURCE = Path(__file__).resolve().parent / '账单汇总_截至10月前.xlsx'
 DEFAULT_SHEET = '汇总(截至10月前)'
@@ -47,7 +60,7 @@ EXTRA_OUTPUT_COLS = [
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description='按 订单号/退货单号 检索汇总账单')
-    p.add_argument('--query', '-q', required=True, help='要查询的单号（支持模糊匹配）')
+    p.add_argument('--query', '-q', required=True, nargs='+', help='要查询的单号，可一次给多个（支持模糊匹配，命中任一即可）')
     p.add_argument('--source', default=str(DEFAULT_SOURCE), help='数据源 Excel 路径')
     p.add_argument('--sheet', default=DEFAULT_SHEET, help='工作表名')
     p.add_argument('--export', default=None, help='可选：导出命中的结果到此 Excel 文件')
@@ -57,56 +70,130 @@ def parse_args() -> argparse.Namespace:
  
 
 
-def scan(path: Path, sheet: str, query: str) -> Tuple[List[str], List[List]]:
+# 拼接一行内各目标列时使用的分隔符（单元格文本中不会出现）
+CELL_SEP = '\x1f'
+
+
+def build_query_pattern(queries: Sequence[str]) -> Optional[re.Pattern]:
+    """把每个查询的「原文（忽略大小写）包含」与「纯数字形式包含」合成一条交替正则，对小写后的整行文本一次匹配。
+
+    纯数字形式写成 d1[^\\d\\x1f]*d2...：在原文上匹配它，等价于查询的数字串出现在某个单元格的
+    digits_only 结果里（不跨越列分隔符）。
+    """
+    parts: List[str] = []
+    for query in queries:
+        q_raw = query.strip()
+        q_digits = digits_only(q_raw)
+        # 纯数字查询只需数字分支（它已覆盖原文连续出现的情况）；不含数字的查询只需原文分支
+        if q_raw and q_raw != q_digits:
+            parts.append(re.escape(q_raw.lower()))
+        if q_digits:
+            parts.append(f'[^\\d{CELL_SEP}]*'.join(q_digits))
+    parts = list(dict.fromkeys(parts))
+    if not parts:
+        return None
+    return re.compile('|'.join(parts))
+
+
+def _openpyxl_value(value):
+    """把 calamine 单元格值还原成 openpyxl 的取值：空格为 None、整数不带 .0、日期为 datetime。"""
+    if value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, time())
+    return value
+
+
+def _same_value(value):
+    return value
+
+
+def open_rows(path: Path, sheet: Optional[str]) -> Tuple[Iterable, Callable[[Any], Any], Callable[[], None]]:
+    """返回 (按行迭代的值序列, 单元格取值转换函数, 关闭函数)。
+
+    装了 python-calamine 时用它（Rust 解析）逐行迭代；其单元格值需经转换函数还原成 openpyxl 的形式，
+    保证预览、导出与数字匹配的结果不随读取方式变化，由调用方只对用到的单元格转换。
+    否则退回 openpyxl 只读模式逐行读取，转换函数原样返回。
+    """
+    if CalamineWorkbook is not None:
+        cwb = CalamineWorkbook.from_path(str(path))
+        if sheet:
+            if sheet not in cwb.sheet_names:
+                raise ValueError(f"Sheet '{sheet}' not found in {path}.")
+            sh = cwb.get_sheet_by_name(sheet)
+        else:
+            sh = cwb.get_sheet_by_index(0)
+        # iter_rows 从第 1 行起迭代，但每行从首个非空列开始；左侧补空格使列下标与 openpyxl 一致
+        first_col = sh.start[1] if sh.start else 0
+        rows = sh.iter_rows()
+        if first_col:
+            pad = [''] * first_col
+            rows = (pad + r for r in rows)
+        return rows, _openpyxl_value, lambda: None
     wb, ws = resolve_sheet(path, sheet)
+    return ws.iter_rows(values_only=True), _same_value, wb.close
+
+
+def scan(path: Path, sheet: str, query: Union[str, Sequence[str]]) -> Tuple[List[str], List[List]]:
+    rows, convert, close = open_rows(path, sheet)
     try:
-        iterator = ws.iter_rows(values_only=True)
+        iterator = iter(rows)
         try:
             first_row = next(iterator)
         except StopIteration:
             return [], []
-        header = [normalize(x) if x is not None else '' for x in first_row]
+        header = [normalize(x) if x is not None else '' for x in map(convert, first_row)]
         name_to_idx: Dict[str, int] = {h: i for i, h in enumerate(header) if h}
         target_indices: List[int] = [name_to_idx[c] for c in TARGET_COLS if c in name_to_idx]
         if not target_indices:
             return header, []
-        q_raw = query.strip()
-        q_low = q_raw.lower()
-        q_digits = digits_only(q_raw)
+        pattern = build_query_pattern([query] if isinstance(query, str) else query)
+        if pattern is None:
+            return TARGET_COLS + EXTRA_OUTPUT_COLS, []
+        # 逐行流式匹配（不把整张表读进内存）：各目标列按分隔符拼成一行文本后整体小写，
+        # 一条正则一次判断所有查询的原文包含与纯数字包含，代替逐格调用 normalize / digits_only。
+        # 取值转换只作用于目标列和命中行的输出列，不逐格处理整张表
+        search = pattern.search
+        sep_join = CELL_SEP.join
         results: List[List] = []
         for r in iterator:
             if r is None:
                 continue
-            hit = False
-            for idx in target_indices:
-                if idx >= len(r):
-                    continue
-                cell = normalize(r[idx])
-                if not cell:
-                    continue
-                low = cell.lower()
-                if q_low and q_low in low:
-                    hit = True
-                    break
-                if q_digits:
-                    if q_digits in digits_only(cell):
-                        hit = True
-                        break
-            if hit:
-                row_out: List = []
-                for col in TARGET_COLS + EXTRA_OUTPUT_COLS:
-                    if col in name_to_idx:
-                        idx = name_to_idx[col]
-                        row_out.append(r[idx] if idx < len(r) else None)
-                    else:
-                        row_out.append(None)
-                results.append(row_out)
+            n = len(r)
+            cells = [None if idx >= n else convert(r[idx]) for idx in target_indices]
+            text = sep_join(['' if v is None else str(v) for v in cells])
+            if not search(text.lower()):
+                continue
+            row_out: List = []
+            for col in TARGET_COLS + EXTRA_OUTPUT_COLS:
+                if col in name_to_idx:
+                    idx = name_to_idx[col]
+                    row_out.append(convert(r[idx]) if idx < n else None)
+                else:
+                    row_out.append(None)
+            results.append(row_out)
         return TARGET_COLS + EXTRA_OUTPUT_COLS, results
     finally:
-        wb.close()
+        close()
 
 
 def export_results(headers: List[str], rows: List[List], out_path: Path) -> None:
+    """导出查询结果：装了 xlsxwriter 时用其 constant_memory 模式逐行落盘，否则用 openpyxl 只读写模式。"""
+    if xlsxwriter is not None:
+        options = {
+            'constant_memory': True,
+            'use_zip64': True,
+            'strings_to_urls': False,
+            'default_date_format': 'yyyy-mm-dd h:mm:ss',
+        }
+        with xlsxwriter.Workbook(str(out_path), options) as xwb:
+            xws = xwb.add_worksheet('订单查询结果')
+            xws.write_row(0, 0, headers)
+            for i, row in enumerate(rows, 1):
+                xws.write_row(i, 0, row)
+        return
     wb = Workbook(write_only=True)
     ws = wb.active
     ws.title = '订单查询结果'
@@ -13,22 +13,30 @@ import re
 import json
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 ROOT = Path(__file__).resolve().parent.parent
 ENV_PATH = ROOT / '.env.local'
+_ENV_RE = re.compile(r'^([A-Za-z0-9_]+)=(.*)$')
+
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                                       max_retries=Retry(total=2, backoff_factor=0.3)))
 
 def read_env(path: Path) -> dict:
     env = {}
     if not path.exists():
         return env
-    for line in path.read_text(encoding='utf-8').splitlines():
-        line = line.strip()
-        if not line or line.startswith('#'):
-            continue
-        m = re.match(r'^([A-Za-z0-9_]+)=(.*)$', line)
-        if m:
-            k, v = m.group(1), m.group(2)
-            env[k] = v
+    with path.open('r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            m = _ENV_RE.match(line)
+            if m:
+                k, v = m.group(1), m.group(2)
+                env[k] = v
     return env
 
 def write_env(path: Path, updates: dict):
@@ -49,7 +57,7 @@ def main():
     url = 'https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal'
     body = {'app_id': app_id, 'app_secret': app_secret}
     try:
-        resp = requests.post(url, json=body, timeout=30)
+        resp = _SESSION.post(url, json=body, timeout=(3.05, 30))
         resp.raise_for_status()
         data = resp.json()
     except Exception:
@@ -13,12 +13,39 @@ Usage:
 """
 from __future__ import annotations
 import json
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
 
-class DotDict:
-    """允许通过点号访问字典的包装类，支持嵌套。
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _loads(data: bytes) -> Any:
+    """解析 JSON 字节串，装了 orjson 时优先使用。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+
+def _dumps(obj: Any) -> bytes:
+    """序列化为缩进 2 格、保留中文的 UTF-8 JSON，装了 orjson 时优先使用。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class DotDict(SimpleNamespace):
+    """允许通过点号访问字典的包装类，支持嵌套（基于 C 实现的 SimpleNamespace）。
 
     Example:
         d = DotDict({'a': {'b': 1}})
@@ -26,11 +53,10 @@ class DotDict:
     """
 
     def __init__(self, data: Dict[str, Any]):
-        for key, value in data.items():
-            if isinstance(value, dict):
-                setattr(self, key, DotDict(value))
-            else:
-                setattr(self, key, value)
+        super().__init__(**{
+            key: DotDict(value) if isinstance(value, dict) else value
+            for key, value in data.items()
+        })
 
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值，支持默认值。"""
@@ -39,7 +65,7 @@ class DotDict:
     def to_dict(self) -> Dict[str, Any]:
         """转换回普通字典。"""
         result = {}
-        for key, value in self.__dict__.items():
+        for key, value in vars(self).items():
             if isinstance(value, DotDict):
                 result[key] = value.to_dict()
             else:
@@ -50,18 +76,19 @@ class DotDict:
 class Config:
     """配置管理类，提供类型安全的配置访问。"""
 
-    def __init__(self, config_path: Path | str):
+    def __init__(self, config_path: Path | str, data: Optional[Dict[str, Any]] = None):
         self.config_path = Path(config_path)
         self._data: Dict[str, Any] = {}
-        self._load()
+        self._load(data)
 
-    def _load(self) -> None:
-        """从 JSON 文件加载配置。"""
-        if not self.config_path.exists():
-            raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
+    def _load(self, data: Optional[Dict[str, Any]] = None) -> None:
+        """从 JSON 文件加载配置；传入 data 时直接使用已解析的配置字典。"""
+        if data is None:
+            if not self.config_path.exists():
+                raise FileNotFoundError(f"配置文件不存在: {self.config_path}")
+            data = _loads(self.config_path.read_bytes())
 
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            self._data = json.load(f)
+        self._data = data
 
         # 转换为点号访问
         self.defaults = DotDict(self._data.get('defaults', {}))
@@ -77,17 +104,43 @@ class Config:
         self.orders_dampening = self._data.get('orders_dampening', {})
         self.single_order = self._data.get('single_order', {})
 
+        # 品类别名扁平索引（按品类、别名原顺序），以及按偏好单品缓存的匹配结果
+        self._alias_index: List[Tuple[str, str, Dict[str, Any]]] = [
+            (alias, category_name, category_config)
+            for category_name, category_config in self.categories.items()
+            for alias in category_config.get('aliases', [])
+        ]
+        self._category_cache: Dict[str, Dict[str, Any]] = {}
+
+        # 装了 pyahocorasick 时把全部别名编进一个自动机，一次扫描得到所有命中
+        self._alias_automaton = None
+        if ahocorasick is not None and self._alias_index and all(a for a, _, _ in self._alias_index):
+            automaton = ahocorasick.Automaton()
+            for idx, (alias, _, _) in enumerate(self._alias_index):
+                if alias not in automaton:
+                    automaton.add_word(alias, idx)
+            automaton.make_automaton()
+            self._alias_automaton = automaton
+
     @classmethod
     def load(cls, config_path: Path | str = 'tech/config.json') -> Config:
         """加载配置文件的便捷方法。
 
+        同一文件在未修改（mtime 不变）时复用已读入的原始字节，只重新解析，省去文件 I/O；
+        每次返回新实例，调用方修改配置不会影响其他调用方。
+
         Args:
             config_path: 配置文件路径，默认为 'tech/config.json'
 
         Returns:
             Config 实例
         """
-        return cls(config_path)
+        path_str = os.path.abspath(config_path)
+        try:
+            mtime_ns = os.stat(path_str).st_mtime_ns
+        except OSError:
+            return cls(config_path)
+        return cls(config_path, _loads(_cached_bytes(path_str, mtime_ns)))
 
     def get_category_config(self, preferred_item: str) -> Dict[str, Any]:
         """根据偏好单品获取品类配置。
@@ -98,19 +151,38 @@ class Config:
         Returns:
             品类配置字典，如果未匹配则返回 defaults
         """
-        for category_name, category_config in self.categories.items():
-            aliases = category_config.get('aliases', [])
-            for alias in aliases:
-                if alias in preferred_item:
-                    return {
-                        'category_name': category_name,
-                        'gross_margin': category_config.get('gross_margin', self.defaults.gross_margin),
-                        'category_cycle_days': category_config.get('category_cycle_days', self.defaults.category_cycle_days),
-                        'expected_return_rate': category_config.get('expected_return_rate', self.defaults.expected_return_rate),
-                        'touch_cost': category_config.get('touch_cost', self.defaults.touch_cost),
-                        'max_estimated_margin': category_config.get('max_estimated_margin', self.defaults.max_estimated_margin),
-                        'max_estimated_uplift': category_config.get('max_estimated_uplift', self.defaults.max_estimated_uplift),
-                    }
+        cached = self._category_cache.get(preferred_item)
+        if cached is None:
+            cached = self._category_cache[preferred_item] = self._match_category_config(preferred_item)
+        return dict(cached)
+
+    def _match_category_config(self, preferred_item: str) -> Dict[str, Any]:
+        """按别名顺序匹配品类配置（get_category_config 的未缓存实现）。
+
+        多个别名同时命中时取索引最靠前的一个，与逐个别名判断的结果一致。
+        """
+        matched = None
+        if self._alias_automaton is not None:
+            hits = [idx for _, idx in self._alias_automaton.iter(preferred_item)]
+            if hits:
+                matched = self._alias_index[min(hits)]
+        else:
+            for entry in self._alias_index:
+                if entry[0] in preferred_item:
+                    matched = entry
+                    break
+
+        if matched is not None:
+            _, category_name, category_config = matched
+            return {
+                'category_name': category_name,
+                'gross_margin': category_config.get('gross_margin', self.defaults.gross_margin),
+                'category_cycle_days': category_config.get('category_cycle_days', self.defaults.category_cycle_days),
+                'expected_return_rate': category_config.get('expected_return_rate', self.defaults.expected_return_rate),
+                'touch_cost': category_config.get('touch_cost', self.defaults.touch_cost),
+                'max_estimated_margin': category_config.get('max_estimated_margin', self.defaults.max_estimated_margin),
+                'max_estimated_uplift': category_config.get('max_estimated_uplift', self.defaults.max_estimated_uplift),
+            }
 
         # 未匹配，返回默认配置
         return {
@@ -170,13 +242,18 @@ class Config:
             'single_order': self.single_order,
         }
 
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(full_config, f, ensure_ascii=False, indent=2)
+        path.write_bytes(_dumps(full_config))
 
     def __repr__(self) -> str:
         return f"Config(path={self.config_path})"
 
 
+@lru_cache(maxsize=4)
+def _cached_bytes(path_str: str, mtime_ns: int) -> bytes:
+    """按 (绝对路径, mtime) 缓存配置文件原始字节，供 Config.load 复用（bytes 不可变，可安全共享）。"""
+    return Path(path_str).read_bytes()
+
+
 # 便捷函数
 def load_config(config_path: Path | str = 'tech/config.json') -> Config:
     """加载配置的便捷函数。"""
@@ -15,14 +15,19 @@ Usage:
 """
 from __future__ import annotations
 
+import importlib.util
 import time
 import warnings
 from datetime import date, datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+# 装了 python-calamine 时 pandas 可用其 Rust 解析引擎
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') is not None else 'openpyxl'
+
 # 忽略 openpyxl 的警告
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
@@ -51,6 +56,17 @@ COLUMN_ALIASES = {
 }
 
 
+def read_excel_frame(path: Path, **kwargs: Any) -> pd.DataFrame:
+    """读取 Excel 为 DataFrame：装了 python-calamine 时用 Rust 解析引擎，否则回退 openpyxl。"""
+    if EXCEL_ENGINE == 'calamine':
+        try:
+            return pd.read_excel(path, engine='calamine', **kwargs)
+        except (ImportError, ValueError):
+            # pandas < 2.2 不认识 calamine 引擎
+            pass
+    return pd.read_excel(path, engine='openpyxl', **kwargs)
+
+
 def load_excel_fast(
     path: Path | str,
     sheet_name: Optional[str] = None,
@@ -74,9 +90,9 @@ def load_excel_fast(
 
     try:
         if sheet_name:
-            df = pd.read_excel(path, sheet_name=sheet_name, engine='openpyxl')
+            df = read_excel_frame(path, sheet_name=sheet_name)
         else:
-            df = pd.read_excel(path, sheet_name=0, engine='openpyxl')
+            df = read_excel_frame(path, sheet_name=0)
     except Exception as e:
         raise ValueError(f"读取 Excel 失败: {e}")
 
@@ -143,6 +159,29 @@ def to_float(value: Any) -> float:
     return 0.0
 
 
+def to_float_series(series: pd.Series) -> pd.Series:
+    """按列转换为浮点数，逐元素结果与 to_float 一致。
+
+    数值直接取值；字符串去掉货币符号和千分位后取第一个数字片段；其余为 0.0。
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(0.0)
+    is_str = series.str.len().notna()
+    text = (
+        series.str.replace(r'[￥¥,]', '', regex=True)
+        .str.extract(r'([+-]?\d+(?:\.\d+)?)', expand=False)
+    )
+    parsed = text.where(text.notna(), None).astype(float)
+    numbers = pd.to_numeric(series.where(~is_str), errors='coerce')
+    return parsed.where(is_str, numbers).fillna(0.0).astype(float)
+
+
+def deduplicate_phone_series(series: pd.Series) -> pd.Series:
+    """按列提取手机号纯数字，空值或无数字时为 None（与 deduplicate_phone 一致）。"""
+    digits = series.astype(str).str.replace(r'\D', '', regex=True)
+    return digits.astype(object).where(series.notna() & (digits != ''), None)
+
+
 def build_customer_key(name: Any, phone: Optional[str], address: Any) -> str:
     """构建客户唯一标识。"""
     if phone:
@@ -159,7 +198,8 @@ def build_customer_key(name: Any, phone: Optional[str], address: Any) -> str:
 def load_customers_fast(
     df: pd.DataFrame,
     today: date,
-    verbose: bool = False
+    verbose: bool = False,
+    include_details: bool = False,
 ) -> Dict[str, Dict[str, Any]]:
     """使用 Pandas 高效加载并聚合客户数据。
 
@@ -170,6 +210,7 @@ def load_customers_fast(
         df: 原始订单 DataFrame
         today: 今天日期
         verbose: 是否打印进度
+        include_details: 是否附带逐单明细 order_details（下钻时才需要，默认不构建）
 
     Returns:
         Dict[客户key, 客户聚合数据]
@@ -214,20 +255,22 @@ def load_customers_fast(
     })
 
     # 4. 数据清洗
-    work_df['phone'] = work_df['phone_raw'].apply(deduplicate_phone)
+    work_df['phone'] = deduplicate_phone_series(work_df['phone_raw'])
     work_df['pay_date'] = parse_date_vectorized(work_df['pay_date_raw'])
-    work_df['gross'] = work_df['gross'].apply(to_float)
-    work_df['net'] = work_df['net'].apply(to_float)
-    work_df['cost'] = work_df['cost'].apply(to_float)
-    work_df['refund_amount'] = work_df['refund_amount'].apply(to_float)
+    for money_col in ('gross', 'net', 'cost', 'refund_amount'):
+        work_df[money_col] = to_float_series(work_df[money_col])
 
     # Net fallback to gross
     work_df.loc[work_df['net'] == 0, 'net'] = work_df.loc[work_df['net'] == 0, 'gross']
 
-    # 5. 构建客户 key
-    work_df['customer_key'] = work_df.apply(
-        lambda row: build_customer_key(row['name'], row['phone'], row['address']),
-        axis=1
+    # 5. 构建客户 key（规则同 build_customer_key：手机号 > 姓名|地址 > 姓名 > 地址 > 未知客户，按列一次选出）
+    phone = work_df['phone'].fillna('')
+    name = work_df['name'].fillna('').astype(str).str.strip()
+    address = work_df['address'].fillna('').astype(str).str.strip()
+    work_df['customer_key'] = np.select(
+        [phone != '', (name != '') & (address != ''), name != '', address != ''],
+        [phone, name + '|' + address, name, address],
+        default='未知客户',
     )
 
     # 6. 识别取消/退款订单
@@ -248,53 +291,96 @@ def load_customers_fast(
     # 7. 有效订单标记
     work_df['is_valid'] = (~work_df['is_cancelled']) & (work_df['gross'] > 0)
 
-    # 8. 聚合统计
+    # 低基数文本列转为分类类型，分组/计数基于整数编码
+    for cat_col in ('platform', 'owner', 'item', 'manufacturer'):
+        work_df[cat_col] = work_df[cat_col].astype('category')
+
+    # 8. 聚合统计（按客户一次性分组汇总，不再逐客户切片）
+    valid = work_df[work_df['is_valid']]
+    refund = work_df[work_df['is_refund'] & ~work_df['is_cancelled']]
+    cancelled = work_df[work_df['is_cancelled']]
+
+    agg = pd.DataFrame({'total_count': work_df.groupby('customer_key').size()})
+    agg = agg.join(valid.groupby('customer_key').agg(
+        order_count=('gross', 'size'),
+        gross_total=('gross', 'sum'),
+        net_total=('net', 'sum'),
+        cost_total=('cost', 'sum'),
+        first_order_date=('pay_date', 'min'),
+        last_order_date=('pay_date', 'max'),
+    ))
+    agg = agg.join(refund.groupby('customer_key').agg(
+        refund_count=('refund_amount', 'size'),
+        refund_total=('refund_amount', 'sum'),
+    ))
+    agg['cancel_count'] = cancelled.groupby('customer_key').size()
+    for count_col in ('order_count', 'refund_count', 'cancel_count'):
+        agg[count_col] = agg[count_col].fillna(0).astype(int)
+    for sum_col in ('gross_total', 'net_total', 'cost_total', 'refund_total'):
+        agg[sum_col] = agg[sum_col].fillna(0.0)
+
+    # 基本信息（优先取第一条有效订单，否则取该客户第一条订单）
+    info_cols = ['customer_key', 'name', 'phone', 'address']
+    first_valid = valid[info_cols].drop_duplicates('customer_key').set_index('customer_key')
+    first_any = work_df[info_cols].drop_duplicates('customer_key').set_index('customer_key')
+    first_rows = pd.concat([first_valid, first_any[~first_any.index.isin(first_valid.index)]])
+
+    # 平台/负责人/偏好单品（取众数；并列时取较小值，与 Series.mode 一致）
+    def top_value(col: str) -> pd.Series:
+        counts = valid.groupby(['customer_key', col], observed=True).size().reset_index(name='n')
+        counts = counts.sort_values('n', ascending=False, kind='stable').drop_duplicates('customer_key')
+        return counts.set_index('customer_key')[col]
+
+    main_platform = top_value('platform').to_dict()
+    main_owner = top_value('owner').to_dict()
+    preferred_item = top_value('item').to_dict()
+
+    # 订单明细（用于下钻，仅在需要时构建）
+    order_details: Dict[str, List[Dict[str, Any]]] = {}
+    if include_details:
+        detail_cols = [
+            'name', 'platform', 'item', 'gross', 'net', 'cost',
+            'refund_type', 'refund_reason', 'pay_date', 'order_no', 'return_no'
+        ]
+        for key, record in zip(work_df['customer_key'], work_df[detail_cols].to_dict('records')):
+            order_details.setdefault(key, []).append(record)
+
+    info = first_rows.to_dict('index')
     customers: Dict[str, Dict[str, Any]] = {}
 
-    for key, group in work_df.groupby('customer_key'):
+    for key, row in agg.to_dict('index').items():
         key = str(key)
-        valid_orders = group[group['is_valid']]
-        refund_orders = group[group['is_refund'] & ~group['is_cancelled']]
-        cancelled_orders = group[group['is_cancelled']]
-
-        # 基本信息（取第一个非空值）
-        first_valid = valid_orders.iloc[0] if len(valid_orders) > 0 else group.iloc[0]
+        first = info[key]
+        has_valid = row['order_count'] > 0
 
         customer = {
             'key': key,
-            'name': first_valid['name'] if pd.notna(first_valid['name']) else None,
-            'phone': first_valid['phone'] if first_valid['phone'] else None,
-            'address': first_valid['address'] if pd.notna(first_valid['address']) else None,
+            'name': first['name'] if pd.notna(first['name']) else None,
+            'phone': first['phone'] if first['phone'] else None,
+            'address': first['address'] if pd.notna(first['address']) else None,
 
             # 订单统计
-            'order_count': len(valid_orders),
-            'refund_count': len(refund_orders),
-            'cancel_count': len(cancelled_orders),
-            'total_count': len(group),
+            'order_count': row['order_count'],
+            'refund_count': row['refund_count'],
+            'cancel_count': row['cancel_count'],
+            'total_count': row['total_count'],
 
             # 金额统计
-            'gross_total': valid_orders['gross'].sum(),
-            'net_total': valid_orders['net'].sum(),
-            'cost_total': valid_orders['cost'].sum(),
-            'refund_total': refund_orders['refund_amount'].sum(),
+            'gross_total': row['gross_total'],
+            'net_total': row['net_total'],
+            'cost_total': row['cost_total'],
+            'refund_total': row['refund_total'],
 
             # 日期统计
-            'first_order_date': valid_orders['pay_date'].min() if len(valid_orders) > 0 else None,
-            'last_order_date': valid_orders['pay_date'].max() if len(valid_orders) > 0 else None,
-
-            # 平台/负责人（取众数）
-            'main_platform': valid_orders['platform'].mode().iloc[0] if len(valid_orders) > 0 and len(valid_orders['platform'].mode()) > 0 else None,
-            'main_owner': valid_orders['owner'].mode().iloc[0] if len(valid_orders) > 0 and len(valid_orders['owner'].mode()) > 0 else None,
-
-            # 偏好单品（取出现次数最多的）
-            'preferred_item': valid_orders['item'].mode().iloc[0] if len(valid_orders) > 0 and len(valid_orders['item'].mode()) > 0 else None,
+            'first_order_date': row['first_order_date'] if has_valid else None,
+            'last_order_date': row['last_order_date'] if has_valid else None,
 
-            # 订单明细（用于下钻）
-            'order_details': group[[
-                'name', 'platform', 'item', 'gross', 'net', 'cost',
-                'refund_type', 'refund_reason', 'pay_date', 'order_no', 'return_no'
-            ]].to_dict('records'),
+            'main_platform': main_platform.get(key),
+            'main_owner': main_owner.get(key),
+            'preferred_item': preferred_item.get(key),
         }
+        if include_details:
+            customer['order_details'] = order_details[key]
 
         # 计算 AOV
         if customer['order_count'] > 0:
@@ -345,7 +431,7 @@ def load_contact_log_fast(
 
     start_time = time.time()
 
-    df = pd.read_excel(path, engine='openpyxl')
+    df = read_excel_frame(path)
 
     # 查找手机号列
     phone_col = None
@@ -366,16 +452,12 @@ def load_contact_log_fast(
             print(f"⚠️ 联系日志缺少必要列")
         return {}
 
-    df['phone_clean'] = df[phone_col].apply(deduplicate_phone)
+    df['phone_clean'] = deduplicate_phone_series(df[phone_col])
     df['date_parsed'] = parse_date_vectorized(df[date_col])
 
-    # 按手机号分组，取最近日期
-    result = {}
-    for phone, group in df.groupby('phone_clean'):
-        if phone:
-            max_date = group['date_parsed'].max()
-            if pd.notna(max_date):
-                result[phone] = max_date.date()
+    # 按手机号分组，一次取出各自最近日期
+    last_dates = df.groupby('phone_clean')['date_parsed'].max().dropna()
+    result = {phone: max_date.date() for phone, max_date in last_dates.items() if phone}
 
     if verbose:
         elapsed = time.time() - start_time